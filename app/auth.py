@@ -0,0 +1,222 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from fastapi import Depends, HTTPException, Request
+from .core import config
+from .database import engine
+from . import models
+
+logger = logging.getLogger(__name__)
+
+class InvalidToken(Exception):
+    pass
+
+class RefreshTokenReused(InvalidToken):
+    pass
+
+class Claims:
+    __slots__ = ("user_id", "role", "jti", "expires_at")
+
+    def __init__(self, user_id, role, jti, expires_at):
+        self.user_id = user_id
+        self.role = role
+        self.jti = jti
+        self.expires_at = expires_at
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+if config.AUTH_SECRET_KEY:
+    _secret = config.AUTH_SECRET_KEY.encode()
+else:
+    _secret = secrets.token_bytes(32)
+    logger.warning("AUTH_SECRET_KEY is not set; using a per-process key, so tokens will not survive restarts or work across workers.")
+
+# The header is fixed, which also pins the algorithm: tokens claiming anything else are rejected.
+_HEADER = _b64encode(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode())
+
+def _sign(signing_input):
+    return _b64encode(hmac.new(_secret, signing_input, hashlib.sha256).digest())
+
+def create_access_token(user_id, role):
+    now = int(time.time())
+    payload = _b64encode(json.dumps({
+        "sub": str(user_id),
+        "role": role.value,
+        "iat": now,
+        "exp": now + config.AUTH_ACCESS_TOKEN_SECONDS,
+        "jti": secrets.token_hex(8),
+    }, separators=(",", ":")).encode())
+    signing_input = _HEADER + b"." + payload
+    return (signing_input + b"." + _sign(signing_input)).decode()
+
+def verify_access_token(token):
+    # Signature, claims and expiry only: pure CPU, safe to call on the event loop. Anything
+    # that authorizes a request must use decode_access_token, which also checks revocation.
+    try:
+        header, payload, signature = token.encode().split(b".")
+    except ValueError:
+        raise InvalidToken("Malformed token.")
+    if header != _HEADER or not hmac.compare_digest(_sign(header + b"." + payload), signature):
+        raise InvalidToken("Invalid token signature.")
+
+    try:
+        data = json.loads(_b64decode(payload))
+        claims = Claims(int(data["sub"]), models.UserRole(data["role"]), data["jti"], data["exp"])
+    except (KeyError, ValueError):
+        raise InvalidToken("Invalid token claims.")
+    if claims.expires_at <= time.time():
+        raise InvalidToken("Token expired.")
+    return claims
+
+def decode_access_token(token):
+    claims = verify_access_token(token)
+    # May reload the revocation list from the database.
+    if revocations.is_revoked(claims.jti):
+        raise InvalidToken("Token revoked.")
+    return claims
+
+class RevocationCache:
+    # Revoked access tokens are rare and short-lived, so each process keeps the whole
+    # list in memory and reloads it at most every AUTH_REVOCATION_CACHE_SECONDS.
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._revoked = frozenset()
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        now = datetime.now(timezone.utc)
+        with engine.connect() as conn:
+            rows = conn.execute(
+                models.Revoked_token.__table__.select()
+                .with_only_columns(models.Revoked_token.jti)
+                .where(models.Revoked_token.expires_at > now)
+            ).all()
+        return frozenset(jti for (jti,) in rows)
+
+    def is_revoked(self, jti):
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.ttl:
+            with self._lock:
+                if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl:
+                    try:
+                        self._revoked = self._load()
+                    except Exception as e:
+                        # Keep serving from the previous list rather than failing every request.
+                        logger.error(f"Failed to reload token revocation list: {str(e)}")
+                    self._loaded_at = time.monotonic()
+        return jti in self._revoked
+
+    def add(self, jti):
+        with self._lock:
+            self._revoked = self._revoked | {jti}
+
+revocations = RevocationCache(config.AUTH_REVOCATION_CACHE_SECONDS)
+
+def revoke_access_token(db, claims):
+    db.merge(models.Revoked_token(
+        jti=claims.jti,
+        expires_at=datetime.fromtimestamp(claims.expires_at, timezone.utc)
+    ))
+    revocations.add(claims.jti)
+
+def purge_revoked_tokens(db):
+    now = datetime.now(timezone.utc)
+    # Rotated refresh tokens are kept until they expire, for reuse detection.
+    db.query(models.Refresh_token).filter(models.Refresh_token.expires_at <= now).delete(synchronize_session=False)
+    return db.query(models.Revoked_token).filter(
+        models.Revoked_token.expires_at <= now
+    ).delete(synchronize_session=False)
+
+def _digest(secret):
+    return hashlib.sha256(secret.encode()).digest()
+
+def issue_refresh_token(db, user_id):
+    secret = secrets.token_urlsafe(32)
+    token = models.Refresh_token(
+        user_id=user_id,
+        token_hash=_digest(secret),
+        expires_at=datetime.now(timezone.utc) + timedelta(days=config.AUTH_REFRESH_TOKEN_DAYS)
+    )
+    db.add(token)
+    db.flush()
+    return f"{token.id}.{secret}"
+
+def _find_refresh_token(db, refresh_token):
+    token_id, _, secret = refresh_token.partition(".")
+    if not token_id.isdigit() or not secret:
+        return None
+    # Locked, so two refreshes racing with one token can't both rotate it.
+    token = db.get(models.Refresh_token, int(token_id), with_for_update=True)
+    if token is None or not hmac.compare_digest(token.token_hash, _digest(secret)):
+        return None
+    expires_at = token.expires_at if token.expires_at.tzinfo else token.expires_at.replace(tzinfo=timezone.utc)
+    if expires_at <= datetime.now(timezone.utc):
+        db.delete(token)
+        return None
+    return token
+
+def rotate_refresh_token(db, refresh_token):
+    token = _find_refresh_token(db, refresh_token)
+    if token is None:
+        raise InvalidToken("Invalid refresh token.")
+    user_id = token.user_id
+    if token.used_at is not None:
+        # A rotated token came back, so someone holds a copy: end all of the user's sessions.
+        db.query(models.Refresh_token).filter(models.Refresh_token.user_id == user_id).delete(synchronize_session=False)
+        raise RefreshTokenReused(f"Refresh token {token.id} of user {user_id} was reused; revoked all refresh tokens.")
+    token.used_at = datetime.now(timezone.utc)
+    return user_id, issue_refresh_token(db, user_id)
+
+def revoke_refresh_token(db, refresh_token, user_id):
+    token = _find_refresh_token(db, refresh_token)
+    if token is not None and token.user_id == user_id:
+        db.delete(token)
+
+def authenticate(request: Request):
+    cached = getattr(request.state, "claims", None)
+    if cached is not None:
+        return cached
+
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Not authenticated.", headers={"WWW-Authenticate": "Bearer"})
+    try:
+        claims = decode_access_token(token)
+    except InvalidToken as e:
+        logger.warning(f"Rejected access token: {str(e)}")
+        raise HTTPException(status_code=401, detail="Invalid or expired token.", headers={"WWW-Authenticate": "Bearer"})
+
+    request.state.claims = claims
+    return claims
+
+def authorize_path_user(request: Request):
+    # Installed app-wide: any route with a {user_id} path parameter must be called by that user.
+    user_id = request.path_params.get("user_id")
+    if user_id is None:
+        return None
+    claims = authenticate(request)
+    if str(claims.user_id) != str(user_id):
+        logger.warning(f"User {claims.user_id} attempted to act as user {user_id}.")
+        raise HTTPException(status_code=403, detail="Token does not belong to this user.")
+    return claims
+
+def require_role(role):
+    def check_role(claims: Claims = Depends(authenticate)):
+        if claims.role != role:
+            logger.error(f"User {claims.user_id} does not have {role.value} role.")
+            raise HTTPException(status_code=403, detail=f"Only {role.value}s can perform this action.")
+        return claims
+    return check_role
+
+require_farmer = require_role(models.UserRole.farmer)
@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+from .core import config
+from . import models, schemas
+
+logger = logging.getLogger(__name__)
+
+class CategoryRecord:
+    __slots__ = ("category", "species_ids", "json")
+
+    def __init__(self, category, species_ids, json):
+        self.category = category
+        self.species_ids = species_ids
+        self.json = json
+
+class SpeciesRecord:
+    __slots__ = ("id", "category_name", "sub_species_ids", "json")
+
+    def __init__(self, id, category_name, sub_species_ids, json):
+        self.id = id
+        self.category_name = category_name
+        self.sub_species_ids = sub_species_ids
+        self.json = json
+
+class SubSpeciesRecord:
+    __slots__ = ("id", "species_id", "json")
+
+    def __init__(self, id, species_id, json):
+        self.id = id
+        self.species_id = species_id
+        self.json = json
+
+class CatalogSnapshot:
+    __slots__ = ("version", "categories", "species", "sub_species")
+
+    def __init__(self, version, categories, species, sub_species):
+        self.version = version
+        self.categories = categories
+        self.species = species
+        self.sub_species = sub_species
+
+    def species_json(self, species_id):
+        record = self.species.get(species_id)
+        return record.json if record else None
+
+    def sub_species_json(self, species_id, sub_species_id):
+        record = self.sub_species.get(sub_species_id)
+        if record is None or record.species_id != species_id:
+            return None
+        return record.json
+
+    def species_list_json(self, species_ids):
+        species = self.species
+        return b"[" + b",".join(species[i].json for i in species_ids if i in species) + b"]"
+
+    def sub_species_list_json(self, species_id):
+        record = self.species.get(species_id)
+        if record is None:
+            return b"[]"
+        sub_species = self.sub_species
+        return b"[" + b",".join(sub_species[i].json for i in record.sub_species_ids) + b"]"
+
+    def species_ids_for_category(self, category):
+        record = self.categories.get(category)
+        return record.species_ids if record else ()
+
+_snapshot = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+def current_version(db):
+    version = db.query(models.Catalog_version.version).filter(models.Catalog_version.id == 1).scalar()
+    return version or 0
+
+def bump_version(db):
+    # Runs inside the caller's transaction so the new version becomes visible with the change.
+    updated = db.query(models.Catalog_version).filter(models.Catalog_version.id == 1).update(
+        {models.Catalog_version.version: models.Catalog_version.version + 1},
+        synchronize_session=False
+    )
+    if not updated:
+        db.add(models.Catalog_version(id=1, version=1))
+
+def invalidate():
+    global _checked_at
+    _checked_at = 0.0
+
+def build_snapshot(db, version):
+    sub_species_ids = {}
+    sub_species = {}
+    for row in db.query(models.Sub_species).order_by(models.Sub_species.id):
+        sub_species[row.id] = SubSpeciesRecord(
+            row.id, row.species_id, schemas.SubSpecies.model_validate(row).model_dump_json().encode()
+        )
+        sub_species_ids.setdefault(row.species_id, []).append(row.id)
+
+    species_ids = {}
+    species = {}
+    for row in db.query(models.Species).order_by(models.Species.id):
+        species[row.id] = SpeciesRecord(
+            row.id,
+            row.category_name,
+            tuple(sub_species_ids.get(row.id, ())),
+            schemas.Species.model_validate(row).model_dump_json().encode()
+        )
+        species_ids.setdefault(row.category_name, []).append(row.id)
+
+    categories = {}
+    for category, description in db.query(models.Category.category, models.Category.description):
+        categories[category] = CategoryRecord(
+            category,
+            tuple(species_ids.get(category, ())),
+            schemas.Category(category=category, description=description).model_dump_json().encode()
+        )
+
+    return CatalogSnapshot(version, categories, species, sub_species)
+
+def get_snapshot(db):
+    global _snapshot, _checked_at
+
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - _checked_at < config.CATALOG_CHECK_SECONDS:
+        return snapshot
+
+    with _lock:
+        if _snapshot is not None and time.monotonic() - _checked_at < config.CATALOG_CHECK_SECONDS:
+            return _snapshot
+
+        version = current_version(db)
+        if _snapshot is None or _snapshot.version != version:
+            start = time.perf_counter()
+            new_snapshot = build_snapshot(db, version)
+            _snapshot = new_snapshot
+            logger.info(
+                f"Catalog snapshot v{version} loaded in {time.perf_counter() - start:.3f}s: "
+                f"{len(new_snapshot.categories)} categories, {len(new_snapshot.species)} species, "
+                f"{len(new_snapshot.sub_species)} sub-species."
+            )
+        _checked_at = time.monotonic()
+        return _snapshot
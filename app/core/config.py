@@ -0,0 +1,113 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "true").lower() == "true"
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "4"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_MAX_IN_FLIGHT = int(os.getenv("OUTBOX_MAX_IN_FLIGHT", "200"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1.0"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_RETRY_BACKOFF = float(os.getenv("OUTBOX_RETRY_BACKOFF", "2.0"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+# Processed events are deleted this long after they finish; failed ones are kept longer for inspection.
+OUTBOX_RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS", "24"))
+OUTBOX_FAILED_RETENTION_HOURS = float(os.getenv("OUTBOX_FAILED_RETENTION_HOURS", "168"))
+OUTBOX_PURGE_BATCH_SIZE = int(os.getenv("OUTBOX_PURGE_BATCH_SIZE", "1000"))
+OUTBOX_PURGE_SECONDS = float(os.getenv("OUTBOX_PURGE_SECONDS", "300"))
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+QUERY_DEBUG_ENABLED = os.getenv("QUERY_DEBUG_ENABLED", "false").lower() == "true"
+QUERY_DEBUG_SLOW_MS = float(os.getenv("QUERY_DEBUG_SLOW_MS", "100"))
+QUERY_DEBUG_REPEAT_THRESHOLD = int(os.getenv("QUERY_DEBUG_REPEAT_THRESHOLD", "3"))
+QUERY_DEBUG_EXPLAIN = os.getenv("QUERY_DEBUG_EXPLAIN", "true").lower() == "true"
+QUERY_DEBUG_HISTORY = int(os.getenv("QUERY_DEBUG_HISTORY", "100"))
+
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+PARTITION_RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", "24"))
+# How often the background worker creates upcoming partitions; 0 leaves it to startup and the CLI.
+PARTITION_MAINTENANCE_SECONDS = float(os.getenv("PARTITION_MAINTENANCE_SECONDS", "3600"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+ARCHIVE_COMPRESSION = os.getenv("ARCHIVE_COMPRESSION", "zstd")
+ARCHIVE_CHUNK_SIZE = int(os.getenv("ARCHIVE_CHUNK_SIZE", "50000"))
+
+LIST_MAX_LIMIT = int(os.getenv("LIST_MAX_LIMIT", "500"))
+
+CATALOG_CHECK_SECONDS = float(os.getenv("CATALOG_CHECK_SECONDS", "5"))
+
+PASSWORD_SCRYPT_LOG_N = int(os.getenv("PASSWORD_SCRYPT_LOG_N", "14"))
+PASSWORD_SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", "8"))
+PASSWORD_SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", "1"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+SIGNUP_BATCH_MAX = int(os.getenv("SIGNUP_BATCH_MAX", "100"))
+
+AUTH_SECRET_KEY = os.getenv("AUTH_SECRET_KEY", "")
+AUTH_ACCESS_TOKEN_SECONDS = int(os.getenv("AUTH_ACCESS_TOKEN_SECONDS", "900"))
+AUTH_REFRESH_TOKEN_DAYS = int(os.getenv("AUTH_REFRESH_TOKEN_DAYS", "30"))
+AUTH_REVOCATION_CACHE_SECONDS = float(os.getenv("AUTH_REVOCATION_CACHE_SECONDS", "30"))
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_DEFAULT_RATE = float(os.getenv("RATE_LIMIT_DEFAULT_RATE", "50"))
+RATE_LIMIT_DEFAULT_BURST = int(os.getenv("RATE_LIMIT_DEFAULT_BURST", "100"))
+RATE_LIMIT_LIST_RATE = float(os.getenv("RATE_LIMIT_LIST_RATE", "5"))
+RATE_LIMIT_LIST_BURST = int(os.getenv("RATE_LIMIT_LIST_BURST", "20"))
+RATE_LIMIT_LOGIN_RATE = float(os.getenv("RATE_LIMIT_LOGIN_RATE", "0.2"))
+RATE_LIMIT_LOGIN_BURST = int(os.getenv("RATE_LIMIT_LOGIN_BURST", "5"))
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "")
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+COMPRESSION_ENCODINGS = [name.strip() for name in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if name.strip()]
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+MSGPACK_ENABLED = os.getenv("MSGPACK_ENABLED", "true").lower() == "true"
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "1000"))
+
+EVENTS_ENABLED = os.getenv("EVENTS_ENABLED", "true").lower() == "true"
+# "auto" uses Postgres LISTEN/NOTIFY when the primary is Postgres, else an in-process bus.
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "auto")
+EVENTS_CHANNEL = os.getenv("EVENTS_CHANNEL", "farm_events")
+EVENTS_MAX_PENDING = int(os.getenv("EVENTS_MAX_PENDING", "1000"))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+# Cap on objects a single batched query may return, across every level of the include tree.
+GRAPH_MAX_NODES = int(os.getenv("GRAPH_MAX_NODES", "5000"))
+
+PURGE_ENABLED = os.getenv("PURGE_ENABLED", "true").lower() == "true"
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "1000"))
+# Pause between batches so a large purge yields locks and I/O to live traffic.
+PURGE_BATCH_PAUSE_SECONDS = float(os.getenv("PURGE_BATCH_PAUSE_SECONDS", "0.05"))
+PURGE_POLL_INTERVAL = float(os.getenv("PURGE_POLL_INTERVAL", "2.0"))
+PURGE_LEASE_SECONDS = int(os.getenv("PURGE_LEASE_SECONDS", "60"))
+PURGE_MAX_ATTEMPTS = int(os.getenv("PURGE_MAX_ATTEMPTS", "5"))
+# Soft-deleted users, farms and listings are purged this long after deletion, unless sales history still refers to them.
+PURGE_RETENTION_DAYS = float(os.getenv("PURGE_RETENTION_DAYS", "30"))
+PURGE_SWEEP_SECONDS = float(os.getenv("PURGE_SWEEP_SECONDS", "3600"))
+
+COUNTERS_BATCH_SIZE = int(os.getenv("COUNTERS_BATCH_SIZE", "1000"))
+# How often the background worker re-derives order and farm counters; 0 disables it.
+COUNTERS_RECONCILE_SECONDS = float(os.getenv("COUNTERS_RECONCILE_SECONDS", "86400"))
+
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+# 0 starts one worker process per CPU core.
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "0"))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+SERVER_KEEPALIVE_SECONDS = int(os.getenv("SERVER_KEEPALIVE_SECONDS", "5"))
+# On SIGTERM, in-flight requests get this long to finish before a worker closes its connections.
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+SERVER_WARM_CACHES = os.getenv("SERVER_WARM_CACHES", "true").lower() == "true"
+
+# Per-route query budgets, declared with query_budget.query_budget() and counted by the
+# metrics middleware: "warn" logs overruns, "raise" fails the request (for tests) and, for
+# queries run before a commit, rolls the write back, "off".
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "warn")
+# Budget for routes that don't declare one; 0 leaves them unchecked.
+QUERY_BUDGET_DEFAULT = int(os.getenv("QUERY_BUDGET_DEFAULT", "50"))
+# "raise" makes a lazy relationship load that needs a query fail instead of running it.
+ORM_LAZY_LOAD = os.getenv("ORM_LAZY_LOAD", "select")
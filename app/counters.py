@@ -0,0 +1,134 @@
+import argparse
+import logging
+from decimal import Decimal
+from sqlalchemy import func, or_, select, update
+from .database import SessionLocal
+from .core import config
+from . import models
+
+logger = logging.getLogger(__name__)
+
+# Held by the one worker process that runs the scheduled reconciliation.
+RECONCILE_LOCK_ID = 7302
+
+# Order.item_count/total and Farm.listing_count/lifetime_revenue are kept up to date
+# by the writes below, in the same transaction as the rows they summarize, so
+# dashboards read one row instead of aggregating. reconcile() re-derives them from
+# the source rows to repair drift from writes that bypass the API (bulk loads,
+# purges, manual fixes). Revenue of archived transactions is carried in
+# Farm.archived_revenue, so archiving a partition doesn't shrink lifetime_revenue.
+
+def to_decimal(value):
+    # Money goes to the database as Decimal so Postgres adds numerics, not floats.
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+def adjust_order(db, order_id, items=0, amount=0):
+    # A relative UPDATE: concurrent writers add up instead of overwriting each other.
+    db.execute(
+        update(models.Order)
+        .where(models.Order.id == order_id)
+        .values(item_count=models.Order.item_count + items, total=models.Order.total + to_decimal(amount))
+        .execution_options(synchronize_session=False)
+    )
+
+def adjust_farm(db, farm_id, listings=0, revenue=0):
+    db.execute(
+        update(models.Farm)
+        .where(models.Farm.id == farm_id)
+        .values(
+            listing_count=models.Farm.listing_count + listings,
+            lifetime_revenue=models.Farm.lifetime_revenue + to_decimal(revenue),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def remove_order_revenue(db, order_id):
+    # Deleting an order cascades to its transactions; take their revenue off each farm.
+    revenue_by_farm = db.execute(
+        select(models.Transaction.farm_id, func.sum(models.Transaction.total_amount))
+        .where(models.Transaction.order_id == order_id)
+        .group_by(models.Transaction.farm_id)
+    ).all()
+    for farm_id, revenue in revenue_by_farm:
+        adjust_farm(db, farm_id, revenue=-to_decimal(revenue))
+
+def _expected_order_counters():
+    return {
+        "item_count": (
+            select(func.count(models.Order_item.id))
+            .where(models.Order_item.order_id == models.Order.id)
+            .scalar_subquery()
+        ),
+        "total": (
+            select(func.coalesce(func.sum(models.Order_item.total_price), 0))
+            .where(models.Order_item.order_id == models.Order.id)
+            .scalar_subquery()
+        ),
+    }
+
+def _expected_farm_counters():
+    return {
+        "listing_count": (
+            select(func.count(models.Farm_species.id))
+            .where(models.Farm_species.farm_id == models.Farm.id, models.Farm_species.deleted_at.is_(None))
+            .scalar_subquery()
+        ),
+        "lifetime_revenue": models.Farm.archived_revenue + (
+            select(func.coalesce(func.sum(models.Transaction.total_amount), 0))
+            .where(models.Transaction.farm_id == models.Farm.id)
+            .scalar_subquery()
+        ),
+    }
+
+def _reconcile_model(db, model, expected, batch_size):
+    fixed = 0
+    last_id = 0
+    while True:
+        # Lock the batch first: once a concurrent writer's adjustment has committed, the
+        # UPDATE below sees its rows too, and later writers wait for this batch.
+        ids = db.execute(
+            select(model.id).where(model.id > last_id).order_by(model.id).limit(batch_size).with_for_update()
+        ).scalars().all()
+        if not ids:
+            return fixed
+        drifted = or_(*(getattr(model, column) != value for column, value in expected.items()))
+        fixed += db.execute(
+            update(model)
+            .where(model.id.in_(ids), drifted)
+            .values(**expected)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        last_id = ids[-1]
+
+def reconcile(batch_size=None):
+    batch_size = batch_size or config.COUNTERS_BATCH_SIZE
+    db = SessionLocal()
+    try:
+        fixed = {
+            "orders": _reconcile_model(db, models.Order, _expected_order_counters(), batch_size),
+            "farms": _reconcile_model(db, models.Farm, _expected_farm_counters(), batch_size),
+        }
+        if any(fixed.values()):
+            logger.warning(f"Counter reconciliation corrected {fixed['orders']} orders and {fixed['farms']} farms.")
+        else:
+            logger.info("Counter reconciliation found no drift.")
+        return fixed
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Counter reconciliation failed: {str(e)}")
+        raise
+
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-derive order and farm counters from their source rows.")
+    parser.add_argument("command", choices=("reconcile",))
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+    print(reconcile(args.batch_size))
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,142 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from fastapi import Request
 from dotenv import load_dotenv
+import itertools
+import logging
 import os
+import threading
+import time
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+REPLICA_STICKY_COOKIE = "last_write"
 
 engine = create_engine(DATABASE_URL)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+replica_engines = [create_engine(url, pool_pre_ping=True) for url in DATABASE_REPLICA_URLS]
+
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys, ON DELETE CASCADE included, unless switched on per connection.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+for sqlite_engine in [engine] + replica_engines:
+    if sqlite_engine.dialect.name == "sqlite":
+        event.listen(sqlite_engine, "connect", enable_sqlite_foreign_keys)
+
+class ReplicaSet:
+    def __init__(self, engines):
+        self.engines = engines
+        self._down_until = {}
+        self._cycle = itertools.cycle(engines) if engines else None
+        self._lock = threading.Lock()
+
+    def choose(self):
+        if not self.engines:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.engines)):
+                candidate = next(self._cycle)
+                if self._down_until.get(candidate, 0) <= now:
+                    return candidate
+        return None
+
+    def mark_down(self, replica):
+        with self._lock:
+            self._down_until[replica] = time.monotonic() + REPLICA_RETRY_SECONDS
+        logger.warning(f"Replica {replica.url.render_as_string(hide_password=True)} marked unhealthy for {REPLICA_RETRY_SECONDS}s.")
+
+replicas = ReplicaSet(replica_engines)
+
+_last_write = {}
+_last_write_lock = threading.Lock()
+
+def record_write(user_id):
+    now = time.monotonic()
+    with _last_write_lock:
+        _last_write[user_id] = now
+        if len(_last_write) > 10000:
+            for key, written_at in list(_last_write.items()):
+                if now - written_at > REPLICA_STICKY_SECONDS:
+                    del _last_write[key]
+
+def wrote_recently(user_id, request=None):
+    written_at = _last_write.get(user_id)
+    if written_at is not None and time.monotonic() - written_at < REPLICA_STICKY_SECONDS:
+        return True
+    # _last_write only covers this process; the cookie carries the write across workers.
+    try:
+        cookie_written_at = float(request.cookies.get(REPLICA_STICKY_COOKIE, "")) if request is not None else None
+    except ValueError:
+        return False
+    return cookie_written_at is not None and 0 <= time.time() - cookie_written_at < REPLICA_STICKY_SECONDS
+
+async def replica_sticky_middleware(request: Request, call_next):
+    response = await call_next(request)
+    wrote_at = getattr(request.state, "wrote_at", None)
+    if wrote_at is not None:
+        response.set_cookie(
+            REPLICA_STICKY_COOKIE, f"{wrote_at:.3f}", max_age=max(1, int(REPLICA_STICKY_SECONDS)), httponly=True, samesite="lax"
+        )
+    return response
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is not None and not self._flushing:
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
+@event.listens_for(SessionLocal, "after_commit")
+def mark_session_wrote(session):
+    session.info["wrote"] = True
+    request = session.info.get("request")
+    if request is not None and request.path_params.get("user_id") is not None:
+        # Dependency teardown runs after the response has gone out, so note it now.
+        request.state.wrote_at = time.time()
 
 Base = declarative_base()
 
-def get_db():
+def get_db(request: Request):
     db = SessionLocal()
+    db.info["request"] = request
+    try:
+        yield db
+    finally:
+        user_id = request.path_params.get("user_id")
+        if db.info.get("wrote") and user_id is not None:
+            # Read-your-writes: send this user's reads to the primary until replicas catch up.
+            record_write(user_id)
+        db.close()
+
+def get_read_db(request: Request):
+    db = SessionLocal()
+    user_id = request.path_params.get("user_id")
+
+    if user_id is None or not wrote_recently(user_id, request):
+        replica = replicas.choose()
+        if replica is not None:
+            db.info["replica"] = replica
+            try:
+                db.connection()
+            except OperationalError:
+                db.rollback()
+                db.info.pop("replica")
+                replicas.mark_down(replica)
+
     try:
         yield db
     finally:
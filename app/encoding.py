@@ -0,0 +1,225 @@
+import json
+import logging
+import zlib
+from starlette.datastructures import MutableHeaders
+from .core import config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+COMPRESSIBLE_TYPES = (b"application/json", b"application/x-ndjson", b"application/msgpack", b"text/")
+MSGPACK_TYPE = "application/msgpack"
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self):
+        self._compressor = zlib.compressobj(config.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=config.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+class ZstdEncoder:
+    name = "zstd"
+
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=config.COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+def available_encoders():
+    encoders = {"gzip": GzipEncoder}
+    if brotli is not None:
+        encoders["br"] = BrotliEncoder
+    if zstandard is not None:
+        encoders["zstd"] = ZstdEncoder
+    return encoders
+
+def choose_encoding(accept_encoding, preference):
+    # Highest q-value wins; ties go to the server's preference order.
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best = None
+    best_q = 0.0
+    for name in preference:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+def _header(scope, wanted):
+    for name, value in scope["headers"]:
+        if name == wanted:
+            return value.decode("latin-1")
+    return ""
+
+def _compressible(content_type):
+    content_type = content_type.encode("latin-1")
+    return any(content_type.startswith(prefix) for prefix in COMPRESSIBLE_TYPES)
+
+def _msgpack_default(value):
+    return str(value)
+
+class ResponseEncodingMiddleware:
+    def __init__(self, app, minimum_size=None, preference=None):
+        self.app = app
+        self.minimum_size = config.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+        self.encoders = available_encoders()
+        self.preference = [name for name in (preference or config.COMPRESSION_ENCODINGS) if name in self.encoders]
+        self._choices = {}
+        missing = [name for name in (preference or config.COMPRESSION_ENCODINGS) if name not in self.encoders]
+        if missing:
+            logger.info(f"Response encodings {', '.join(missing)} are unavailable; install their packages to enable them.")
+
+    def _encoding_for(self, accept_encoding):
+        try:
+            return self._choices[accept_encoding]
+        except KeyError:
+            choice = choose_encoding(accept_encoding, self.preference) if accept_encoding else None
+            if len(self._choices) < 1000:
+                self._choices[accept_encoding] = choice
+            return choice
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._encoding_for(_header(scope, b"accept-encoding"))
+        negotiate_msgpack = msgpack is not None and config.MSGPACK_ENABLED
+        use_msgpack = negotiate_msgpack and MSGPACK_TYPE in _header(scope, b"accept")
+        if encoding is None and not negotiate_msgpack:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _EncodingResponder(
+            send, self.encoders[encoding] if encoding else None, negotiate_msgpack, use_msgpack, self.minimum_size
+        )
+        await self.app(scope, receive, responder.send)
+
+class _EncodingResponder:
+    def __init__(self, send, encoder_class, negotiate_msgpack, use_msgpack, minimum_size):
+        self._send = send
+        self.encoder_class = encoder_class
+        self.negotiate_msgpack = negotiate_msgpack
+        self.use_msgpack = use_msgpack
+        self.minimum_size = minimum_size
+        self.start = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk shows whether the response is small or streamed.
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(raw=start["headers"])
+            content_type = headers.get("content-type", "")
+            if "content-encoding" in headers or not _compressible(content_type):
+                self.passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+
+            if self.negotiate_msgpack and content_type.startswith("application/json"):
+                # JSON responses differ by Accept whether or not this client asked for
+                # MessagePack, so caches must key every one of them on it.
+                headers.add_vary_header("Accept")
+                if self.use_msgpack and not more_body:
+                    body = msgpack.packb(json.loads(body), default=_msgpack_default)
+                    headers["content-type"] = MSGPACK_TYPE
+
+            if self.encoder_class is not None:
+                headers.add_vary_header("Accept-Encoding")
+                if more_body or len(body) >= self.minimum_size:
+                    self.encoder = self.encoder_class()
+                    headers["content-encoding"] = self.encoder.name
+
+            if self.encoder is None:
+                self.passthrough = True
+                if not more_body:
+                    headers["content-length"] = str(len(body))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+            if more_body:
+                del headers["content-length"]
+            else:
+                body = self.encoder.compress(body) + self.encoder.finish()
+                headers["content-length"] = str(len(body))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(start)
+
+        # Streaming: flush every chunk so clients of the export paths see rows as they are produced.
+        if more_body:
+            chunk = self.encoder.compress(body) + self.encoder.flush()
+        else:
+            chunk = self.encoder.compress(body) + self.encoder.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
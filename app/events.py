@@ -0,0 +1,256 @@
+import asyncio
+import itertools
+import json
+import logging
+import select
+import threading
+from collections import deque
+from sqlalchemy import event, text
+from .core import config
+from .database import engine, SessionLocal
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+EVENTS_DELIVERED = metrics.Counter("events_delivered_total", "Events fanned out to stream subscribers.", ("type",))
+EVENTS_DROPPED = metrics.Counter("events_subscribers_dropped_total", "Stream subscribers disconnected for falling behind.")
+
+# NOTIFY payloads are capped at 8000 bytes; leave room for the JSON array brackets.
+_NOTIFY_MAX_BYTES = 7000
+
+def farm_topic(farm_id):
+    return f"farm:{farm_id}"
+
+def user_topic(user_id):
+    return f"user:{user_id}"
+
+def publish(db, event_type, data, topics, key=None):
+    # Staged on the session and only released once the transaction commits, so
+    # subscribers never see stock or orders that were rolled back. Events with
+    # the same key coalesce: only the latest is delivered if several are queued.
+    db.info.setdefault("events", []).append({
+        "type": event_type,
+        "key": key,
+        "topics": [str(topic) for topic in topics],
+        "data": data,
+    })
+
+def _use_notify():
+    return config.EVENTS_BACKEND == "postgres" or (config.EVENTS_BACKEND == "auto" and engine.dialect.driver == "psycopg2")
+
+@event.listens_for(SessionLocal, "before_commit")
+def _notify_staged_events(session):
+    # With LISTEN/NOTIFY the events travel inside the transaction: Postgres delivers
+    # them to every worker's listener at commit and drops them on rollback.
+    staged = session.info.get("events")
+    if not staged or not _use_notify():
+        return
+    session.info["events"] = []
+    chunk, size = [], 0
+    for item in staged:
+        encoded = json.dumps(item, separators=(",", ":"), default=str)
+        if chunk and size + len(encoded) > _NOTIFY_MAX_BYTES:
+            session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": config.EVENTS_CHANNEL, "payload": "[" + ",".join(chunk) + "]"})
+            chunk, size = [], 0
+        chunk.append(encoded)
+        size += len(encoded) + 1
+    session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": config.EVENTS_CHANNEL, "payload": "[" + ",".join(chunk) + "]"})
+
+@event.listens_for(SessionLocal, "after_commit")
+def _release_staged_events(session):
+    staged = session.info.pop("events", None)
+    if staged:
+        hub.publish_threadsafe(staged)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_staged_events(session):
+    session.info.pop("events", None)
+
+class Subscriber:
+    __slots__ = ("topics", "pending", "wake", "overflowed", "max_pending")
+
+    def __init__(self, topics, max_pending):
+        self.topics = topics
+        self.pending = {}
+        self.wake = asyncio.Event()
+        self.overflowed = False
+        self.max_pending = max_pending
+
+    def deliver(self, key, frame):
+        if self.overflowed:
+            return
+        if key in self.pending:
+            # Coalesce: drop the stale frame and append the new one so order follows the latest update.
+            del self.pending[key]
+        elif len(self.pending) >= self.max_pending:
+            self.overflowed = True
+            self.pending.clear()
+        if not self.overflowed:
+            self.pending[key] = frame
+        self.wake.set()
+
+    def drain(self):
+        frames = list(self.pending.values())
+        self.pending.clear()
+        self.wake.clear()
+        return frames
+
+class EventHub:
+    # One per process, owned by the event loop. Publishers on other threads hand
+    # batches over through publish_threadsafe; each event is encoded once and the
+    # same bytes are queued for every subscriber of its topics.
+    def __init__(self, max_pending=None):
+        self.max_pending = max_pending or config.EVENTS_MAX_PENDING
+        self._topics = {}
+        self._loop = None
+        self._inbox = deque()
+        self._inbox_lock = threading.Lock()
+        self._flush_scheduled = False
+        self._sequence = itertools.count(1)
+
+    def attach(self, loop):
+        self._loop = loop
+
+    def subscribe(self, topics):
+        subscriber = Subscriber(tuple(topics), self.max_pending)
+        for topic in subscriber.topics:
+            self._topics.setdefault(topic, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        for topic in subscriber.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._topics[topic]
+
+    def publish_threadsafe(self, items):
+        if self._loop is None or self._loop.is_closed():
+            return
+        with self._inbox_lock:
+            self._inbox.extend(items)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        # A single wake-up per burst: everything published before the loop runs the
+        # flush is coalesced into one pass over the subscribers.
+        self._loop.call_soon_threadsafe(self._flush)
+
+    def publish_nowait(self, items):
+        # For code already running on the loop (benchmarks, tests).
+        with self._inbox_lock:
+            self._inbox.extend(items)
+        self._flush()
+
+    def _flush(self):
+        with self._inbox_lock:
+            items = list(self._inbox)
+            self._inbox.clear()
+            self._flush_scheduled = False
+
+        latest = {}
+        for item in items:
+            key = item.get("key") or (item["type"], next(self._sequence))
+            latest.pop(key, None)
+            latest[key] = item
+
+        for key, item in latest.items():
+            targets = [self._topics[topic] for topic in item["topics"] if topic in self._topics]
+            if not targets:
+                continue
+            frame = (
+                f"id: {next(self._sequence)}\nevent: {item['type']}\n"
+                f"data: {json.dumps(item['data'], separators=(',', ':'), default=str)}\n\n"
+            ).encode()
+            delivered = set()
+            for subscribers in targets:
+                for subscriber in subscribers:
+                    if id(subscriber) not in delivered:
+                        delivered.add(id(subscriber))
+                        subscriber.deliver(key, frame)
+            EVENTS_DELIVERED.inc(item["type"], amount=len(delivered))
+
+    async def stream(self, topics, heartbeat=None):
+        # Subscribes only once the response starts, so the finally below always runs.
+        heartbeat = heartbeat or config.EVENTS_HEARTBEAT_SECONDS
+        subscriber = self.subscribe(topics)
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.wake.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from timing out the idle connection.
+                    yield b": keepalive\n\n"
+                    continue
+                if subscriber.overflowed:
+                    EVENTS_DROPPED.inc()
+                    yield b"event: reset\ndata: {}\n\n"
+                    return
+                yield b"".join(subscriber.drain())
+        finally:
+            self.unsubscribe(subscriber)
+
+hub = EventHub()
+
+class NotifyListener:
+    # LISTENs on a dedicated connection and feeds the local hub, so an event
+    # committed by any worker reaches subscribers connected to every worker.
+    def __init__(self, channel=None, poll_interval=1.0):
+        self.channel = channel or config.EVENTS_CHANNEL
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="events-listener", daemon=True)
+        self._thread.start()
+        logger.info(f"Listening for events on channel {self.channel}.")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = engine.raw_connection()
+                dbapi_connection = connection.dbapi_connection
+                dbapi_connection.autocommit = True
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                while not self._stop.is_set():
+                    if select.select([dbapi_connection], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    dbapi_connection.poll()
+                    items = []
+                    while dbapi_connection.notifies:
+                        items.extend(json.loads(dbapi_connection.notifies.pop(0).payload))
+                    if items:
+                        hub.publish_threadsafe(items)
+            except Exception as e:
+                logger.error(f"Event listener failed, reconnecting: {str(e)}")
+                self._stop.wait(self.poll_interval)
+            finally:
+                if connection is not None:
+                    # Never return a LISTENing connection to the pool.
+                    connection.invalidate()
+
+listener = NotifyListener()
+
+def start(loop):
+    hub.attach(loop)
+    if _use_notify():
+        listener.start()
+
+def stop():
+    listener.stop()
+    hub.attach(None)
@@ -0,0 +1,126 @@
+from collections import defaultdict
+from .core import config
+from . import models, schemas, services
+
+# Resolves a nested include tree, e.g. {"farms": {"farm_species": {"sub_species": {}}}},
+# one level at a time. Each relation is loaded for every parent on its level at once
+# through a per-request DataLoader, so a query costs one IN (...) per relation in the
+# tree whatever the fan-out, instead of one request and query per parent.
+
+class Relation:
+    def __init__(self, target, local, remote, many):
+        self.target = target
+        self.local = local
+        self.remote = remote
+        self.many = many
+
+RELATIONS = {
+    models.User: {
+        "farms": Relation(models.Farm, "id", models.Farm.user_id, many=True),
+        "orders": Relation(models.Order, "id", models.Order.farmer_id, many=True),
+        "transactions": Relation(models.Transaction, "id", models.Transaction.buyer_id, many=True),
+    },
+    models.Farm: {
+        "farm_species": Relation(models.Farm_species, "id", models.Farm_species.farm_id, many=True),
+    },
+    models.Farm_species: {
+        "sub_species": Relation(models.Sub_species, "sub_species_id", models.Sub_species.id, many=False),
+    },
+    models.Sub_species: {
+        "species": Relation(models.Species, "species_id", models.Species.id, many=False),
+    },
+    models.Species: {
+        "category": Relation(models.Category, "category_name", models.Category.category, many=False),
+    },
+    models.Order: {
+        "order_items": Relation(models.Order_item, "id", models.Order_item.order_id, many=True),
+        "transactions": Relation(models.Transaction, "id", models.Transaction.order_id, many=True),
+    },
+    models.Order_item: {
+        "farm_species": Relation(models.Farm_species, "farm_species_id", models.Farm_species.id, many=False),
+    },
+}
+
+SCHEMAS = {
+    models.User: schemas.User,
+    models.Farm: schemas.Farm,
+    models.Farm_species: schemas.FarmSpecies,
+    models.Sub_species: schemas.SubSpecies,
+    models.Species: schemas.Species,
+    models.Category: schemas.Category,
+    models.Order: schemas.Order,
+    models.Order_item: schemas.OrderItem,
+    models.Transaction: schemas.Transaction,
+}
+
+class DataLoader:
+    # Rows of one model keyed by one column, cached for the request: keys that were
+    # already loaded, such as a sub species listed by many farms, are not queried again.
+    def __init__(self, db, column, many):
+        self.db = db
+        self.column = column
+        self.model = column.class_
+        self.many = many
+        self._cache = {}
+
+    def load_many(self, keys):
+        missing = [key for key in dict.fromkeys(keys) if key is not None and key not in self._cache]
+        if missing:
+            found = defaultdict(list) if self.many else {}
+            key_attribute = services.Repository(self.model).key_attribute
+            rows = self.db.query(self.model).filter(self.column.in_(missing)).order_by(key_attribute).all()
+            for row in rows:
+                key = getattr(row, self.column.key)
+                if self.many:
+                    found[key].append(row)
+                else:
+                    found[key] = row
+            for key in missing:
+                self._cache[key] = found.get(key, [] if self.many else None)
+        return {key: self._cache.get(key) for key in keys}
+
+def _serialize(model, row):
+    return SCHEMAS[model].model_validate(row).model_dump(mode="json")
+
+def resolve(db, model, root, include, max_nodes=None):
+    max_nodes = max_nodes or config.GRAPH_MAX_NODES
+    loaders = {}
+    result = _serialize(model, root)
+    nodes = 1
+    level = [(model, [(root, result)], include)]
+
+    while level:
+        next_level = []
+        for parent_model, parents, tree in level:
+            for name, subtree in tree.items():
+                relation = RELATIONS.get(parent_model, {}).get(name)
+                if relation is None:
+                    raise services.InvalidRequest(f"Unknown relation '{name}' on {parent_model.__tablename__}.")
+                if not isinstance(subtree, dict):
+                    raise services.InvalidRequest(f"Relation '{name}' must map to an object of nested relations.")
+
+                loader = loaders.get((relation.target, relation.remote.key))
+                if loader is None:
+                    loader = loaders[(relation.target, relation.remote.key)] = DataLoader(db, relation.remote, relation.many)
+                found = loader.load_many([getattr(row, relation.local) for row, _ in parents])
+
+                # Rows shared by several parents are serialized and expanded once.
+                children = {}
+                for row, output in parents:
+                    value = found.get(getattr(row, relation.local))
+                    rows = value if relation.many else [value] if value is not None else []
+                    outputs = []
+                    for child in rows:
+                        if id(child) not in children:
+                            children[id(child)] = (child, _serialize(relation.target, child))
+                        outputs.append(children[id(child)][1])
+                    output[name] = outputs if relation.many else (outputs[0] if outputs else None)
+
+                nodes += len(children)
+                if nodes > max_nodes:
+                    raise services.InvalidRequest(f"Query would return more than {max_nodes} objects; narrow the include tree.")
+                if subtree and children:
+                    next_level.append((relation.target, list(children.values()), subtree))
+        level = next_level
+
+    return result
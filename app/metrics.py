@@ -0,0 +1,168 @@
+import threading
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+_registry = []
+
+class RequestStats:
+    __slots__ = ("queries", "query_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+
+_request_stats = ContextVar("request_stats", default=None)
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, *labels):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            counts = state[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_format_labels(names, labels + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + ('+Inf',))} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route.", ("method", "route", "status"))
+REQUEST_ERRORS = Counter("http_request_errors_total", "HTTP requests that ended in a 5xx or an exception.", ("method", "route"))
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"))
+REQUEST_SIZE = Histogram("http_request_size_bytes", "HTTP request body size by route.", ("method", "route"), SIZE_BUCKETS)
+RESPONSE_SIZE = Histogram("http_response_size_bytes", "HTTP response body size by route.", ("method", "route"), SIZE_BUCKETS)
+REQUEST_QUERIES = Histogram("http_request_db_queries", "Database queries issued per request.", ("method", "route"), COUNT_BUCKETS)
+REQUEST_QUERY_TIME = Histogram("http_request_db_duration_seconds", "Time spent in the database per request.", ("method", "route"))
+DB_QUERIES = Counter("db_queries_total", "Database statements executed.")
+DB_QUERY_LATENCY = Histogram("db_query_duration_seconds", "Database statement latency.")
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out of the pool.")
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def current_request_stats():
+    return _request_stats.get()
+
+def instrument_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        DB_QUERIES.inc()
+        DB_QUERY_LATENCY.observe(elapsed)
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_time += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # A failed statement never reaches after_cursor_execute; drop its start time so the
+        # next statement on this pooled connection isn't timed from it.
+        conn = context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.inc()
+
+def _route_name(request):
+    route = request.scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+async def metrics_middleware(request, call_next):
+    stats = RequestStats()
+    token = _request_stats.set(stats)
+    start = time.perf_counter()
+    method = request.method
+
+    try:
+        response = await call_next(request)
+    except Exception:
+        route = _route_name(request)
+        REQUESTS.inc(method, route, 500)
+        REQUEST_ERRORS.inc(method, route)
+        REQUEST_LATENCY.observe(time.perf_counter() - start, method, route)
+        raise
+    finally:
+        _request_stats.reset(token)
+
+    route = _route_name(request)
+    REQUESTS.inc(method, route, response.status_code)
+    if response.status_code >= 500:
+        REQUEST_ERRORS.inc(method, route)
+    REQUEST_LATENCY.observe(time.perf_counter() - start, method, route)
+    REQUEST_QUERIES.observe(stats.queries, method, route)
+    REQUEST_QUERY_TIME.observe(stats.query_time, method, route)
+
+    request_size = request.headers.get("content-length")
+    if request_size is not None:
+        REQUEST_SIZE.observe(int(request_size), method, route)
+    response_size = response.headers.get("content-length")
+    if response_size is not None:
+        RESPONSE_SIZE.observe(int(response_size), method, route)
+
+    return response
@@ -1,21 +1,35 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DECIMAL, TIMESTAMP, Text, Enum, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, DECIMAL, TIMESTAMP, Text, Enum, Boolean, JSON, LargeBinary, Index, PrimaryKeyConstraint, UniqueConstraint
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import relationship, with_loader_criteria
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from sqlalchemy.dialects.postgresql import ENUM
-from .database import Base
+from .database import Base, SessionLocal
+from .core import config
 from enum import Enum as PyEnum
 
+class SoftDelete:
+    # Rows with deleted_at set are hidden from every ORM query (see hide_deleted_rows
+    # below) until the purge removes them. Pass include_deleted=True in
+    # execution_options to see them.
+    deleted_at = Column(TIMESTAMP(timezone=True))
+
+# Partial index predicates: hot reads only ever touch live rows, and the purge sweep
+# only ever looks for deleted ones, so neither pays for the other's rows.
+LIVE = text("deleted_at IS NULL")
+DELETED = text("deleted_at IS NOT NULL")
+
 class UserRole(PyEnum):
     buyer = "buyer"
     farmer = "farmer"
 
-class User(Base):
+class User(SoftDelete, Base):
     __tablename__ = "User"
     id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String(40), nullable=False)
     last_name = Column(String(40), nullable=False)
-    email = Column(String(255), unique=True, nullable=False)
+    email = Column(String(255), nullable=False)
     phone = Column(String, ForeignKey("Phone.phone", onupdate="CASCADE"), nullable=False)
     password = Column(String, nullable=False)
     role = Column(Enum(UserRole), default=UserRole.buyer)
@@ -23,6 +37,12 @@ class User(Base):
 
     phone_rel = relationship("Phone", back_populates="users")
 
+    __table_args__ = (
+        # Unique among live users only, so a deleted account's email can sign up again.
+        Index("ux_user_email_live", "email", unique=True, postgresql_where=LIVE, sqlite_where=LIVE),
+        Index("ix_user_deleted_at", "deleted_at", postgresql_where=DELETED, sqlite_where=DELETED),
+    )
+
 class Phone(Base):
     __tablename__ = "Phone"
     phone = Column(String, primary_key=True, index=True)
@@ -36,7 +56,7 @@ class FarmType(PyEnum):
     ORCHARD = "ORCHARD"
     GARDEN = "GARDEN"
 
-class Farm(Base):
+class Farm(SoftDelete, Base):
     __tablename__='Farm'
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey('User.id', ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
@@ -46,12 +66,25 @@ class Farm(Base):
     latitude = Column(DECIMAL(precision=10, scale=8))
     longitude = Column(DECIMAL(precision=10, scale=8))
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    # Maintained by app/counters.py alongside listing and transaction writes.
+    listing_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    lifetime_revenue = Column(DECIMAL, nullable=False, default=0, server_default=text("0"))
+    # Revenue of transactions archived out of the partitioned table (app/partitions.py).
+    archived_revenue = Column(DECIMAL, nullable=False, default=0, server_default=text("0"))
 
     user_rel = relationship("User")
-    farm_species = relationship("Farm_species", back_populates="farm")
-    transactions = relationship("Transaction", back_populates="farm")
+    # passive_deletes: the database's ON DELETE CASCADE removes children, so deleting a
+    # farm never loads its listings and sales into the session first.
+    farm_species = relationship("Farm_species", back_populates="farm", cascade="all, delete-orphan", passive_deletes=True)
+    transactions = relationship("Transaction", back_populates="farm", cascade="all, delete-orphan", passive_deletes=True)
 
-class Farm_species(Base):
+    __table_args__ = (
+        Index("ix_farm_user_id_type", "user_id", "type"),
+        Index("ix_farm_latitude_longitude", "latitude", "longitude", postgresql_where=LIVE, sqlite_where=LIVE),
+        Index("ix_farm_deleted_at", "deleted_at", postgresql_where=DELETED, sqlite_where=DELETED),
+    )
+
+class Farm_species(SoftDelete, Base):
     __tablename__ = "Farm_species"
     id = Column(Integer, primary_key=True, index=True)
     farm_id = Column(Integer, ForeignKey("Farm.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
@@ -64,12 +97,29 @@ class Farm_species(Base):
 
     farm = relationship("Farm", back_populates="farm_species")
     sub_species = relationship("Sub_species")
-    order_items = relationship("Order_item", back_populates="farm_species")
+    order_items = relationship("Order_item", back_populates="farm_species", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        Index("ix_farm_species_farm_id_sub_species_id", "farm_id", "sub_species_id"),
+        Index("ix_farm_species_sub_species_id_price", "sub_species_id", "price"),
+        # Marketplace queries only ever look at live listings with stock left.
+        Index(
+            "ix_farm_species_in_stock_price", "price",
+            postgresql_where=text("available_quantity > 0 AND deleted_at IS NULL"),
+            sqlite_where=text("available_quantity > 0 AND deleted_at IS NULL")
+        ),
+        Index(
+            "ix_farm_species_in_stock_created_at", "created_at",
+            postgresql_where=text("available_quantity > 0 AND deleted_at IS NULL"),
+            sqlite_where=text("available_quantity > 0 AND deleted_at IS NULL")
+        ),
+        Index("ix_farm_species_deleted_at", "deleted_at", postgresql_where=DELETED, sqlite_where=DELETED),
+    )
 
 class Sub_species(Base):
     __tablename__ = "Sub_species"
     id = Column(Integer, primary_key=True, index=True)
-    species_id = Column(Integer, ForeignKey("Species.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
+    species_id = Column(Integer, ForeignKey("Species.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False, index=True)
     name = Column(String(40), nullable=False)
     common_name = Column(String(60), nullable=False)
     description = Column(Text, nullable=False)
@@ -79,7 +129,7 @@ class Sub_species(Base):
 
     species = relationship("Species")
 
-class Species(Base):
+class Species(SoftDelete, Base):
     __tablename__ = "Species"
     id = Column(Integer, primary_key=True, index=True)
     category_name = Column(String(60), ForeignKey("Category.category", onupdate="CASCADE"), nullable=False)
@@ -99,7 +149,7 @@ class Species(Base):
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
 
     category = relationship("Category")
-    sub_species = relationship("Sub_species", back_populates="species")
+    sub_species = relationship("Sub_species", back_populates="species", cascade="all, delete-orphan", passive_deletes=True)
 
 class Category(Base):
     __tablename__ = "Category"
@@ -108,6 +158,11 @@ class Category(Base):
 
     species = relationship("Species", back_populates="category")
 
+class Catalog_version(Base):
+    __tablename__ = "Catalog_version"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
 class Order(Base):
     __tablename__ = "Order"
     id = Column(Integer, primary_key=True, index=True)
@@ -115,15 +170,22 @@ class Order(Base):
     name = Column(String(40), nullable=False)
     description = Column(Text, nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    # Maintained by app/counters.py alongside order item writes.
+    item_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    total = Column(DECIMAL, nullable=False, default=0, server_default=text("0"))
 
     farmer = relationship("User")
-    order_items = relationship("Order_item", back_populates="order")
+    order_items = relationship("Order_item", back_populates="order", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        Index("ix_order_farmer_id_created_at", "farmer_id", "created_at"),
+    )
 
 class Order_item(Base):
     __tablename__ = "Order_item"
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("Order.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
-    farm_species_id = Column(Integer, ForeignKey("Farm_species.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
+    order_id = Column(Integer, ForeignKey("Order.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False, index=True)
+    farm_species_id = Column(Integer, ForeignKey("Farm_species.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False, index=True)
     quantity = Column(Integer, nullable=False)
     price = Column(DECIMAL, nullable=False)
     total_price = Column(DECIMAL, nullable=False)
@@ -140,8 +202,96 @@ class Transaction(Base):
     total_amount = Column(DECIMAL, nullable=False)
     status = Column(String, nullable=False)
     payment_method = Column(String, nullable=False)
-    transaction_date = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    transaction_date = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
 
     buyer = relationship("User")
     farm = relationship("Farm", back_populates="transactions")
-    order = relationship("Order")
\ No newline at end of file
+    order = relationship("Order")
+
+    # Range-partitioned by month on PostgreSQL (see app/partitions.py). Postgres only allows
+    # unique constraints that include the partition key, so there the key is (id, transaction_date).
+    __table_args__ = (
+        PrimaryKeyConstraint("id").ddl_if(callable_=lambda ddl, target, bind, **kw: kw["dialect"].name != "postgresql"),
+        UniqueConstraint("id", "transaction_date", name="uq_transaction_id_date").ddl_if(dialect="postgresql"),
+        Index("ix_transaction_buyer_id_date", "buyer_id", "transaction_date"),
+        Index("ix_transaction_order_id_date", "order_id", "transaction_date"),
+        # Without it every farm delete cascades through a full scan of Transaction.
+        Index("ix_transaction_farm_id", "farm_id"),
+        {"postgresql_partition_by": "RANGE (transaction_date)"},
+    )
+
+class Outbox_event(Base):
+    __tablename__ = "Outbox_event"
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(60), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    available_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_outbox_event_status_available_at", "status", "available_at"),
+    )
+
+class Refresh_token(Base):
+    __tablename__ = "Refresh_token"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("User.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False, index=True)
+    # Only the SHA-256 digest of the token secret is kept.
+    token_hash = Column(LargeBinary(32), nullable=False)
+    expires_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    # Set on rotation; the row is kept until expiry so a replayed token can be recognized.
+    used_at = Column(TIMESTAMP(timezone=True))
+
+class Revoked_token(Base):
+    __tablename__ = "Revoked_token"
+    jti = Column(String(32), primary_key=True)
+    expires_at = Column(TIMESTAMP(timezone=True), nullable=False, index=True)
+
+class Purge_job(Base):
+    __tablename__ = "Purge_job"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    resource = Column(String(40), nullable=False)
+    resource_id = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")
+    total = Column(Integer, nullable=False, default=0)
+    purged = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    available_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    finished_at = Column(TIMESTAMP(timezone=True))
+
+    __table_args__ = (
+        Index("ix_purge_job_status_available_at", "status", "available_at"),
+    )
+
+    @property
+    def progress(self):
+        if self.status == "done":
+            return 1.0
+        return min(self.purged / self.total, 1.0) if self.total else 0.0
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def hide_deleted_rows(execute_state):
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(SoftDelete, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+        )
+
+def forbid_lazy_loads(execute_state):
+    # Only lazy loads that need a query get here; many-to-one lookups answered from the
+    # identity map don't. Load the relationship with the parent query instead.
+    if execute_state.is_select and execute_state.lazy_loaded_from is not None:
+        raise InvalidRequestError(f"Lazy load of {execute_state.loader_strategy_path} is disabled by ORM_LAZY_LOAD=raise.")
+
+if config.ORM_LAZY_LOAD == "raise":
+    event.listen(SessionLocal, "do_orm_execute", forbid_lazy_loads)
@@ -0,0 +1,269 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
+from .database import SessionLocal
+from .core import config
+from . import models
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+
+_handlers = {}
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+def handler(event_type):
+    def register(func):
+        _handlers.setdefault(event_type, []).append(func)
+        return func
+    return register
+
+def enqueue(db, event_type, payload):
+    # Only adds the row to the caller's session so it commits (or rolls back)
+    # together with the write that produced it.
+    event = models.Outbox_event(
+        event_type=event_type,
+        payload=payload,
+        status=PENDING,
+        attempts=0,
+        available_at=_utcnow(),
+    )
+    db.add(event)
+    return event
+
+def claim_batch(db, limit):
+    now = _utcnow()
+    events = (
+        db.query(models.Outbox_event)
+        .filter(
+            models.Outbox_event.available_at <= now,
+            or_(
+                models.Outbox_event.status == PENDING,
+                # A worker died while holding the lease; hand the event out again.
+                models.Outbox_event.status == PROCESSING,
+            ),
+        )
+        .order_by(models.Outbox_event.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    lease_until = now + timedelta(seconds=config.OUTBOX_LEASE_SECONDS)
+    for event in events:
+        event.status = PROCESSING
+        event.available_at = lease_until
+    db.commit()
+
+    return [event.id for event in events]
+
+def process_event(event_id):
+    db = SessionLocal()
+    try:
+        event = db.query(models.Outbox_event).filter(
+            models.Outbox_event.id == event_id,
+            models.Outbox_event.status == PROCESSING,
+        ).first()
+        if not event:
+            return
+
+        try:
+            for func in _handlers.get(event.event_type, []):
+                func(db, event)
+
+            event.status = DONE
+            event.last_error = None
+            db.commit()
+            logger.info(f"Outbox event {event.id} ({event.event_type}) processed.")
+
+        except Exception as e:
+            db.rollback()
+            event = db.query(models.Outbox_event).filter(models.Outbox_event.id == event_id).first()
+            event.attempts += 1
+            event.last_error = str(e)
+
+            if event.attempts >= config.OUTBOX_MAX_ATTEMPTS:
+                event.status = FAILED
+                logger.error(f"Outbox event {event.id} ({event.event_type}) failed permanently: {str(e)}")
+            else:
+                delay = config.OUTBOX_RETRY_BACKOFF ** event.attempts
+                event.status = PENDING
+                event.available_at = _utcnow() + timedelta(seconds=delay)
+                logger.warning(f"Outbox event {event.id} ({event.event_type}) failed, retrying in {delay}s: {str(e)}")
+
+            db.commit()
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while processing outbox event {event_id}: {str(e)}", exc_info=True)
+
+    finally:
+        db.close()
+
+def purge_finished(batch_size=None, stop=None):
+    batch_size = batch_size or config.OUTBOX_PURGE_BATCH_SIZE
+    now = _utcnow()
+    purged = 0
+    db = SessionLocal()
+    try:
+        for status, hours in ((DONE, config.OUTBOX_RETENTION_HOURS), (FAILED, config.OUTBOX_FAILED_RETENTION_HOURS)):
+            # available_at is the last lease or retry time, so it bounds when the event finished.
+            cutoff = now - timedelta(hours=hours)
+            while stop is None or not stop.is_set():
+                event_ids = [
+                    event_id for (event_id,) in
+                    db.query(models.Outbox_event.id)
+                    .filter(models.Outbox_event.status == status, models.Outbox_event.available_at < cutoff)
+                    .order_by(models.Outbox_event.id)
+                    .limit(batch_size)
+                ]
+                if not event_ids:
+                    break
+                # Each batch is its own short transaction, so claims are never blocked for long.
+                db.query(models.Outbox_event).filter(
+                    models.Outbox_event.id.in_(event_ids)
+                ).delete(synchronize_session=False)
+                db.commit()
+                purged += len(event_ids)
+                if len(event_ids) < batch_size:
+                    break
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to purge finished outbox events: {str(e)}")
+
+    finally:
+        db.close()
+
+    if purged:
+        logger.info(f"Purged {purged} finished outbox events.")
+    return purged
+
+class OutboxWorker:
+    def __init__(self, workers=None, batch_size=None, max_in_flight=None, poll_interval=None):
+        self.workers = workers or config.OUTBOX_WORKERS
+        self.batch_size = batch_size or config.OUTBOX_BATCH_SIZE
+        self.max_in_flight = max_in_flight or config.OUTBOX_MAX_IN_FLIGHT
+        self.poll_interval = poll_interval or config.OUTBOX_POLL_INTERVAL
+        self._slots = threading.Semaphore(self.max_in_flight)
+        self._stop = threading.Event()
+        self._executor = None
+        self._thread = None
+        self._purged_at = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="outbox")
+        self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Outbox worker started with {self.workers} workers.")
+
+    def stop(self, wait=True):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._executor.shutdown(wait=wait)
+        self._thread = None
+        self._executor = None
+        logger.info("Outbox worker stopped.")
+
+    def _acquire_slots(self):
+        # Backpressure: never claim more rows than there are free worker slots,
+        # so a slow handler leaves the backlog in the table instead of in memory.
+        if not self._slots.acquire(timeout=self.poll_interval):
+            return 0
+        acquired = 1
+        while acquired < self.batch_size and self._slots.acquire(blocking=False):
+            acquired += 1
+        return acquired
+
+    def _release(self, _future=None):
+        self._slots.release()
+
+    def run_once(self):
+        slots = self._acquire_slots()
+        if not slots:
+            return 0
+
+        db = SessionLocal()
+        try:
+            event_ids = claim_batch(db, slots)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to claim outbox events: {str(e)}")
+            event_ids = []
+        finally:
+            db.close()
+
+        for _ in range(slots - len(event_ids)):
+            self._release()
+
+        for event_id in event_ids:
+            future = self._executor.submit(process_event, event_id)
+            future.add_done_callback(self._release)
+
+        return len(event_ids)
+
+    def _run(self):
+        while not self._stop.is_set():
+            claimed = self.run_once()
+            if self._purged_at is None or time.monotonic() - self._purged_at >= config.OUTBOX_PURGE_SECONDS:
+                self._purged_at = time.monotonic()
+                purge_finished(stop=self._stop)
+            if claimed < self.batch_size:
+                self._stop.wait(self.poll_interval)
+
+def drain(limit=None):
+    # Synchronous drain for scripts and tests running against a local database.
+    processed = 0
+    while limit is None or processed < limit:
+        db = SessionLocal()
+        try:
+            event_ids = claim_batch(db, config.OUTBOX_BATCH_SIZE)
+        finally:
+            db.close()
+        if not event_ids:
+            break
+        for event_id in event_ids:
+            process_event(event_id)
+        processed += len(event_ids)
+    return processed
+
+def _notify_farmer(db, farmer_id, message):
+    farmer = db.query(models.User).options(joinedload(models.User.phone_rel)).filter(models.User.id == farmer_id).first()
+    if not farmer:
+        logger.warning(f"Skipping notification, farmer {farmer_id} not found.")
+        return
+
+    phone = farmer.phone_rel
+    if phone is None or phone.dnd or not phone.whatsapp:
+        logger.info(f"Farmer {farmer_id} opted out of WhatsApp notifications.")
+        return
+
+    logger.info(f"WhatsApp notification to {phone.phone}: {message}")
+
+# Farmer notifications are the only deferred side effects: the order and farm counters
+# are written in the request's own transaction, and nothing caches orders or transactions.
+@handler("order.created")
+def notify_order_created(db, event):
+    payload = event.payload
+    _notify_farmer(db, payload["farmer_id"], f"New order #{payload['order_id']} received.")
+
+@handler("transaction.created")
+def notify_transaction_created(db, event):
+    payload = event.payload
+    farm = db.query(models.Farm).filter(models.Farm.id == payload["farm_id"]).first()
+    if farm:
+        _notify_farmer(db, farm.user_id, f"Payment of {payload['total_amount']} recorded for order #{payload['order_id']}.")
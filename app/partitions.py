@@ -0,0 +1,252 @@
+import argparse
+import logging
+import os
+from datetime import datetime, timezone
+from sqlalchemy import text
+from .core import config
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLE = "Transaction"
+DEFAULT_PARTITION = f"{PARTITIONED_TABLE}_default"
+PARTITION_KEY = "transaction_date"
+# Serializes partition maintenance across workers and processes.
+MAINTENANCE_LOCK_ID = 7301
+ARCHIVE_COLUMNS = ("id", "buyer_id", "farm_id", "order_id", "total_amount", "status", "payment_method", "transaction_date")
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+def _add_months(value, months):
+    month = value.month - 1 + months
+    return datetime(value.year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+
+def _as_utc(value):
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+def partition_name(month):
+    return f"{PARTITIONED_TABLE}_p{month:%Y%m}"
+
+def is_partitioned(conn):
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table"
+    ), {"table": PARTITIONED_TABLE}).first() is not None
+
+def _table_exists(conn, name):
+    return conn.execute(text("SELECT to_regclass(:name)"), {"name": f'"{name}"'}).scalar() is not None
+
+def _lock(conn):
+    conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MAINTENANCE_LOCK_ID})
+
+def _create_partition(conn, start):
+    name = partition_name(start)
+    if _table_exists(conn, name):
+        return name
+
+    end = _add_months(start, 1)
+    bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    in_range = f"{PARTITION_KEY} >= :start AND {PARTITION_KEY} < :end"
+    params = {"start": start, "end": end}
+    if _table_exists(conn, DEFAULT_PARTITION) and conn.execute(
+        text(f'SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE {in_range} LIMIT 1'), params
+    ).first() is not None:
+        # Postgres refuses a new partition while the default partition holds rows in its
+        # range, so build the month as a plain table, move the rows over and attach it.
+        conn.execute(text(f'CREATE TABLE "{name}" (LIKE "{PARTITIONED_TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+        moved = conn.execute(text(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE {in_range} RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved'
+        ), params).rowcount
+        conn.execute(text(f'ALTER TABLE "{PARTITIONED_TABLE}" ATTACH PARTITION "{name}" {bounds}'))
+        logger.warning(f"Moved {moved} rows from {DEFAULT_PARTITION} into new partition {name}.")
+    else:
+        conn.execute(text(f'CREATE TABLE "{name}" PARTITION OF "{PARTITIONED_TABLE}" {bounds}'))
+    return name
+
+def ensure_partitions(engine, months_ahead=None, now=None):
+    months_ahead = config.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    current = _month_start(now or datetime.now(timezone.utc))
+
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            if conn.dialect.name == "postgresql":
+                logger.warning(f"Table {PARTITIONED_TABLE} is not partitioned; migrate it before partitions can be managed.")
+            return []
+
+        _lock(conn)
+        created = [_create_partition(conn, _add_months(current, offset)) for offset in range(0, months_ahead + 1)]
+
+        # Rows older than the managed range (e.g. backfills) land here instead of failing.
+        conn.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{DEFAULT_PARTITION}" PARTITION OF "{PARTITIONED_TABLE}" DEFAULT'
+        ))
+
+    logger.info(f"Ensured {PARTITIONED_TABLE} partitions: {', '.join(created)}")
+    return created
+
+def list_partitions(conn):
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table ORDER BY c.relname"
+    ), {"table": PARTITIONED_TABLE}).all()
+
+    partitions = []
+    prefix = f"{PARTITIONED_TABLE}_p"
+    for (name,) in rows:
+        if not name.startswith(prefix):
+            continue
+        start = datetime.strptime(name[len(prefix):], "%Y%m").replace(tzinfo=timezone.utc)
+        partitions.append((name, start, _add_months(start, 1)))
+    return partitions
+
+def _archive_path(archive_dir, month):
+    # A month archived once can come back through a backfill into the default partition;
+    # give the second export its own file rather than overwrite the first.
+    path = os.path.join(archive_dir, PARTITIONED_TABLE, f"{month:%Y-%m}.parquet")
+    suffix = 1
+    while os.path.exists(path):
+        path = os.path.join(archive_dir, PARTITIONED_TABLE, f"{month:%Y-%m}.{suffix}.parquet")
+        suffix += 1
+    return path
+
+def _split_expired_default(conn, cutoff):
+    # Rows older than the managed range sit in the default partition. Give each expired
+    # month its own partition so they are archived like any other month.
+    if not _table_exists(conn, DEFAULT_PARTITION):
+        return []
+    months = conn.execute(text(
+        f"SELECT DISTINCT date_trunc('month', {PARTITION_KEY} AT TIME ZONE 'UTC') "
+        f'FROM "{DEFAULT_PARTITION}" WHERE {PARTITION_KEY} < :cutoff'
+    ), {"cutoff": cutoff}).scalars().all()
+    return [_create_partition(conn, _as_utc(month)) for month in sorted(months)]
+
+def _write_parquet(conn, partition, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("buyer_id", pa.int64()),
+        ("farm_id", pa.int64()),
+        ("order_id", pa.int64()),
+        ("total_amount", pa.decimal128(38, 10)),
+        ("status", pa.string()),
+        ("payment_method", pa.string()),
+        ("transaction_date", pa.timestamp("us", tz="UTC")),
+    ])
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    columns = ", ".join(ARCHIVE_COLUMNS)
+    result = conn.execution_options(stream_results=True).execute(text(f'SELECT {columns} FROM "{partition}" ORDER BY id'))
+
+    rows_written = 0
+    with pq.ParquetWriter(tmp_path, schema, compression=config.ARCHIVE_COMPRESSION) as writer:
+        while True:
+            chunk = result.fetchmany(config.ARCHIVE_CHUNK_SIZE)
+            if not chunk:
+                break
+            columns_data = list(zip(*chunk))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns_data, schema)],
+                schema=schema,
+            ))
+            rows_written += len(chunk)
+
+    os.replace(tmp_path, path)
+    return rows_written
+
+def archive_partitions(engine, retention_months=None, archive_dir=None, now=None):
+    retention_months = config.PARTITION_RETENTION_MONTHS if retention_months is None else retention_months
+    archive_dir = archive_dir or config.ARCHIVE_DIR
+    cutoff = _add_months(_month_start(now or datetime.now(timezone.utc)), -retention_months)
+
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            logger.info(f"Table {PARTITIONED_TABLE} is not partitioned; nothing to archive.")
+            return []
+        _lock(conn)
+        _split_expired_default(conn, cutoff)
+        expired = [(name, start) for name, start, end in list_partitions(conn) if end <= cutoff]
+
+    archived = []
+    for name, start in expired:
+        path = _archive_path(archive_dir, start)
+        # Export while still attached so a failed export leaves the data queryable; the
+        # partition only covers past months, so no new rows can arrive meanwhile.
+        with engine.connect() as conn:
+            rows = _write_parquet(conn, name, path)
+        with engine.begin() as conn:
+            conn.execute(text(f'ALTER TABLE "{PARTITIONED_TABLE}" DETACH PARTITION "{name}"'))
+            # Keep the farms' lifetime revenue whole once these rows leave the table.
+            conn.execute(text(
+                'UPDATE "Farm" SET archived_revenue = "Farm".archived_revenue + archived.revenue '
+                f'FROM (SELECT farm_id, SUM(total_amount) AS revenue FROM "{name}" GROUP BY farm_id) AS archived '
+                'WHERE "Farm".id = archived.farm_id'
+            ))
+            conn.execute(text(f'DROP TABLE "{name}"'))
+        logger.info(f"Archived partition {name} ({rows} rows) to {path}.")
+        archived.append(path)
+    return archived
+
+def read_archived_transactions(order_id=None, buyer_id=None, date_from=None, date_to=None, archive_dir=None, limit=1000):
+    import pyarrow.dataset as ds
+
+    date_from = _as_utc(date_from)
+    date_to = _as_utc(date_to)
+    root = os.path.join(archive_dir or config.ARCHIVE_DIR, PARTITIONED_TABLE)
+    if not os.path.isdir(root):
+        return []
+
+    files = []
+    for filename in sorted(os.listdir(root)):
+        if not filename.endswith(".parquet"):
+            continue
+        start = datetime.strptime(filename[:len("YYYY-MM")], "%Y-%m").replace(tzinfo=timezone.utc)
+        # File-level pruning mirrors partition pruning on the hot table.
+        if date_from is not None and _add_months(start, 1) <= date_from:
+            continue
+        if date_to is not None and start >= date_to:
+            continue
+        files.append(os.path.join(root, filename))
+    if not files:
+        return []
+
+    condition = None
+    for field, value in (("order_id", order_id), ("buyer_id", buyer_id)):
+        if value is not None:
+            expression = ds.field(field) == value
+            condition = expression if condition is None else condition & expression
+    if date_from is not None:
+        expression = ds.field("transaction_date") >= date_from
+        condition = expression if condition is None else condition & expression
+    if date_to is not None:
+        expression = ds.field("transaction_date") < date_to
+        condition = expression if condition is None else condition & expression
+
+    table = ds.dataset(files, format="parquet").head(limit, filter=condition)
+    return table.to_pylist()
+
+def main():
+    from .database import engine
+
+    parser = argparse.ArgumentParser(description=f"Manage {PARTITIONED_TABLE} partitions.")
+    parser.add_argument("command", choices=("ensure", "archive"))
+    parser.add_argument("--retention-months", type=int, default=None)
+    parser.add_argument("--archive-dir", default=None)
+    args = parser.parse_args()
+
+    if args.command == "ensure":
+        ensure_partitions(engine)
+    else:
+        ensure_partitions(engine)
+        archive_partitions(engine, args.retention_months, args.archive_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .core import config
+
+logger = logging.getLogger(__name__)
+
+SCHEME = "scrypt"
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+class PasswordHasherBusy(Exception):
+    pass
+
+class PasswordHasher:
+    # hashlib.scrypt releases the GIL, so a small pool gives real parallelism while
+    # keeping hashing from occupying every request thread at once.
+    def __init__(self, log_n, r, p, workers, max_pending):
+        self.log_n = log_n
+        self.r = r
+        self.p = p
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+
+    def _derive(self, password, salt, log_n, r, p):
+        n = 1 << log_n
+        return hashlib.scrypt(
+            password.encode(), salt=salt, n=n, r=r, p=p,
+            maxmem=128 * r * (n + p + 2), dklen=HASH_BYTES
+        )
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            return self._executor.submit(function, *args).result()
+        finally:
+            self._slots.release()
+
+    def _hash(self, password):
+        salt = os.urandom(SALT_BYTES)
+        digest = self._derive(password, salt, self.log_n, self.r, self.p)
+        return (
+            f"${SCHEME}$ln={self.log_n},r={self.r},p={self.p}"
+            f"${base64.b64encode(salt).decode()}${base64.b64encode(digest).decode()}"
+        )
+
+    def _verify(self, password, stored):
+        parsed = parse(stored)
+        if parsed is None:
+            # Rows written before hashing was introduced hold the plain password.
+            return hmac.compare_digest(password.encode(), stored.encode())
+        log_n, r, p, salt, digest = parsed
+        return hmac.compare_digest(self._derive(password, salt, log_n, r, p), digest)
+
+    def hash(self, password):
+        return self._run(self._hash, password)
+
+    def verify(self, password, stored):
+        return self._run(self._verify, password, stored)
+
+    def hash_many(self, passwords):
+        # A batch takes at most one admission slot per worker and hashes in waves of that
+        # width, so bulk signups use the whole pool without shutting out single requests.
+        width = 0
+        try:
+            while width < min(len(passwords), self.workers) and self._slots.acquire(blocking=False):
+                width += 1
+            if passwords and width == 0:
+                raise PasswordHasherBusy()
+            hashes = []
+            for start in range(0, len(passwords), max(width, 1)):
+                futures = [self._executor.submit(self._hash, password) for password in passwords[start:start + width]]
+                hashes.extend(future.result() for future in futures)
+            return hashes
+        finally:
+            for _ in range(width):
+                self._slots.release()
+
+    def needs_rehash(self, stored):
+        parsed = parse(stored)
+        return parsed is None or parsed[:3] != (self.log_n, self.r, self.p)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+def parse(stored):
+    parts = stored.split("$")
+    if len(parts) != 5 or parts[0] != "" or parts[1] != SCHEME:
+        return None
+    try:
+        params = dict(item.split("=", 1) for item in parts[2].split(","))
+        return (
+            int(params["ln"]), int(params["r"]), int(params["p"]),
+            base64.b64decode(parts[3]), base64.b64decode(parts[4])
+        )
+    except (KeyError, ValueError):
+        return None
+
+hasher = PasswordHasher(
+    config.PASSWORD_SCRYPT_LOG_N,
+    config.PASSWORD_SCRYPT_R,
+    config.PASSWORD_SCRYPT_P,
+    config.PASSWORD_HASH_WORKERS,
+    config.PASSWORD_HASH_MAX_PENDING,
+)
+
+def hash_password(password):
+    return hasher.hash(password)
+
+def hash_passwords(passwords):
+    return hasher.hash_many(passwords)
+
+def verify_password(password, stored):
+    return hasher.verify(password, stored)
+
+def needs_rehash(stored):
+    return hasher.needs_rehash(stored)
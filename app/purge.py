@@ -0,0 +1,347 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, delete, exists, func, or_, select
+from .database import SessionLocal, engine
+from .core import config
+from . import models, counters, partitions
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+def _steps(resource, resource_id):
+    # Children first, so each batch removes rows whose own cascades are already empty
+    # and no single statement holds locks across the whole subtree.
+    if resource == "farm":
+        listings = select(models.Farm_species.id).where(models.Farm_species.farm_id == resource_id)
+        return [
+            (models.Order_item, models.Order_item.farm_species_id.in_(listings)),
+            (models.Transaction, models.Transaction.farm_id == resource_id),
+            (models.Farm_species, models.Farm_species.farm_id == resource_id),
+            (models.Farm, models.Farm.id == resource_id),
+        ]
+    if resource == "species":
+        sub_species = select(models.Sub_species.id).where(models.Sub_species.species_id == resource_id)
+        listings = select(models.Farm_species.id).where(models.Farm_species.sub_species_id.in_(sub_species))
+        return [
+            (models.Order_item, models.Order_item.farm_species_id.in_(listings)),
+            (models.Farm_species, models.Farm_species.sub_species_id.in_(sub_species)),
+            (models.Sub_species, models.Sub_species.species_id == resource_id),
+            (models.Species, models.Species.id == resource_id),
+        ]
+    if resource == "sub_species":
+        listings = select(models.Farm_species.id).where(models.Farm_species.sub_species_id == resource_id)
+        return [
+            (models.Order_item, models.Order_item.farm_species_id.in_(listings)),
+            (models.Farm_species, models.Farm_species.sub_species_id == resource_id),
+            (models.Sub_species, models.Sub_species.id == resource_id),
+        ]
+    raise ValueError(f"Unknown purge resource {resource}.")
+
+def _expired_steps(cutoff):
+    # Listings, then farms, then users, each only once nothing else points at it. Rows
+    # that orders or transactions still reference are kept for good.
+    return [
+        (models.Farm_species, and_(
+            models.Farm_species.deleted_at < cutoff,
+            ~exists().where(models.Order_item.farm_species_id == models.Farm_species.id),
+        )),
+        (models.Farm, and_(
+            models.Farm.deleted_at < cutoff,
+            ~exists().where(models.Farm_species.farm_id == models.Farm.id),
+            ~exists().where(models.Transaction.farm_id == models.Farm.id),
+        )),
+        (models.User, and_(
+            models.User.deleted_at < cutoff,
+            ~exists().where(models.Farm.user_id == models.User.id),
+            ~exists().where(models.Order.farmer_id == models.User.id),
+            ~exists().where(models.Transaction.buyer_id == models.User.id),
+        )),
+    ]
+
+def soft_delete(db, instance, user_id, resource):
+    # Hides the row at once (see models.SoftDelete) and leaves the subtree to the
+    # purge worker. Commits with the caller's transaction.
+    instance.deleted_at = _utcnow()
+    total = 0
+    for model, criterion in _steps(resource, instance.id):
+        total += db.execute(
+            select(func.count()).select_from(model).where(criterion).execution_options(include_deleted=True)
+        ).scalar()
+    job = models.Purge_job(
+        user_id=user_id,
+        resource=resource,
+        resource_id=instance.id,
+        status=PENDING,
+        total=total,
+        purged=0,
+        attempts=0,
+        available_at=_utcnow(),
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+def claim_job(db):
+    now = _utcnow()
+    job = (
+        db.query(models.Purge_job)
+        .filter(
+            models.Purge_job.available_at <= now,
+            # A worker died while holding the lease; hand the job out again.
+            or_(models.Purge_job.status == PENDING, models.Purge_job.status == PROCESSING),
+        )
+        .order_by(models.Purge_job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if job is None:
+        db.rollback()
+        return None
+
+    job.status = PROCESSING
+    job.available_at = now + timedelta(seconds=config.PURGE_LEASE_SECONDS)
+    db.commit()
+    return job.id
+
+def _delete_batch(db, model, criterion, batch_size):
+    key = model.__table__.primary_key.columns.values()[0]
+    batch = select(key).where(criterion).limit(batch_size).scalar_subquery()
+    return _delete_rows(db, model, key.in_(batch))
+
+def _delete_rows(db, model, criterion):
+    statement = delete(model).where(criterion).execution_options(synchronize_session=False)
+    # Counters of the surviving parents drop in the same transaction as their rows.
+    if model is models.Order_item:
+        removed = db.execute(statement.returning(models.Order_item.order_id, models.Order_item.total_price)).all()
+        totals = {}
+        for order_id, total_price in removed:
+            items, amount = totals.get(order_id, (0, 0))
+            totals[order_id] = (items + 1, amount + counters.to_decimal(total_price))
+        for order_id, (items, amount) in sorted(totals.items()):
+            counters.adjust_order(db, order_id, items=-items, amount=-amount)
+        return len(removed)
+    if model is models.Farm_species:
+        removed = db.execute(statement.returning(models.Farm_species.farm_id, models.Farm_species.deleted_at)).all()
+        listings = {}
+        for farm_id, deleted_at in removed:
+            # Soft-deleted listings were already taken off listing_count.
+            if deleted_at is None:
+                listings[farm_id] = listings.get(farm_id, 0) + 1
+        for farm_id, count in sorted(listings.items()):
+            counters.adjust_farm(db, farm_id, listings=-count)
+        return len(removed)
+    return db.execute(statement).rowcount
+
+def delete_subtree(db, resource, resource_id):
+    # The synchronous counterpart of a purge job for small subtrees: the same steps in
+    # the caller's transaction, so counters are adjusted instead of left to cascades.
+    return sum(_delete_rows(db, model, criterion) for model, criterion in _steps(resource, resource_id))
+
+def run_job(job_id, batch_size=None, pause=None, stop=None):
+    batch_size = batch_size or config.PURGE_BATCH_SIZE
+    pause = config.PURGE_BATCH_PAUSE_SECONDS if pause is None else pause
+    stop = stop or threading.Event()
+    db = SessionLocal()
+    try:
+        job = db.query(models.Purge_job).filter(models.Purge_job.id == job_id).first()
+        if job is None or job.status != PROCESSING:
+            return
+
+        try:
+            for model, criterion in _steps(job.resource, job.resource_id):
+                while True:
+                    deleted = _delete_batch(db, model, criterion, batch_size)
+                    # Progress and a renewed lease commit with every batch.
+                    job.purged += deleted
+                    job.available_at = _utcnow() + timedelta(seconds=config.PURGE_LEASE_SECONDS)
+                    db.commit()
+                    if deleted < batch_size:
+                        break
+                    if stop.wait(pause):
+                        logger.info(f"Purge job {job.id} interrupted at {job.purged}/{job.total} rows; it will resume.")
+                        return
+
+            job.status = DONE
+            job.last_error = None
+            job.finished_at = _utcnow()
+            db.commit()
+            logger.info(f"Purge job {job.id} removed {job.resource} {job.resource_id} and {job.purged} rows.")
+
+        except Exception as e:
+            db.rollback()
+            job = db.query(models.Purge_job).filter(models.Purge_job.id == job_id).first()
+            job.attempts += 1
+            job.last_error = str(e)
+
+            if job.attempts >= config.PURGE_MAX_ATTEMPTS:
+                job.status = FAILED
+                job.finished_at = _utcnow()
+                logger.error(f"Purge job {job.id} failed permanently: {str(e)}")
+            else:
+                # Batches already committed stay deleted; the retry carries on from there.
+                job.status = PENDING
+                job.available_at = _utcnow() + timedelta(seconds=config.PURGE_POLL_INTERVAL * 2 ** job.attempts)
+                logger.warning(f"Purge job {job.id} failed, will retry: {str(e)}")
+
+            db.commit()
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while running purge job {job_id}: {str(e)}", exc_info=True)
+
+    finally:
+        db.close()
+
+def sweep(batch_size=None, pause=None, retention_days=None, stop=None):
+    batch_size = batch_size or config.PURGE_BATCH_SIZE
+    pause = config.PURGE_BATCH_PAUSE_SECONDS if pause is None else pause
+    retention_days = config.PURGE_RETENTION_DAYS if retention_days is None else retention_days
+    stop = stop or threading.Event()
+    cutoff = _utcnow() - timedelta(days=retention_days)
+    purged = 0
+    db = SessionLocal()
+    try:
+        for model, criterion in _expired_steps(cutoff):
+            while True:
+                # Each batch is its own short transaction, so locks never pile up.
+                deleted = _delete_batch(db, model, criterion, batch_size)
+                db.commit()
+                purged += deleted
+                if deleted < batch_size:
+                    break
+                if stop.wait(pause):
+                    return purged
+        if purged:
+            logger.info(f"Purge sweep removed {purged} soft-deleted rows.")
+        return purged
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Purge sweep failed after {purged} rows: {str(e)}")
+        return purged
+
+    finally:
+        db.close()
+
+class PurgeWorker:
+    # One job at a time per process: purges are meant to trickle in the background,
+    # not to compete with requests for connections.
+    def __init__(self, poll_interval=None):
+        self.poll_interval = poll_interval or config.PURGE_POLL_INTERVAL
+        self._stop = threading.Event()
+        self._thread = None
+        self._swept_at = None
+        # A full reconcile scans every order and farm; the first one waits a whole interval
+        # rather than running on every boot.
+        self._reconciled_at = time.monotonic()
+        self._reconcile_lock = None
+        # Startup already ensured this month's partitions; the worker keeps them ahead.
+        self._partitioned_at = time.monotonic()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="purge-worker", daemon=True)
+        self._thread.start()
+        logger.info("Purge worker started.")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self._reconcile_lock is not None:
+            # close() would return the connection, and the lock with it, to the pool.
+            self._reconcile_lock.invalidate()
+            self._reconcile_lock = None
+        logger.info("Purge worker stopped.")
+
+    def run_once(self):
+        db = SessionLocal()
+        try:
+            job_id = claim_job(db)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to claim purge job: {str(e)}")
+            job_id = None
+        finally:
+            db.close()
+
+        if job_id is not None:
+            run_job(job_id, stop=self._stop)
+        return job_id
+
+    def _holds_reconcile_lock(self):
+        # Every worker process runs this loop. Only the one holding a session-level advisory
+        # lock reconciles, so a fleet makes one pass per interval instead of one per process.
+        if engine.dialect.name != "postgresql":
+            return True
+        try:
+            if self._reconcile_lock is not None:
+                self._reconcile_lock.execute(select(1))
+                self._reconcile_lock.commit()
+                return True
+            conn = engine.connect()
+            if not conn.execute(select(func.pg_try_advisory_lock(counters.RECONCILE_LOCK_ID))).scalar():
+                conn.close()
+                return False
+            conn.commit()
+            self._reconcile_lock = conn
+            logger.info("This process now runs the scheduled counter reconciliation.")
+            return True
+        except Exception as e:
+            # A lost connection also loses the lock; another process can take over.
+            logger.warning(f"Failed to hold the counter reconciliation lock: {str(e)}")
+            if self._reconcile_lock is not None:
+                self._reconcile_lock.invalidate()
+                self._reconcile_lock = None
+            return False
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.run_once() is not None:
+                continue
+            if self._swept_at is None or time.monotonic() - self._swept_at >= config.PURGE_SWEEP_SECONDS:
+                self._swept_at = time.monotonic()
+                sweep(stop=self._stop)
+            if config.COUNTERS_RECONCILE_SECONDS and time.monotonic() - self._reconciled_at >= config.COUNTERS_RECONCILE_SECONDS:
+                self._reconciled_at = time.monotonic()
+                try:
+                    if self._holds_reconcile_lock():
+                        counters.reconcile()
+                except Exception:
+                    # Already logged by reconcile(); the worker keeps purging.
+                    pass
+            if config.PARTITION_MAINTENANCE_SECONDS and time.monotonic() - self._partitioned_at >= config.PARTITION_MAINTENANCE_SECONDS:
+                self._partitioned_at = time.monotonic()
+                try:
+                    partitions.ensure_partitions(engine)
+                except Exception as e:
+                    logger.error(f"Failed to ensure {partitions.PARTITIONED_TABLE} partitions: {str(e)}", exc_info=True)
+            self._stop.wait(self.poll_interval)
+
+def drain():
+    # Synchronous drain for scripts and tests running against a local database.
+    completed = 0
+    while True:
+        db = SessionLocal()
+        try:
+            job_id = claim_job(db)
+        finally:
+            db.close()
+        if job_id is None:
+            return completed
+        run_job(job_id, pause=0)
+        completed += 1
@@ -0,0 +1,69 @@
+import logging
+from sqlalchemy import event
+from .core import config
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUDGET_EXCEEDED = metrics.Counter(
+    "http_request_query_budget_exceeded_total",
+    "Requests that ran more database queries than their route's budget.",
+    ("method", "route"),
+)
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+def query_budget(max_queries):
+    # Declares how many queries a route may run per request. Goes below the route decorator:
+    #     @router.get(...)
+    #     @query_budget(3)
+    def declare(endpoint):
+        endpoint.query_budget = max_queries
+        return endpoint
+    return declare
+
+def route_budget(route):
+    budget = getattr(getattr(route, "endpoint", None), "query_budget", None)
+    return config.QUERY_BUDGET_DEFAULT if budget is None else budget
+
+def _overrun(request, stats):
+    route = request.scope.get("route")
+    budget = route_budget(route)
+    if stats is None or not budget or stats.queries <= budget:
+        return None
+    return getattr(route, "path", "unmatched"), budget
+
+def check_before_commit(session):
+    # The middleware only sees the total once the handler has committed, so in raise mode
+    # the overrun is also checked here: the commit fails and the handler rolls back.
+    request = session.info.get("request")
+    stats = metrics.current_request_stats()
+    if request is None or stats is None:
+        return
+    # Pending writes are flushed during the commit anyway; count them now.
+    session.flush()
+    overrun = _overrun(request, stats)
+    if overrun is not None:
+        route_name, budget = overrun
+        raise QueryBudgetExceeded(f"{request.method} {route_name} ran {stats.queries} queries before committing, over its budget of {budget}.")
+
+def instrument_sessions(session_factory):
+    event.listen(session_factory, "before_commit", check_before_commit)
+
+async def query_budget_middleware(request, call_next):
+    # Must run inside metrics_middleware, whose RequestStats it reads.
+    response = await call_next(request)
+
+    stats = metrics.current_request_stats()
+    overrun = _overrun(request, stats)
+    if overrun is None:
+        return response
+
+    route_name, budget = overrun
+    QUERY_BUDGET_EXCEEDED.inc(request.method, route_name)
+    message = f"{request.method} {route_name} ran {stats.queries} queries, over its budget of {budget}."
+    if config.QUERY_BUDGET_MODE == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+    return response
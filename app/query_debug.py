@@ -0,0 +1,135 @@
+import logging
+import re
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+from .core import config
+
+logger = logging.getLogger(__name__)
+
+_NUMBER = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST = re.compile(r"\(\s*(\?|%\(\w+\)s|%s|:\w+)(\s*,\s*(\?|%\(\w+\)s|%s|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_trace = ContextVar("query_trace", default=None)
+_history = deque(maxlen=config.QUERY_DEBUG_HISTORY)
+
+class QueryTrace:
+    __slots__ = ("route", "statements", "lazy_loads", "column_loads")
+
+    def __init__(self, route):
+        self.route = route
+        self.statements = []
+        self.lazy_loads = []
+        self.column_loads = 0
+
+def statement_shape(statement):
+    shape = _STRING.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+def instrument_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_debug_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_debug_start_time"].pop()
+        trace = _trace.get()
+        if trace is not None:
+            # The engine is kept so EXPLAIN runs where the statement ran, replica or primary.
+            trace.statements.append((statement, None if executemany else parameters, elapsed, conn.engine))
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        conn = context.connection
+        if conn is not None and conn.info.get("query_debug_start_time"):
+            conn.info["query_debug_start_time"].pop()
+
+def instrument_sessions(session_factory):
+    @event.listens_for(session_factory, "do_orm_execute")
+    def do_orm_execute(orm_execute_state):
+        trace = _trace.get()
+        if trace is None:
+            return
+        if orm_execute_state.is_relationship_load:
+            trace.lazy_loads.append(str(orm_execute_state.loader_strategy_path))
+        elif orm_execute_state.is_column_load:
+            trace.column_loads += 1
+
+def explain(engine, statement, parameters):
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    try:
+        with engine.connect() as conn:
+            rows = conn.exec_driver_sql(prefix + statement, parameters or ()).fetchall()
+        return [" ".join(str(column) for column in row) for row in rows]
+    except Exception as e:
+        return [f"EXPLAIN failed: {str(e)}"]
+
+def summarize(trace):
+    shapes = Counter(statement_shape(statement) for statement, _, _, _ in trace.statements)
+    repeated = [
+        {"statement": shape, "count": count}
+        for shape, count in shapes.items()
+        if count >= config.QUERY_DEBUG_REPEAT_THRESHOLD
+    ]
+
+    slow = []
+    threshold = config.QUERY_DEBUG_SLOW_MS / 1000
+    for statement, parameters, elapsed, engine in trace.statements:
+        if elapsed < threshold:
+            continue
+        entry = {"statement": statement, "duration_ms": round(elapsed * 1000, 3)}
+        if config.QUERY_DEBUG_EXPLAIN and statement.lstrip().upper().startswith("SELECT"):
+            entry["plan"] = explain(engine, statement, parameters)
+        slow.append(entry)
+
+    return {
+        "route": trace.route,
+        "queries": len(trace.statements),
+        "duration_ms": round(sum(elapsed for _, _, elapsed, _ in trace.statements) * 1000, 3),
+        "statements": [statement for statement, _, _, _ in trace.statements],
+        "repeated": repeated,
+        "slow": slow,
+        "lazy_loads": trace.lazy_loads,
+        "column_loads": trace.column_loads,
+    }
+
+def recent_summaries():
+    return list(_history)
+
+def query_debug_middleware():
+    async def middleware(request, call_next):
+        trace = QueryTrace(f"{request.method} {request.url.path}")
+        token = _trace.set(trace)
+        try:
+            response = await call_next(request)
+        finally:
+            _trace.reset(token)
+
+        route = request.scope.get("route")
+        if route is not None:
+            trace.route = f"{request.method} {route.path}"
+
+        # EXPLAIN opens its own connection; keep that off the event loop.
+        summary = await run_in_threadpool(summarize, trace)
+        _history.append(summary)
+
+        for entry in summary["repeated"]:
+            logger.warning(f"Possible N+1 in {trace.route}: {entry['count']}x {entry['statement']}")
+        for entry in summary["slow"]:
+            logger.warning(f"Slow query in {trace.route} ({entry['duration_ms']} ms): {entry['statement']} plan={entry.get('plan')}")
+
+        response.headers["X-Query-Summary"] = (
+            f"queries={summary['queries']}; duration_ms={summary['duration_ms']}; "
+            f"repeated={len(summary['repeated'])}; slow={len(summary['slow'])}; "
+            f"lazy_loads={len(summary['lazy_loads'])}; column_loads={summary['column_loads']}"
+        )
+        return response
+
+    return middleware
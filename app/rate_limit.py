@@ -0,0 +1,212 @@
+import json
+import logging
+import math
+import re
+import time
+from .core import config
+from . import auth, metrics
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED = metrics.Counter("http_rate_limited_total", "Requests rejected by the rate limiter.", ("group",))
+
+class Rule:
+    __slots__ = ("group", "method", "pattern", "rate", "burst")
+
+    def __init__(self, group, method, pattern, rate, burst):
+        self.group = group
+        self.method = method
+        self.pattern = re.compile(pattern)
+        self.rate = rate
+        self.burst = burst
+
+def default_rules():
+    return [
+        Rule("login", "POST", r"^/api/v1/(login|token/refresh)/$", config.RATE_LIMIT_LOGIN_RATE, config.RATE_LIMIT_LOGIN_BURST),
+        # List and search endpoints that scan the big tables.
+        Rule(
+            "list", "GET",
+            r"^/api/v1/(listings/|users/(farms/|\d+/(farms|orders|transactions)/|\d+/farms/\d+/species/))$",
+            config.RATE_LIMIT_LIST_RATE, config.RATE_LIMIT_LIST_BURST
+        ),
+        Rule("default", None, r"^/api/", config.RATE_LIMIT_DEFAULT_RATE, config.RATE_LIMIT_DEFAULT_BURST),
+    ]
+
+class LocalBackend:
+    is_async = False
+
+    def __init__(self, max_buckets=100000):
+        self.max_buckets = max_buckets
+        self._buckets = {}
+
+    def take(self, key, rate, burst, now):
+        # Called from the event loop only, so no lock is needed.
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_buckets:
+                self._evict(now)
+            self._buckets[key] = [burst - 1.0, now]
+            return 0.0
+
+        tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens >= 1.0:
+            bucket[0] = tokens - 1.0
+            return 0.0
+        bucket[0] = tokens
+        return (1.0 - tokens) / rate
+
+    def _evict(self, now):
+        # A bucket idle long enough to have refilled is indistinguishable from a new one.
+        for key, (tokens, updated_at) in list(self._buckets.items()):
+            if now - updated_at > 60:
+                del self._buckets[key]
+        if len(self._buckets) >= self.max_buckets:
+            self._buckets.clear()
+
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+class RedisBackend:
+    # Shares buckets across workers and hosts. Works with any client exposing the
+    # redis-py asyncio API (eval); the script keeps each check to one atomic round trip.
+    is_async = True
+
+    def __init__(self, client, prefix="ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def take(self, key, rate, burst, now):
+        try:
+            wait = await self.client.eval(_REDIS_TOKEN_BUCKET, 1, self.prefix + key, rate, burst, time.time())
+            return float(wait)
+        except Exception as e:
+            # Fail open: an unavailable limiter must not take the API down with it.
+            logger.error(f"Rate limit backend error, allowing request: {str(e)}")
+            return 0.0
+
+def create_backend():
+    if not config.RATE_LIMIT_REDIS_URL:
+        return LocalBackend()
+    try:
+        import redis.asyncio
+    except ImportError:
+        logger.error("RATE_LIMIT_REDIS_URL is set but the redis package is not installed; using in-process buckets.")
+        return LocalBackend()
+    return RedisBackend(redis.asyncio.from_url(config.RATE_LIMIT_REDIS_URL))
+
+class RateLimiter:
+    def __init__(self, rules=None, backend=None, trust_forwarded=None, max_cache_entries=10000):
+        self.rules = default_rules() if rules is None else rules
+        self.backend = backend or LocalBackend()
+        self.trust_forwarded = config.RATE_LIMIT_TRUST_FORWARDED if trust_forwarded is None else trust_forwarded
+        self.max_cache_entries = max_cache_entries
+        self._token_users = {}
+        self._matches = {}
+
+    def match(self, method, path):
+        # Regex matching dominates the cost, so remember the outcome per (method, path).
+        key = (method, path)
+        try:
+            return self._matches[key]
+        except KeyError:
+            pass
+        found = None
+        for rule in self.rules:
+            if (rule.method is None or rule.method == method) and rule.pattern.match(path):
+                found = rule
+                break
+        if len(self._matches) >= self.max_cache_entries:
+            self._matches.clear()
+        self._matches[key] = found
+        return found
+
+    def _user_for_token(self, token, now):
+        cached = self._token_users.get(token)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        try:
+            # Runs on the event loop, so no revocation lookup: a revoked token only picks the
+            # bucket, and the route's authorize_path_user dependency still rejects it.
+            claims = auth.verify_access_token(token.decode("latin-1"))
+        except auth.InvalidToken:
+            return None
+        if len(self._token_users) >= self.max_cache_entries:
+            self._token_users.clear()
+        self._token_users[token] = (claims.user_id, claims.expires_at)
+        return claims.user_id
+
+    def client_key(self, scope):
+        # Verified users get their own bucket; anything else, including forged tokens, is keyed by address.
+        authorization = None
+        forwarded = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                authorization = value
+            elif name == b"x-forwarded-for":
+                forwarded = value
+
+        if authorization is not None and authorization[:7].lower() == b"bearer ":
+            user_id = self._user_for_token(authorization[7:], time.time())
+            if user_id is not None:
+                return f"u:{user_id}"
+
+        if forwarded is not None and self.trust_forwarded:
+            return "ip:" + forwarded.split(b",")[0].strip().decode("latin-1")
+        client = scope.get("client")
+        return f"ip:{client[0]}" if client else "ip:unknown"
+
+    async def check(self, scope):
+        rule = self.match(scope["method"], scope["path"])
+        if rule is None:
+            return None, 0.0
+        key = f"{rule.group}:{self.client_key(scope)}"
+        if self.backend.is_async:
+            wait = await self.backend.take(key, rule.rate, rule.burst, time.monotonic())
+        else:
+            wait = self.backend.take(key, rule.rate, rule.burst, time.monotonic())
+        return rule, wait
+
+class RateLimitMiddleware:
+    def __init__(self, app, limiter=None):
+        self.app = app
+        self.limiter = limiter or RateLimiter(backend=create_backend())
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rule, wait = await self.limiter.check(scope)
+        if wait <= 0.0:
+            await self.app(scope, receive, send)
+            return
+
+        RATE_LIMITED.inc(rule.group)
+        body = json.dumps({"detail": "Too many requests."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(wait))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,328 @@
+import logging
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response, JSONResponse
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from ..database import get_db, get_read_db
+from .. import schemas, services, catalog, purge
+from ..query_budget import query_budget
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get("/api/v1/categories/", response_model=list[schemas.Category])
+@query_budget(5)
+def read_categories_list(db: Session = Depends(get_read_db)):
+    logger.info("Received request to read all categories.")
+
+    try:
+        snapshot = catalog.get_snapshot(db)
+        body = b"[" + b",".join(record.json for record in snapshot.categories.values()) + b"]"
+        return Response(content=body, media_type="application/json")
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading categories: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/categories/{category}/species/", response_model=list[schemas.Species])
+@query_budget(5)
+def read_category_species_list(category: str, db: Session = Depends(get_read_db)):
+    logger.info(f"Received request to read species in category {category}.")
+
+    try:
+        snapshot = catalog.get_snapshot(db)
+        species_ids = snapshot.species_ids_for_category(category)
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading species in category {category}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+    if category not in snapshot.categories:
+        logger.warning(f"Category {category} not found.")
+        raise HTTPException(status_code=404, detail="Category not found.")
+
+    return Response(content=snapshot.species_list_json(species_ids), media_type="application/json")
+
+@router.post("/api/v1/users/{user_id}/farms/{farm_id}/species/", response_model=schemas.Species)
+def create_species(user_id: int, species_data: schemas.SpeciesCreate, db: Session = Depends(get_db)):
+    logger.info(f"User {user_id} requested to create a new species.")
+
+    try:
+        if services.categories.get(db, species_data.category_name) is None:
+            logger.error(f"Category with ID {species_data.category_name} does not exist.")
+            services.categories.create(db, category=species_data.category_name)
+            logger.info(f"Category {species_data.category_name} was not found, so it was added to Category table.")
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Failed to insert category {species_data.category_name}: {str(e)}")
+        raise HTTPException(status_code=400, detail="Failed to insert category.")
+
+    try:
+        new_species = services.species.create(
+            db,
+            category_name=species_data.category_name,
+            common_name=species_data.common_name,
+            scientific_name=species_data.scientific_name,
+            description=species_data.description,
+            genus=species_data.genus,
+            family=species_data.family,
+            optimal_temperature_min=species_data.optimal_temperature_min,
+            optimal_temperature_max=species_data.optimal_temperature_max,
+            optimal_humidity=species_data.optimal_humidity,
+            optimal_ph=species_data.optimal_ph,
+            water_requirement_per_litre=species_data.water_requirement_per_litre,
+            nutritient_requirement_per_kg=species_data.nutritient_requirement_per_kg,
+            lifespan=species_data.lifespan,
+            native_region=species_data.native_region
+        )
+        services.commit_catalog(db)
+        db.refresh(new_species)
+
+        logger.info(f"Species created successfully by user ID {user_id}: {new_species.common_name}")
+        return new_species
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while creating species: {str(e)}")
+        raise HTTPException(status_code=400, detail="Failed to create species due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while creating species: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/users/{user_id}/farms/{farm_id}/species/{species_id}", response_model=schemas.Species)
+@query_budget(5)
+def read_species(user_id: int, species_id: int, db: Session = Depends(get_read_db)):
+    logger.info(f"User {user_id} requested to read species with ID {species_id}.")
+
+    try:
+        species_json = catalog.get_snapshot(db).species_json(species_id)
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading species with ID {species_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+    if species_json is None:
+        logger.warning(f"Species with ID {species_id} not found.")
+        raise HTTPException(status_code=404, detail="Species not found.")
+
+    return Response(content=species_json, media_type="application/json")
+
+@router.get("/api/v1/users/{user_id}/farms/{farm_id}/species/", response_model=list[schemas.Species])
+@query_budget(5)
+def read_species_list(user_id: int, farm_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
+    logger.info(f"User {user_id} requested to read species listed in farm ID {farm_id}.")
+
+    try:
+        species_ids = services.farm_species_ids(db, user_id, farm_id, skip, limit)
+        snapshot = catalog.get_snapshot(db)
+        logger.info(f"Successfully retrieved {len(species_ids)} species.")
+        return Response(content=snapshot.species_list_json(species_ids), media_type="application/json")
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading all species: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.patch("/api/v1/users/{user_id}/farms/{farm_id}/species/{species_id}", response_model=schemas.Species)
+def update_species(user_id: int, species_id: int, species_data: schemas.SpeciesUpdate, db: Session = Depends(get_db)):
+    logger.info(f"User {user_id} requested to update species with ID {species_id}.")
+
+    try:
+        species = services.species.get(db, species_id)
+
+        if not species:
+            logger.warning(f"Species with ID {species_id} not found.")
+            raise HTTPException(status_code=404, detail="Species not found.")
+
+        services.species.update(db, species, species_data)
+        services.commit_catalog(db)
+        db.refresh(species)
+
+        logger.info(f"Species with ID {species_id} updated successfully by user ID {user_id}.")
+        return species
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while updating species: {str(e)}")
+        raise HTTPException(status_code=400, detail="Failed to update species due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while updating species with ID {species_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.delete("/api/v1/users/{user_id}/farms/{farm_id}/species/{species_id}", response_model=dict)
+def delete_species(user_id: int, species_id: int, background: bool = False, db: Session = Depends(get_db)):
+    logger.info(f"User {user_id} requested to delete species with ID {species_id}.")
+
+    species = services.species.get(db, species_id)
+    if not species:
+        logger.warning(f"Species with ID {species_id} not found.")
+        raise HTTPException(status_code=404, detail="Species not found.")
+
+    try:
+        if background:
+            # A popular species reaches many listings and order items; purge those in batches.
+            job = purge.soft_delete(db, species, user_id, "species")
+            services.commit_catalog(db)
+
+            logger.info(f"Species with ID {species_id} scheduled for purge as job ID {job.id} ({job.total} rows).")
+            return JSONResponse(status_code=202, content={
+                "detail": "Species deletion scheduled.",
+                "job": schemas.PurgeJob.model_validate(job).model_dump(mode="json"),
+            })
+
+        purge.delete_subtree(db, "species", species_id)
+        services.commit_catalog(db)
+
+        logger.info(f"Species with ID {species_id} deleted successfully by user ID {user_id}.")
+        return {"detail": "Species deleted successfully."}
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while deleting species with ID {species_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.post("/api/v1/users/{user_id}/farms/{farm_id}/species/{species_id}/sub_species/", response_model=schemas.SubSpecies)
+def create_sub_species(
+    user_id: int,
+    species_id: int,
+    sub_species_data: schemas.SubSpeciesCreate,
+    db: Session = Depends(get_db)
+):
+    logger.info(f"User {user_id} requested to create a new sub-species under species ID {species_id}.")
+
+    species = services.species.get(db, species_id)
+    if not species:
+        logger.error(f"Species with ID {species_id} not found.")
+        raise HTTPException(status_code=404, detail="Species not found.")
+
+    try:
+        new_sub_species = services.sub_species.create(
+            db,
+            species_id=species_id,
+            name=sub_species_data.name,
+            common_name=sub_species_data.common_name,
+            description=sub_species_data.description,
+            growth_rate=sub_species_data.growth_rate,
+            unique_traits=sub_species_data.unique_traits
+        )
+        services.commit_catalog(db)
+        db.refresh(new_sub_species)
+
+        logger.info(f"Sub-species created successfully by user ID {user_id} under species ID {species_id}: {new_sub_species.name}")
+        return new_sub_species
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while creating sub-species: {str(e)}")
+        raise HTTPException(status_code=400, detail="Failed to create sub-species due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while creating sub-species: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/users/{user_id}/farms/{farm_id}/species/{species_id}/sub_species/{sub_species_id}", response_model=schemas.SubSpecies)
+@query_budget(5)
+def read_sub_species(
+    user_id: int,
+    species_id: int,
+    sub_species_id: int,
+    db: Session = Depends(get_read_db)
+):
+    logger.info(f"User {user_id} requested to read sub-species with ID {sub_species_id} under species ID {species_id}.")
+
+    try:
+        sub_species_json = catalog.get_snapshot(db).sub_species_json(species_id, sub_species_id)
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading sub-species with ID {sub_species_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+    if sub_species_json is None:
+        logger.warning(f"Sub-species with ID {sub_species_id} not found under species ID {species_id}.")
+        raise HTTPException(status_code=404, detail="Sub-species not found.")
+
+    return Response(content=sub_species_json, media_type="application/json")
+
+@router.get("/api/v1/users/{user_id}/farms/{farm_id}/species/{species_id}/sub_species/", response_model=list[schemas.SubSpecies])
+@query_budget(5)
+def read_sub_species_list(
+    user_id: int,
+    species_id: int,
+    db: Session = Depends(get_read_db)
+):
+    logger.info(f"User {user_id} requested to read all sub-species under species ID {species_id}.")
+
+    try:
+        snapshot = catalog.get_snapshot(db)
+        logger.info(f"Successfully retrieved sub-species under species ID {species_id}.")
+        return Response(content=snapshot.sub_species_list_json(species_id), media_type="application/json")
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading all sub-species: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.patch("/api/v1/users/{user_id}/farms/{farm_id}/species/{species_id}/sub_species/{sub_species_id}", response_model=schemas.SubSpecies)
+def update_sub_species(
+    user_id: int,
+    species_id: int,
+    sub_species_id: int,
+    sub_species_data: schemas.SubSpeciesUpdate,
+    db: Session = Depends(get_db)
+):
+    logger.info(f"User {user_id} requested to update sub-species with ID {sub_species_id} under species ID {species_id}.")
+
+    try:
+        sub_species = services.sub_species.get(db, sub_species_id, species_id=species_id)
+
+        if not sub_species:
+            logger.warning(f"Sub-species with ID {sub_species_id} not found under species ID {species_id}.")
+            raise HTTPException(status_code=404, detail="Sub-species not found.")
+
+        services.sub_species.update(db, sub_species, sub_species_data)
+        services.commit_catalog(db)
+        db.refresh(sub_species)
+
+        logger.info(f"Sub-species with ID {sub_species_id} updated successfully by user ID {user_id}.")
+        return sub_species
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while updating sub-species: {str(e)}")
+        raise HTTPException(status_code=400, detail="Failed to update sub-species due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while updating sub-species with ID {sub_species_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.delete("/api/v1/users/{user_id}/farms/{farm_id}/species/{species_id}/sub_species/{sub_species_id}", response_model=dict)
+def delete_sub_species(
+    user_id: int,
+    species_id: int,
+    sub_species_id: int,
+    db: Session = Depends(get_db)
+):
+    logger.info(f"User {user_id} requested to delete sub-species with ID {sub_species_id} under species ID {species_id}.")
+
+    try:
+        sub_species = services.sub_species.get(db, sub_species_id, species_id=species_id)
+
+        if not sub_species:
+            logger.warning(f"Sub-species with ID {sub_species_id} not found under species ID {species_id}.")
+            raise HTTPException(status_code=404, detail="Sub-species not found.")
+
+        purge.delete_subtree(db, "sub_species", sub_species.id)
+        services.commit_catalog(db)
+
+        logger.info(f"Sub-species with ID {sub_species_id} deleted successfully by user ID {user_id}.")
+        return {"detail": "Sub-species deleted successfully."}
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while deleting sub-species with ID {sub_species_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
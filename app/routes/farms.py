@@ -0,0 +1,174 @@
+import logging
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from ..database import get_db, get_read_db
+from .. import models, schemas, services, auth, purge
+from ..query_budget import query_budget
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post("/api/v1/users/{user_id}/farms/", response_model=schemas.Farm)
+def create_farm(
+    user_id: int,
+    farm_data: schemas.FarmCreate,
+    current_user: auth.Claims = Depends(auth.require_farmer),
+    db: Session = Depends(get_db)
+):
+    logger.info(f"Received request to create farm")
+
+    try:
+        new_farm = services.farms.create(
+            db,
+            user_id=current_user.user_id,
+            name=farm_data.name,
+            description=farm_data.description,
+            latitude=farm_data.latitude,
+            longitude=farm_data.longitude,
+        )
+        db.commit()
+        db.refresh(new_farm)
+
+        logger.info(f"Farm created successfully by user ID {current_user.user_id}: {new_farm.name}")
+        return new_farm
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while creating farm: {str(e)}")
+        raise HTTPException(status_code=400, detail="Failed to create farm due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while creating farm: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/users/{user_id}/farms/{farm_id}", response_model=schemas.Farm)
+@query_budget(3)
+def read_farm(user_id: int, farm_id: int, db: Session = Depends(get_read_db)):
+    logger.info(f"User {user_id} requested to read farm with ID {farm_id}.")
+
+    try:
+        farm = services.farms.get(db, farm_id, user_id=user_id)
+
+        if not farm:
+            logger.warning(f"Farm with ID {farm_id} not found for user ID {user_id} or user does not own it.")
+            raise HTTPException(status_code=404, detail="Farm not found or you do not have permission to access this farm.")
+
+        return farm
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading farm with ID {farm_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/users/farms/", response_model=list[schemas.Farm])
+@query_budget(3)
+def read_farms_list(
+    owner_id: int,
+    farm_type: Optional[models.FarmType] = Query(None, alias="type"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: auth.Claims = Depends(auth.authenticate),
+    db: Session = Depends(get_read_db)
+):
+    logger.info(f"User {current_user.user_id} requested to read farms with owner_id={owner_id}, type={farm_type}, skip={skip} and limit={limit}.")
+
+    try:
+        # Browsing is always by owner, so the scan follows Farm.user_id rather than the whole table.
+        query = services.farms.query(db, user_id=owner_id)
+        farms = services.filter_farms(query, farm_type, created_from, created_to, skip, limit).all()
+        logger.info(f"Successfully retrieved {len(farms)} farms.")
+        return farms
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading farms: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/users/{user_id}/farms/", response_model=list[schemas.Farm])
+@query_budget(3)
+def read_user_farms_list(
+    user_id: int,
+    farm_type: Optional[models.FarmType] = Query(None, alias="type"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_read_db)
+):
+    logger.info(f"User {user_id} requested to read their farms.")
+
+    try:
+        query = services.farms.query(db, user_id=user_id)
+        farms = services.filter_farms(query, farm_type, created_from, created_to, skip, limit).all()
+        logger.info(f"Successfully retrieved {len(farms)} farms for user ID {user_id}.")
+        return farms
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading farms for user ID {user_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.patch("/api/v1/users/{user_id}/farms/{farm_id}", response_model=schemas.Farm)
+def update_farm(user_id: int, farm_id: int, farm_data: schemas.FarmUpdate, db: Session = Depends(get_db)):
+    logger.info(f"User {user_id} requested to update farm with ID {farm_id}.")
+
+    try:
+        farm = services.farms.get(db, farm_id, user_id=user_id)
+
+        if not farm:
+            logger.warning(f"Farm with ID {farm_id} not found for user ID {user_id} or user does not own it.")
+            raise HTTPException(status_code=404, detail="Farm not found or you do not have permission to update this farm.")
+
+        services.farms.update(db, farm, farm_data)
+        db.commit()
+        db.refresh(farm)
+
+        logger.info(f"Farm with ID {farm_id} updated successfully by user ID {user_id}.")
+        return farm
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while updating farm: {str(e)}")
+        raise HTTPException(status_code=400, detail="Failed to update farm due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while updating farm: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.delete("/api/v1/users/{user_id}/farms/{farm_id}", response_model=dict)
+def delete_farm(user_id: int, farm_id: int, background: bool = False, db: Session = Depends(get_db)):
+    logger.info(f"User {user_id} requested to delete farm with ID {farm_id}.")
+
+    farm = services.farms.get(db, farm_id, user_id=user_id)
+    if not farm:
+        logger.warning(f"Farm with ID {farm_id} not found for user ID {user_id} or user does not own it.")
+        raise HTTPException(status_code=404, detail="Farm not found or you do not have permission to delete this farm.")
+
+    try:
+        if background:
+            # Erases the farm and its history for good: hide it now, purge it in batches later.
+            job = purge.soft_delete(db, farm, user_id, "farm")
+            db.commit()
+
+            logger.info(f"Farm with ID {farm_id} scheduled for purge as job ID {job.id} ({job.total} rows).")
+            return JSONResponse(status_code=202, content={
+                "detail": "Farm deletion scheduled.",
+                "job": schemas.PurgeJob.model_validate(job).model_dump(mode="json"),
+            })
+
+        services.retire_farms(db, models.Farm.id == farm_id, models.Farm.user_id == user_id)
+        db.commit()
+
+        logger.info(f"Farm with ID {farm_id} deleted successfully by user ID {user_id}.")
+        return {"detail": "Farm deleted successfully."}
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while deleting farm: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
@@ -0,0 +1,32 @@
+import logging
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from ..database import get_read_db
+from .. import models, schemas, services, graph
+from ..query_budget import query_budget
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# One query for the user and one per relation in the largest include tree.
+@router.post("/api/v1/users/{user_id}/query/", response_model=dict)
+@query_budget(16)
+def query_user_graph(user_id: int, query: schemas.GraphQuery, db: Session = Depends(get_read_db)):
+    logger.info(f"User {user_id} requested a batched query including {sorted(query.include)}.")
+
+    user = services.users.get(db, user_id)
+    if not user:
+        logger.warning(f"User with ID {user_id} not found.")
+        raise HTTPException(status_code=404, detail="User not found.")
+
+    try:
+        return graph.resolve(db, models.User, user, query.include)
+
+    except services.InvalidRequest as e:
+        logger.error(f"Invalid batched query: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while resolving batched query for user ID {user_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
@@ -0,0 +1,21 @@
+import logging
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from ..database import get_db
+from .. import models, schemas
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get("/api/v1/users/{user_id}/purge_jobs/{job_id}", response_model=schemas.PurgeJob)
+def read_purge_job(user_id: int, job_id: int, db: Session = Depends(get_db)):
+    # Read from the primary: progress on a lagging replica would run backwards.
+    logger.info(f"User {user_id} requested the status of purge job ID {job_id}.")
+
+    job = db.query(models.Purge_job).filter(models.Purge_job.id == job_id, models.Purge_job.user_id == user_id).first()
+    if not job:
+        logger.warning(f"Purge job with ID {job_id} not found for user ID {user_id}.")
+        raise HTTPException(status_code=404, detail="Purge job not found.")
+
+    return job
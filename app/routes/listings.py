@@ -0,0 +1,209 @@
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from ..database import get_db, get_read_db
+from .. import models, schemas, services, counters
+from ..query_budget import query_budget
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post("/api/v1/users/{user_id}/farms/{farm_id}/farm_species/", response_model=schemas.FarmSpecies)
+def create_farm_species(user_id: int, farm_id: int, species_data: schemas.FarmSpeciesCreate, db: Session = Depends(get_db)):
+    logger.info(f"User {user_id} requested to create a farm species in farm ID {farm_id}.")
+
+    farm = services.farms.get(db, farm_id, user_id=user_id)
+
+    if not farm:
+        logger.error("User does not have permission to create species in this farm.")
+        raise HTTPException(status_code=403, detail="You do not have permission to create species in this farm.")
+
+    try:
+        new_species = services.farm_species.create(
+            db,
+            farm_id=farm.id,
+            sub_species_id=species_data.sub_species_id,
+            name=species_data.name,
+            description=species_data.description,
+            price=species_data.price,
+            available_quantity=species_data.available_quantity,
+        )
+        counters.adjust_farm(db, farm.id, listings=1)
+        services.publish_stock(db, [new_species])
+        db.commit()
+        db.refresh(new_species)
+
+        logger.info(f"Farm species created successfully by user ID {user_id}: {new_species.name}")
+        return new_species
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while creating farm species: {str(e)}")
+        raise HTTPException(status_code=400, detail="Failed to create farm species due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while creating farm species: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/users/{user_id}/farms/{farm_id}/farm_species/{farm_species_id}", response_model=schemas.FarmSpecies)
+@query_budget(3)
+def read_farm_species(user_id: int, farm_id: int, species_id: int, db: Session = Depends(get_read_db)):
+    logger.info(f"User {user_id} requested to read farm species with ID {species_id} in farm ID {farm_id}.")
+
+    try:
+        species = services.farm_species.get(db, species_id, farm_id=farm_id)
+
+        if not species:
+            logger.warning(f"Farm species with ID {species_id} not found in farm ID {farm_id}.")
+            raise HTTPException(status_code=404, detail="Farm species not found.")
+
+        return species
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading farm species with ID {species_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/users/{user_id}/farms/{farm_id}/farm_species/", response_model=list[schemas.FarmSpecies])
+@query_budget(3)
+def read_farm_species_list(user_id: int, farm_id: int, db: Session = Depends(get_read_db)):
+    logger.info(f"User {user_id} requested to read all farm species in farm ID {farm_id}.")
+
+    try:
+        species_list = services.live_listings(services.farm_species.query(db, farm_id=farm_id)).all()
+        logger.info(f"Successfully retrieved {len(species_list)} species for farm ID {farm_id}.")
+        return species_list
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading all farm species for farm ID {farm_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/listings/", response_model=list[schemas.Listing])
+@query_budget(3)
+def read_listings(
+    sub_species_id: Optional[int] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: bool = True,
+    latitude: Optional[float] = Query(None, ge=-90, le=90),
+    longitude: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0),
+    sort: schemas.ListingSort = schemas.ListingSort.price,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_read_db)
+):
+    logger.info(f"Received request to search listings sorted by {sort.value}.")
+
+    try:
+        listings = services.search_listings(
+            db,
+            sub_species_id=sub_species_id,
+            min_price=min_price,
+            max_price=max_price,
+            in_stock=in_stock,
+            latitude=latitude,
+            longitude=longitude,
+            radius_km=radius_km,
+            sort=sort,
+            skip=skip,
+            limit=limit
+        )
+        logger.info(f"Successfully retrieved {len(listings)} listings.")
+        return listings
+
+    except services.InvalidRequest as e:
+        logger.error(f"Invalid listing search: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while searching listings: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.patch("/api/v1/users/{user_id}/farms/{farm_id}/farm_species/", response_model=list[schemas.FarmSpecies])
+def bulk_update_farm_species(user_id: int, farm_id: int, changes: list[schemas.FarmSpeciesBulkUpdate], db: Session = Depends(get_db)):
+    logger.info(f"User {user_id} requested to update {len(changes)} farm species in farm ID {farm_id}.")
+
+    try:
+        result = services.bulk_update_farm_species(db, user_id, farm_id, changes)
+        db.commit()
+
+        logger.info(f"Updated {len(result)} farm species in farm ID {farm_id} for user ID {user_id}.")
+        return result
+
+    except services.InvalidRequest as e:
+        logger.error(f"Invalid bulk farm species update: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except services.Conflict as e:
+        db.rollback()
+        logger.warning(f"Bulk update rejected for farm ID {farm_id}; {str(e)}")
+        raise HTTPException(
+            status_code=409,
+            detail="Some farm species were not found in this farm or their stock would go negative."
+        )
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while bulk updating farm species: {str(e)}")
+        raise HTTPException(status_code=400, detail="Failed to update farm species due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while bulk updating farm species in farm ID {farm_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.patch("/api/v1/users/{user_id}/farms/{farm_id}/farm_species/{farm_species_id}", response_model=schemas.FarmSpecies)
+def update_farm_species(user_id: int, farm_id: int, species_id: int, species_data: schemas.FarmSpeciesUpdate, db: Session = Depends(get_db)):
+    logger.info(f"User {user_id} requested to update farm species with ID {species_id} in farm ID {farm_id}.")
+
+    try:
+        species = services.farm_species.get(db, species_id, farm_id=farm_id)
+
+        if not species:
+            logger.warning(f"Farm species with ID {species_id} not found in farm ID {farm_id}.")
+            raise HTTPException(status_code=404, detail="Farm species not found.")
+
+        services.farm_species.update(db, species, species_data)
+        services.publish_stock(db, [species])
+        db.commit()
+        db.refresh(species)
+
+        logger.info(f"Farm species with ID {species_id} updated successfully by user ID {user_id}.")
+        return species
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while updating farm species: {str(e)}")
+        raise HTTPException(status_code=400, detail="Failed to update farm species due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while updating farm species with ID {species_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.delete("/api/v1/users/{user_id}/farms/{farm_id}/farm_species/{farm_species_id}", response_model=dict)
+def delete_farm_species(user_id: int, farm_id: int, species_id: int, db: Session = Depends(get_db)):
+    logger.info(f"User {user_id} requested to delete farm species with ID {species_id} in farm ID {farm_id}.")
+
+    try:
+        species = services.farm_species.get(db, species_id, farm_id=farm_id)
+
+        if not species:
+            logger.warning(f"Farm species with ID {species_id} not found in farm ID {farm_id}.")
+            raise HTTPException(status_code=404, detail="Farm species not found.")
+
+        if services.farm_species.soft_delete_where(db, models.Farm_species.id == species.id):
+            counters.adjust_farm(db, farm_id, listings=-1)
+        db.commit()
+
+        logger.info(f"Farm species with ID {species_id} deleted successfully by user ID {user_id}.")
+        return {"detail": "Farm species deleted successfully."}
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while deleting farm species with ID {species_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
@@ -0,0 +1,355 @@
+import logging
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from ..database import get_db, get_read_db
+from .. import models, schemas, services, outbox, counters, auth
+from ..query_budget import query_budget
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post("/api/v1/users/{user_id}/orders/", response_model=schemas.Order)
+def create_order(
+    user_id: int,
+    order_data: schemas.OrderCreate,
+    db: Session = Depends(get_db)
+):
+    logger.info(f"User {user_id} requested to create a new order.")
+
+    farmer = services.users.get(db, order_data.farmer_id)
+    if not farmer:
+        logger.error(f"Farmer with ID {order_data.farmer_id} not found.")
+        raise HTTPException(status_code=404, detail="Farmer not found.")
+
+    try:
+        new_order = services.orders.create(
+            db,
+            farmer_id=order_data.farmer_id,
+            name=order_data.name,
+            description=order_data.description
+        )
+        outbox.enqueue(db, "order.created", {
+            "order_id": new_order.id,
+            "farmer_id": new_order.farmer_id,
+            "user_id": user_id,
+        })
+        services.publish_order(db, new_order, user_id)
+        db.commit()
+        db.refresh(new_order)
+
+        logger.info(f"Order created successfully by user ID {user_id}: {new_order.name}")
+        return new_order
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while creating order: {str(e)}")
+        raise HTTPException(status_code=400, detail="Failed to create order due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while creating order: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/users/{user_id}/orders/{order_id}", response_model=schemas.Order)
+@query_budget(3)
+def read_order(
+    user_id: int,
+    order_id: int,
+    db: Session = Depends(get_read_db)
+):
+    logger.info(f"User {user_id} requested to read order with ID {order_id}.")
+
+    try:
+        order = services.orders.get(db, order_id)
+
+        if not order:
+            logger.warning(f"Order with ID {order_id} not found.")
+            raise HTTPException(status_code=404, detail="Order not found.")
+
+        return order
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading order with ID {order_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/users/{user_id}/orders/", response_model=list[schemas.Order])
+@query_budget(3)
+def read_orders_list(
+    user_id: int,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: auth.Claims = Depends(auth.authenticate),
+    db: Session = Depends(get_read_db)
+):
+    # Farmers see the orders placed with them and buyers the orders they paid for.
+    role = current_user.role
+    logger.info(f"User {user_id} requested to read their orders as {role.value}.")
+
+    try:
+        orders_list = services.list_orders(db, user_id, role, created_from, created_to, skip, limit)
+        logger.info(f"Successfully retrieved {len(orders_list)} orders.")
+        return orders_list
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading all orders: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.patch("/api/v1/users/{user_id}/orders/{order_id}", response_model=schemas.Order)
+def update_order(
+    user_id: int,
+    order_id: int,
+    order_data: schemas.OrderUpdate,
+    db: Session = Depends(get_db)
+):
+    logger.info(f"User {user_id} requested to update order with ID {order_id}.")
+
+    try:
+        order = services.orders.get(db, order_id)
+
+        if not order:
+            logger.warning(f"Order with ID {order_id} not found.")
+            raise HTTPException(status_code=404, detail="Order not found.")
+
+        services.orders.update(db, order, order_data)
+        db.commit()
+        db.refresh(order)
+
+        logger.info(f"Order with ID {order_id} updated successfully by user ID {user_id}.")
+        return order
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while updating order: {str(e)}")
+        raise HTTPException(status_code=400, detail="Failed to update order due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while updating order with ID {order_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.delete("/api/v1/users/{user_id}/orders/{order_id}", response_model=dict)
+def delete_order(
+    user_id: int,
+    order_id: int,
+    db: Session = Depends(get_db)
+):
+    logger.info(f"User {user_id} requested to delete order with ID {order_id}.")
+
+    try:
+        order = services.orders.get(db, order_id)
+
+        if not order:
+            logger.warning(f"Order with ID {order_id} not found.")
+            raise HTTPException(status_code=404, detail="Order not found.")
+
+        counters.remove_order_revenue(db, order_id)
+        services.orders.delete(db, order)
+        db.commit()
+
+        logger.info(f"Order with ID {order_id} deleted successfully by user ID {user_id}.")
+        return {"detail": "Order deleted successfully."}
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while deleting order with ID {order_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.post("/api/v1/users/{user_id}/orders/{order_id}/order_items/", response_model=schemas.OrderItem)
+def create_order_item(
+    user_id: int,
+    order_id: int,
+    order_item_data: schemas.OrderItemCreate,
+    db: Session = Depends(get_db)
+):
+    logger.info(f"User {user_id} requested to create a new order item for order ID {order_id}.")
+
+    order = services.orders.get(db, order_id)
+    if not order:
+        logger.error(f"Order with ID {order_id} not found.")
+        raise HTTPException(status_code=404, detail="Order not found.")
+
+    farm_species = services.farm_species.get(db, order_item_data.farm_species_id)
+    if not farm_species:
+        logger.error(f"Farm species with ID {order_item_data.farm_species_id} not found.")
+        raise HTTPException(status_code=404, detail="Farm species not found.")
+
+    try:
+        new_order_item = services.order_items.create(
+            db,
+            order_id=order_id,
+            farm_species_id=order_item_data.farm_species_id,
+            quantity=order_item_data.quantity,
+            price=order_item_data.price,
+            total_price=order_item_data.quantity * order_item_data.price
+        )
+        counters.adjust_order(db, order_id, items=1, amount=new_order_item.total_price)
+        db.commit()
+        db.refresh(new_order_item)
+
+        logger.info(f"Order item created successfully by user ID {user_id} for order ID {order_id}.")
+        return new_order_item
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while creating order item: {str(e)}")
+        raise HTTPException(status_code=400, detail="Failed to create order item due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while creating order item: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/users/{user_id}/orders/{order_id}/order_items/{order_item_id}", response_model=schemas.OrderItem)
+@query_budget(3)
+def read_order_item(
+    user_id: int,
+    order_id: int,
+    order_item_id: int,
+    db: Session = Depends(get_read_db)
+):
+    logger.info(f"User {user_id} requested to read order item with ID {order_item_id} for order ID {order_id}.")
+
+    try:
+        order_item = services.order_items.get(db, order_item_id, order_id=order_id)
+
+        if not order_item:
+            logger.warning(f"Order item with ID {order_item_id} not found for order ID {order_id}.")
+            raise HTTPException(status_code=404, detail="Order item not found.")
+
+        return order_item
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading order item with ID {order_item_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/users/{user_id}/orders/{order_id}/order_items/", response_model=list[schemas.OrderItem])
+@query_budget(3)
+def read_order_items_list(
+    user_id: int,
+    order_id: int,
+    db: Session = Depends(get_read_db)
+):
+    logger.info(f"User {user_id} requested to read all order items for order ID {order_id}.")
+
+    try:
+        order_items_list = services.order_items.query(db, order_id=order_id).all()
+        logger.info(f"Successfully retrieved {len(order_items_list)} order items for order ID {order_id}.")
+        return order_items_list
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading all order items: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.patch("/api/v1/users/{user_id}/orders/{order_id}/order_items/{order_item_id}", response_model=schemas.OrderItem)
+def update_order_item(
+    user_id: int,
+    order_id: int,
+    order_item_id: int,
+    order_item_data: schemas.OrderItemUpdate,
+    db: Session = Depends(get_db)
+):
+    logger.info(f"User {user_id} requested to update order item with ID {order_item_id} for order ID {order_id}.")
+
+    try:
+        order_item = services.order_items.get(db, order_item_id, order_id=order_id)
+
+        if not order_item:
+            logger.warning(f"Order item with ID {order_item_id} not found for order ID {order_id}.")
+            raise HTTPException(status_code=404, detail="Order item not found.")
+
+        previous_total = order_item.total_price
+        services.order_items.update(db, order_item, order_item_data)
+        if order_item_data.quantity is not None or order_item_data.price is not None:
+            order_item.total_price = order_item.quantity * order_item.price
+            counters.adjust_order(db, order_id, amount=counters.to_decimal(order_item.total_price) - counters.to_decimal(previous_total))
+
+        db.commit()
+        db.refresh(order_item)
+
+        logger.info(f"Order item with ID {order_item_id} updated successfully by user ID {user_id}.")
+        return order_item
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while updating order item: {str(e)}")
+        raise HTTPException(status_code=400, detail="Failed to update order item due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while updating order item with ID {order_item_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.delete("/api/v1/users/{user_id}/orders/{order_id}/order_items/{order_item_id}", response_model=dict)
+def delete_order_item(
+    user_id: int,
+    order_id: int,
+    order_item_id: int,
+    db: Session = Depends(get_db)
+):
+    logger.info(f"User {user_id} requested to delete order item with ID {order_item_id} for order ID {order_id}.")
+
+    try:
+        order_item = services.order_items.get(db, order_item_id, order_id=order_id)
+
+        if not order_item:
+            logger.warning(f"Order item with ID {order_item_id} not found for order ID {order_id}.")
+            raise HTTPException(status_code=404, detail="Order item not found.")
+
+        services.order_items.delete(db, order_item)
+        counters.adjust_order(db, order_id, items=-1, amount=-order_item.total_price)
+        db.commit()
+
+        logger.info(f"Order item with ID {order_item_id} deleted successfully by user ID {user_id}.")
+        return {"detail": "Order item deleted successfully."}
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while deleting order item with ID {order_item_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.post("/api/v1/users/{user_id}/checkout/", response_model=schemas.Checkout)
+@query_budget(12)
+def checkout(
+    user_id: int,
+    checkout_data: schemas.CheckoutCreate,
+    db: Session = Depends(get_db)
+):
+    logger.info(f"User {user_id} requested checkout of {len(checkout_data.items)} items from farm ID {checkout_data.farm_id}.")
+
+    try:
+        result = services.checkout(db, user_id, checkout_data)
+        db.commit()
+
+        logger.info(f"Checkout completed by user ID {user_id}: order ID {result.order.id}, transaction ID {result.transaction.id}.")
+        return result
+
+    except services.InvalidRequest as e:
+        db.rollback()
+        logger.error(f"Checkout rejected: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except services.NotFound as e:
+        db.rollback()
+        logger.error(f"Checkout from farm ID {checkout_data.farm_id} failed: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+
+    except services.Conflict as e:
+        db.rollback()
+        logger.warning(f"Checkout from farm ID {checkout_data.farm_id} failed: {str(e)}")
+        raise HTTPException(status_code=409, detail=str(e))
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error during checkout: {str(e)}")
+        raise HTTPException(status_code=400, detail="Checkout failed due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error during checkout: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
@@ -0,0 +1,27 @@
+import logging
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from .. import events
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# No session dependency: a subscriber holds no database connection, and every
+# update arrives with its data, however many clients are listening. The handlers
+# are async so the stream runs on the event loop that owns the hub.
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@router.get("/api/v1/users/{user_id}/events/")
+async def stream_user_events(user_id: int, farm_id: list[int] = Query([])):
+    logger.info(f"User {user_id} subscribed to events for {len(farm_id)} farms.")
+
+    topics = [events.user_topic(user_id)] + [events.farm_topic(farm) for farm in farm_id]
+    return StreamingResponse(events.hub.stream(topics), media_type="text/event-stream", headers=_SSE_HEADERS)
+
+@router.get("/api/v1/farms/{farm_id}/events/")
+async def stream_farm_events(farm_id: int):
+    # Stock and prices are public, like the listings search, so no token is needed.
+    logger.info(f"Received subscription to stock events for farm ID {farm_id}.")
+
+    return StreamingResponse(events.hub.stream([events.farm_topic(farm_id)]), media_type="text/event-stream", headers=_SSE_HEADERS)
@@ -0,0 +1,267 @@
+import logging
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from ..database import get_db, get_read_db
+from .. import models, schemas, services, outbox, partitions, counters
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post("/api/v1/users/{user_id}/orders/{order_id}/transactions/", response_model=schemas.Transaction)
+def create_transaction(
+    user_id: int,
+    order_id: int,
+    transaction_data: schemas.TransactionCreate,
+    db: Session = Depends(get_db)
+):
+    logger.info(f"User {user_id} requested to create a new transaction for order ID {order_id}.")
+
+    # Only the order's farmer or a buyer who already paid towards it may record a payment.
+    order = services.orders.get(db, order_id)
+    if not order or not services.is_order_party(db, order, user_id):
+        logger.error(f"Order with ID {order_id} not found for user ID {user_id}.")
+        raise HTTPException(status_code=404, detail="Order not found.")
+
+    farm = services.farms.get(db, transaction_data.farm_id)
+    if not farm:
+        logger.error(f"Farm with ID {transaction_data.farm_id} not found.")
+        raise HTTPException(status_code=404, detail="Farm not found.")
+
+    if farm.user_id != order.farmer_id:
+        logger.error(f"Farm with ID {farm.id} does not belong to the farmer of order ID {order_id}.")
+        raise HTTPException(status_code=403, detail="Farm does not belong to the order's farmer.")
+
+    try:
+        new_transaction = services.transactions.create(
+            db,
+            buyer_id=user_id,
+            order_id=order_id,
+            farm_id=transaction_data.farm_id,
+            total_amount=transaction_data.total_amount,
+            status=transaction_data.status,
+            payment_method=transaction_data.payment_method
+        )
+        outbox.enqueue(db, "transaction.created", {
+            "transaction_id": new_transaction.id,
+            "order_id": order_id,
+            "farm_id": transaction_data.farm_id,
+            "buyer_id": user_id,
+            "total_amount": transaction_data.total_amount,
+        })
+        services.publish_transaction(db, new_transaction, transaction_data.farm_id, farm.user_id)
+        counters.adjust_farm(db, transaction_data.farm_id, revenue=transaction_data.total_amount)
+        db.commit()
+        db.refresh(new_transaction)
+
+        logger.info(f"Transaction created successfully by user ID {user_id} for order ID {order_id}.")
+        return new_transaction
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while creating transaction: {str(e)}")
+        raise HTTPException(status_code=400, detail="Failed to create transaction due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while creating transaction: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/users/{user_id}/orders/{order_id}/transactions/{transaction_id}", response_model=schemas.Transaction)
+def read_transaction(
+    user_id: int,
+    order_id: int,
+    transaction_id: int,
+    db: Session = Depends(get_read_db)
+):
+    logger.info(f"User {user_id} requested to read transaction with ID {transaction_id} for order ID {order_id}.")
+
+    try:
+        transaction = services.transactions.get(db, transaction_id, order_id=order_id)
+
+        if not transaction:
+            logger.warning(f"Transaction with ID {transaction_id} not found for order ID {order_id}.")
+            raise HTTPException(status_code=404, detail="Transaction not found.")
+
+        return transaction
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading transaction with ID {transaction_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/users/{user_id}/orders/{order_id}/transactions/", response_model=list[schemas.Transaction])
+def read_transactions_list(
+    user_id: int,
+    order_id: int,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_read_db)
+):
+    logger.info(f"User {user_id} requested to read all transactions for order ID {order_id}.")
+
+    try:
+        transactions_list = services.list_transactions(
+            db,
+            models.Transaction.order_id == order_id,
+            status=status,
+            date_from=date_from,
+            date_to=date_to,
+            skip=skip,
+            limit=limit
+        )
+        logger.info(f"Successfully retrieved {len(transactions_list)} transactions for order ID {order_id}.")
+        return transactions_list
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading all transactions: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/users/{user_id}/transactions/", response_model=list[schemas.Transaction])
+def read_user_transactions_list(
+    user_id: int,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_read_db)
+):
+    logger.info(f"User {user_id} requested to read their transactions.")
+
+    try:
+        transactions_list = services.list_transactions(
+            db,
+            models.Transaction.buyer_id == user_id,
+            status=status,
+            date_from=date_from,
+            date_to=date_to,
+            order_by=(models.Transaction.transaction_date.desc(), models.Transaction.id.desc()),
+            skip=skip,
+            limit=limit
+        )
+        logger.info(f"Successfully retrieved {len(transactions_list)} transactions for buyer ID {user_id}.")
+        return transactions_list
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading transactions for buyer ID {user_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/api/v1/users/{user_id}/transactions/export/")
+def export_user_transactions(
+    user_id: int,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_read_db)
+):
+    logger.info(f"User {user_id} requested an export of their transactions.")
+
+    def rows():
+        try:
+            yield from services.export_transactions(db, user_id, date_from, date_to)
+        except Exception as e:
+            logger.critical(f"Export of transactions for buyer ID {user_id} failed mid-stream: {str(e)}", exc_info=True)
+            raise
+        finally:
+            db.close()
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+@router.get("/api/v1/users/{user_id}/orders/{order_id}/transactions/archive/", response_model=list[schemas.Transaction])
+def read_archived_transactions_list(
+    user_id: int,
+    order_id: int,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = 1000
+):
+    logger.info(f"User {user_id} requested archived transactions for order ID {order_id}.")
+
+    try:
+        transactions_list = partitions.read_archived_transactions(
+            order_id=order_id,
+            date_from=date_from,
+            date_to=date_to,
+            limit=limit
+        )
+        logger.info(f"Successfully retrieved {len(transactions_list)} archived transactions for order ID {order_id}.")
+        return transactions_list
+
+    except ImportError:
+        logger.error("pyarrow is required to read archived transactions.")
+        raise HTTPException(status_code=501, detail="Archive reads are not available on this server.")
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading archived transactions: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.patch("/api/v1/users/{user_id}/orders/{order_id}/transactions/{transaction_id}", response_model=schemas.Transaction)
+def update_transaction(
+    user_id: int,
+    order_id: int,
+    transaction_id: int,
+    transaction_data: schemas.TransactionUpdate,
+    db: Session = Depends(get_db)
+):
+    logger.info(f"User {user_id} requested to update transaction with ID {transaction_id} for order ID {order_id}.")
+
+    try:
+        transaction = services.transactions.get(db, transaction_id, order_id=order_id)
+
+        if not transaction:
+            logger.warning(f"Transaction with ID {transaction_id} not found for order ID {order_id}.")
+            raise HTTPException(status_code=404, detail="Transaction not found.")
+
+        previous_amount = transaction.total_amount
+        services.transactions.update(db, transaction, transaction_data)
+        if transaction_data.total_amount is not None:
+            counters.adjust_farm(db, transaction.farm_id, revenue=counters.to_decimal(transaction.total_amount) - counters.to_decimal(previous_amount))
+        db.commit()
+        db.refresh(transaction)
+
+        logger.info(f"Transaction with ID {transaction_id} updated successfully by user ID {user_id}.")
+        return transaction
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while updating transaction: {str(e)}")
+        raise HTTPException(status_code=400, detail="Failed to update transaction due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while updating transaction with ID {transaction_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.delete("/api/v1/users/{user_id}/orders/{order_id}/transactions/{transaction_id}", response_model=dict)
+def delete_transaction(
+    user_id: int,
+    order_id: int,
+    transaction_id: int,
+    db: Session = Depends(get_db)
+):
+    logger.info(f"User {user_id} requested to delete transaction with ID {transaction_id} for order ID {order_id}.")
+
+    try:
+        transaction = services.transactions.get(db, transaction_id, order_id=order_id)
+
+        if not transaction:
+            logger.warning(f"Transaction with ID {transaction_id} not found for order ID {order_id}.")
+            raise HTTPException(status_code=404, detail="Transaction not found.")
+
+        services.transactions.delete(db, transaction)
+        counters.adjust_farm(db, transaction.farm_id, revenue=-transaction.total_amount)
+        db.commit()
+
+        logger.info(f"Transaction with ID {transaction_id} deleted successfully by user ID {user_id}.")
+        return {"detail": "Transaction deleted successfully."}
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while deleting transaction with ID {transaction_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
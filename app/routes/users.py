@@ -0,0 +1,270 @@
+import logging
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from ..database import get_db, get_read_db
+from .. import models, schemas, services, passwords, auth
+from ..core import config
+from ..query_budget import query_budget
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+def _password_task(function, *args):
+    # Hashing runs before any query so no pooled connection is held while it waits.
+    try:
+        return function(*args)
+    except passwords.PasswordHasherBusy:
+        logger.warning("Password hashing pool is saturated; rejecting request.")
+        raise HTTPException(status_code=503, detail="Server busy, retry shortly.", headers={"Retry-After": "1"})
+
+@router.post("/api/v1/users/", response_model=schemas.User)
+def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    logger.info(f"Received request to create user")
+
+    password_hash = _password_task(passwords.hash_password, user.password)
+
+    try:
+        # The phone upsert and the user insert share one transaction and one commit.
+        if services.ensure_phones(db, [user.phone]):
+            logger.info(f"Phone number {user.phone} was not found, so it was added to Phone table.")
+        db_user = services.users.create(db, **user.dict(exclude={"password"}), password=password_hash)
+        db.commit()
+        db.refresh(db_user)
+
+        logger.info(f"User created successfully: ID {db_user.id}, Phone {db_user.phone}")
+        return db_user
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while creating user: {str(e)}")
+        raise HTTPException(status_code=400, detail="User creation failed due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.post("/api/v1/users/bulk/", response_model=list[schemas.User])
+@query_budget(5)
+def create_users_bulk(users: list[schemas.UserCreate], db: Session = Depends(get_db)):
+    logger.info(f"Received request to create {len(users)} users.")
+
+    if len(users) > config.SIGNUP_BATCH_MAX:
+        logger.error(f"Bulk signup of {len(users)} users exceeds the limit of {config.SIGNUP_BATCH_MAX}.")
+        raise HTTPException(status_code=400, detail=f"At most {config.SIGNUP_BATCH_MAX} users may be created at once.")
+
+    emails = [user.email.lower() for user in users]
+    if len(set(emails)) != len(emails):
+        logger.error("Bulk signup contains duplicate emails.")
+        raise HTTPException(status_code=400, detail="Each email may only appear once.")
+
+    password_hashes = _password_task(passwords.hash_passwords, [user.password for user in users])
+
+    try:
+        added = services.ensure_phones(db, [user.phone for user in users])
+        new_users = services.users.create_many(db, [
+            {**user.dict(exclude={"password"}), "password": password_hash}
+            for user, password_hash in zip(users, password_hashes)
+        ])
+        # Serialize before commit: commit expires the instances, and the response would
+        # otherwise refresh each user with its own SELECT.
+        result = [schemas.User.model_validate(user) for user in new_users]
+        db.commit()
+
+        logger.info(f"Created {len(new_users)} users and {len(added)} phone numbers.")
+        return result
+
+    except IntegrityError as e:
+        db.rollback()
+        logger.error(f"Database integrity error while creating users in bulk: {str(e)}")
+        raise HTTPException(status_code=400, detail="User creation failed due to database constraint.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while creating users in bulk: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+def _token_pair(user_id, role, refresh_token):
+    return schemas.TokenPair(
+        access_token=auth.create_access_token(user_id, role),
+        refresh_token=refresh_token,
+        expires_in=config.AUTH_ACCESS_TOKEN_SECONDS
+    )
+
+@router.post("/api/v1/login/", response_model=schemas.TokenPair)
+def login(credentials: schemas.UserLogin, db: Session = Depends(get_db)):
+    logger.info("Received login request.")
+
+    db_user = services.users.query(db, email=credentials.email).first()
+    if db_user is not None:
+        # Detach and end the transaction so no pooled connection is held while the password is checked.
+        db.expunge(db_user)
+    db.rollback()
+
+    if db_user is None or not _password_task(passwords.verify_password, credentials.password, db_user.password):
+        logger.warning("Login failed: invalid credentials.")
+        raise HTTPException(status_code=401, detail="Invalid email or password.")
+
+    password_hash = None
+    if passwords.needs_rehash(db_user.password):
+        # Upgrades legacy plain-text rows and hashes made with older cost parameters.
+        try:
+            password_hash = _password_task(passwords.hash_password, credentials.password)
+        except HTTPException:
+            logger.warning(f"Skipped password rehash for user ID {db_user.id}; hashing pool is busy.")
+
+    try:
+        if password_hash is not None:
+            services.users.update_many(db, [{"id": db_user.id, "password": password_hash}])
+            logger.info(f"Rehashed password for user ID {db_user.id}.")
+        refresh_token = auth.issue_refresh_token(db, db_user.id)
+        db.commit()
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while logging in user ID {db_user.id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+    logger.info(f"User ID {db_user.id} logged in.")
+    return _token_pair(db_user.id, db_user.role, refresh_token)
+
+@router.post("/api/v1/token/refresh/", response_model=schemas.TokenPair)
+def refresh_token(request_data: schemas.TokenRefresh, db: Session = Depends(get_db)):
+    logger.info("Received token refresh request.")
+
+    try:
+        user_id, new_refresh_token = auth.rotate_refresh_token(db, request_data.refresh_token)
+        # Re-read the role so role changes take effect at the next refresh.
+        role = db.query(models.User.role).filter(models.User.id == user_id).scalar()
+        if role is None:
+            raise auth.InvalidToken("User no longer exists.")
+        db.commit()
+
+    except auth.RefreshTokenReused as e:
+        # The only rejection that keeps its writes: the user's refresh tokens stay revoked.
+        db.commit()
+        logger.warning(f"Token refresh rejected: {str(e)}")
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token.")
+
+    except auth.InvalidToken as e:
+        db.rollback()
+        logger.warning(f"Token refresh rejected: {str(e)}")
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token.")
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while refreshing token: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+    return _token_pair(user_id, role, new_refresh_token)
+
+@router.post("/api/v1/logout/", response_model=dict)
+def logout(request_data: schemas.TokenRefresh, claims: auth.Claims = Depends(auth.authenticate), db: Session = Depends(get_db)):
+    logger.info(f"User {claims.user_id} requested to log out.")
+
+    try:
+        auth.revoke_refresh_token(db, request_data.refresh_token, claims.user_id)
+        auth.revoke_access_token(db, claims)
+        auth.purge_revoked_tokens(db)
+        db.commit()
+
+    except Exception as e:
+        db.rollback()
+        logger.critical(f"Unexpected error while logging out user ID {claims.user_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+    logger.info(f"User {claims.user_id} logged out.")
+    return {"detail": "Logged out successfully."}
+
+@router.get("/api/v1/users/{user_id}", response_model=schemas.User)
+def read_user(user_id: int, db: Session = Depends(get_read_db)):
+    logger.info(f"Received request to read user with ID: {user_id}")
+
+    try:
+        db_user = services.users.get(db, user_id)
+
+        if db_user is None:
+            logger.error("User not found")
+            raise HTTPException(status_code=404, detail="User not found")
+
+        return db_user
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading user with ID {user_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+
+@router.get("/api/v1/users/", response_model=list[schemas.User])
+def read_users_list(skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
+    logger.info(f"Received request to read users with skip={skip} and limit={limit}")
+
+    try:
+        return db.query(models.User).offset(skip).limit(limit).all()
+
+    except Exception as e:
+        logger.critical(f"Unexpected error while reading users: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+
+@router.patch("/api/v1/users/{user_id}", response_model=schemas.User)
+def update_user(user_id: int, user: schemas.UserUpdate, db: Session = Depends(get_db)):
+    logger.info(f"Received request to partially update user with ID: {user_id}")
+
+    password_hash = None
+    if user.new_password is not None:
+        password_hash = _password_task(passwords.hash_password, user.new_password)
+
+    db_user = services.users.get(db, user_id)
+    if db_user is None:
+        logger.error("User not found")
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if user.phone is not None:
+        try:
+            if services.ensure_phones(db, [user.phone]):
+                logger.info(f"Phone number {user.phone} was not found, so it was added to Phone table.")
+        except IntegrityError as e:
+            db.rollback()
+            logger.error(f"Failed to insert phone number {user.phone}: {str(e)}")
+            raise HTTPException(status_code=400, detail="Failed to register phone number.")
+        db_user.phone = user.phone
+
+    try:
+        services.users.update(db, db_user, user)
+        if password_hash is not None:
+            db_user.password = password_hash
+        db.commit()
+        db.refresh(db_user)
+
+        logger.info(f"User updated successfully: ID {db_user.id}")
+
+    except Exception as e:
+        logger.error(f"Failed to update user: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to update user.")
+
+    return db_user
+
+@router.delete("/api/v1/users/{user_id}")
+def delete_user(user_id: int, db: Session = Depends(get_db)):
+    logger.info(f"Received request to delete user with ID: {user_id}")
+
+    db_user = services.users.get(db, user_id)
+
+    if db_user is None:
+        logger.error("User not found")
+        raise HTTPException(status_code=404, detail="User not found")
+
+    try:
+        # Soft delete: the account and its farms disappear, their sales history stays.
+        services.retire_user(db, user_id)
+        db.commit()
+
+        logger.info(f"User deleted successfully: ID {user_id}")
+
+    except Exception as e:
+        logger.error(f"Failed to delete user: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to delete user.")
+
+    return {"message": "User deleted successfully"}
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from enum import Enum
+from pydantic import BaseModel, Field, AliasChoices
 from pydantic.networks import EmailStr
 from datetime import datetime
 from typing import Optional
@@ -13,6 +14,19 @@ class UserCreate(UserBase):
     password: str  
     role: str = "buyer"  
 
+class UserLogin(BaseModel):
+    email: EmailStr
+    password: str
+
+class TokenPair(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
 class UserUpdate(UserBase):
     first_name: Optional[str] = None 
     last_name: Optional[str] = None 
@@ -49,7 +63,11 @@ class FarmUpdate(FarmBase):
 
 class Farm(FarmBase):
     id: int
+    farmer_id: int = Field(validation_alias=AliasChoices("farmer_id", "user_id"))
+    description: Optional[str] = None
     created_at: datetime
+    listing_count: int = 0
+    lifetime_revenue: float = 0
         
     class Config:
         from_attributes = True  
@@ -71,6 +89,12 @@ class FarmSpeciesUpdate(FarmSpeciesBase):
     price: Optional[float] = None
     available_quantity: Optional[int] = None
 
+class FarmSpeciesBulkUpdate(BaseModel):
+    id: int
+    price: Optional[float] = None
+    available_quantity: Optional[int] = None
+    quantity_delta: Optional[int] = None
+
 class FarmSpecies(FarmSpeciesBase):
     id: int
     created_at: datetime
@@ -78,8 +102,26 @@ class FarmSpecies(FarmSpeciesBase):
     class Config:
         from_attributes = True 
 
+class ListingSort(str, Enum):
+    price = "price"
+    fresh = "fresh"
+    distance = "distance"
+
+class Listing(FarmSpecies):
+    farm_name: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    distance_km: Optional[float] = None
+
+class Category(BaseModel):
+    category: str
+    description: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
 class SpeciesBase(BaseModel):
-    category_id: int
+    category_name: str
     common_name: str
     scientific_name: str
     description: str
@@ -159,6 +201,8 @@ class OrderUpdate(OrderBase):
 class Order(OrderBase):
     id: int
     created_at: datetime
+    item_count: int = 0
+    total: float = 0
 
     class Config:
         from_attributes = True 
@@ -178,7 +222,7 @@ class OrderItemUpdate(OrderItemBase):
 
 class OrderItem(OrderItemBase):
     id: int
-    created_at: datetime
+    total_price: float
 
     class Config:
         from_attributes = True 
@@ -201,7 +245,43 @@ class TransactionUpdate(TransactionBase):
 
 class Transaction(TransactionBase):
     id: int
+    transaction_date: datetime
+
+    class Config:
+        from_attributes = True
+
+class CheckoutItem(BaseModel):
+    farm_species_id: int
+    quantity: int
+
+class CheckoutCreate(BaseModel):
+    farm_id: int
+    name: str
+    description: str
+    payment_method: str
+    status: str = "pending"
+    items: list[CheckoutItem]
+
+class Checkout(BaseModel):
+    order: Order
+    items: list[OrderItem]
+    transaction: Transaction
+
+class GraphQuery(BaseModel):
+    # Nested relation names, e.g. {"farms": {"farm_species": {"sub_species": {}}}}.
+    include: dict[str, dict] = {}
+
+class PurgeJob(BaseModel):
+    id: int
+    resource: str
+    resource_id: int
+    status: str
+    total: int
+    purged: int
+    progress: float
+    last_error: Optional[str] = None
     created_at: datetime
+    finished_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
@@ -0,0 +1,72 @@
+import argparse
+import importlib.util
+import logging
+import os
+import uvicorn
+from .core import config
+
+logger = logging.getLogger(__name__)
+
+# Each worker is a separate process with its own connection pool, catalog snapshot,
+# revocation list and event hub; nothing is shared in memory. uvicorn spawns them
+# fresh rather than forking, so no pooled connection crosses a process boundary.
+
+def worker_count(workers=None):
+    return workers or config.SERVER_WORKERS or os.cpu_count() or 1
+
+def _installed(module):
+    return importlib.util.find_spec(module) is not None
+
+def event_loop():
+    return "uvloop" if _installed("uvloop") else "asyncio"
+
+def http_protocol():
+    return "httptools" if _installed("httptools") else "h11"
+
+def prepare_database():
+    # Tables and partitions are created here, once, so workers starting together do not
+    # race each other's DDL.
+    from .database import engine
+    from . import models, partitions
+    models.Base.metadata.create_all(bind=engine)
+    partitions.ensure_partitions(engine)
+    engine.dispose()
+
+def _check_shared_state(workers):
+    if workers == 1:
+        return
+    from . import events
+    if config.RATE_LIMIT_ENABLED and not config.RATE_LIMIT_REDIS_URL:
+        logger.warning(f"Rate limits are kept per worker; with {workers} workers a client gets up to {workers}x its limit. Set RATE_LIMIT_REDIS_URL to share them.")
+    if config.EVENTS_ENABLED and not events._use_notify():
+        logger.warning("Events use the in-process bus; stream clients only see writes handled by their own worker.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API under uvicorn with one worker process per core.")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: SERVER_WORKERS, else CPU cores).")
+    args = parser.parse_args()
+
+    workers = worker_count(args.workers)
+    loop = event_loop()
+    http = http_protocol()
+    if loop == "asyncio" or http == "h11":
+        logger.warning(f"Serving with the {loop} event loop and {http} parser; install uvloop and httptools for faster ones.")
+    _check_shared_state(workers)
+    prepare_database()
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=config.SERVER_BACKLOG,
+        timeout_keep_alive=config.SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=config.SERVER_GRACEFUL_TIMEOUT,
+    )
+
+if __name__ == "__main__":
+    main()
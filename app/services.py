@@ -0,0 +1,501 @@
+import json
+import math
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert, update, delete, select, values, column, cast, exists, func, bindparam, Integer
+from sqlalchemy.dialects import postgresql, sqlite
+from .core import config
+from . import models, schemas, outbox, catalog, events, counters
+
+# Query logic shared by the route modules, benchmarks and jobs. Nothing here knows
+# about HTTP: functions take a Session, flush rather than commit, and report failures
+# with the exceptions below so each caller decides on the transaction and the response.
+
+class ServiceError(Exception):
+    pass
+
+class NotFound(ServiceError):
+    pass
+
+class Conflict(ServiceError):
+    pass
+
+class InvalidRequest(ServiceError):
+    pass
+
+class Repository:
+    def __init__(self, model, updatable=()):
+        self.model = model
+        self.table = model.__table__
+        self.key = self.table.primary_key.columns.values()[0]
+        self.key_attribute = getattr(model, self.key.key)
+        self.updatable = updatable
+
+    def query(self, db, **filters):
+        return db.query(self.model).filter_by(**filters)
+
+    def get(self, db, key, **filters):
+        return self.query(db, **filters).filter(self.key_attribute == key).first()
+
+    def get_many(self, db, keys, **filters):
+        # One IN query however many keys; the result is keyed for O(1) lookups by the caller.
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        rows = self.query(db, **filters).filter(self.key_attribute.in_(keys)).all()
+        return {getattr(row, self.key.key): row for row in rows}
+
+    def list(self, db, *criteria, order_by=None, skip=0, limit=None):
+        query = db.query(self.model).filter(*criteria)
+        query = query.order_by(*(order_by if order_by is not None else (self.key_attribute,)))
+        if skip:
+            query = query.offset(skip)
+        if limit is not None:
+            query = query.limit(min(limit, config.LIST_MAX_LIMIT))
+        return query.all()
+
+    def create(self, db, **fields):
+        instance = self.model(**fields)
+        db.add(instance)
+        db.flush()
+        return instance
+
+    def create_many(self, db, rows):
+        # A single INSERT ... RETURNING (executemany on backends without it) instead of one flush per row.
+        if not rows:
+            return []
+        return db.scalars(insert(self.model).returning(self.model), rows).all()
+
+    def update(self, db, instance, changes):
+        # Only the repository's updatable fields are copied, and None means "leave unchanged",
+        # so partial-update schemas can be passed straight through.
+        for field in self.updatable:
+            value = changes.get(field) if isinstance(changes, dict) else getattr(changes, field, None)
+            if value is not None:
+                setattr(instance, field, value)
+        db.flush()
+        return instance
+
+    def update_many(self, db, rows):
+        # ORM bulk UPDATE by primary key: each dict carries the key plus the columns to set,
+        # and rows with the same columns are sent as one executemany.
+        if rows:
+            db.execute(update(self.model), rows)
+
+    def delete(self, db, instance):
+        db.delete(instance)
+        db.flush()
+
+    def delete_where(self, db, *criteria):
+        # A single DELETE ... WHERE: children go with the database's ON DELETE CASCADE
+        # instead of being loaded into the session first. Soft-deleted rows are left to
+        # their purge job. Returns the number of rows deleted.
+        if hasattr(self.model, "deleted_at"):
+            criteria += (self.model.deleted_at.is_(None),)
+        statement = delete(self.model).where(*criteria).execution_options(synchronize_session=False)
+        return db.execute(statement).rowcount
+
+    def soft_delete_where(self, db, *criteria):
+        # Marks live rows deleted in one UPDATE; reads stop seeing them at once and the
+        # purge sweep removes them after PURGE_RETENTION_DAYS.
+        statement = (
+            update(self.model)
+            .where(*criteria, self.model.deleted_at.is_(None))
+            .values(deleted_at=datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+        return db.execute(statement).rowcount
+
+users = Repository(models.User, ("first_name", "last_name", "email", "role"))
+phones = Repository(models.Phone)
+farms = Repository(models.Farm, ("type", "name", "description", "latitude", "longitude"))
+farm_species = Repository(models.Farm_species, ("name", "description", "price", "available_quantity"))
+categories = Repository(models.Category)
+species = Repository(models.Species, (
+    "common_name", "scientific_name", "description", "genus", "family",
+    "optimal_temperature_min", "optimal_temperature_max", "optimal_humidity", "optimal_ph",
+    "water_requirement_per_litre", "nutritient_requirement_per_kg", "lifespan", "native_region",
+))
+sub_species = Repository(models.Sub_species, ("name", "common_name", "description", "growth_rate", "unique_traits"))
+orders = Repository(models.Order, ("name", "description"))
+order_items = Repository(models.Order_item, ("quantity", "price"))
+transactions = Repository(models.Transaction, ("total_amount", "status", "payment_method"))
+
+def retire_farms(db, *criteria):
+    # Soft deletes farms with their listings. Orders, items and transactions stay as
+    # they are, so sales history survives the farm.
+    live_farm_ids = select(models.Farm.id).where(*criteria, models.Farm.deleted_at.is_(None))
+    farm_species.soft_delete_where(db, models.Farm_species.farm_id.in_(live_farm_ids))
+    return farms.soft_delete_where(db, *criteria)
+
+def live_listings(query):
+    # A background purge hides only the farm or species it deletes, so listings stay live
+    # only while both parents are; the joined rows get the same deleted_at criteria.
+    return (
+        query
+        .join(models.Farm, models.Farm.id == models.Farm_species.farm_id)
+        .join(models.Sub_species, models.Sub_species.id == models.Farm_species.sub_species_id)
+        .join(models.Species, models.Species.id == models.Sub_species.species_id)
+    )
+
+def retire_user(db, user_id):
+    if not users.soft_delete_where(db, models.User.id == user_id):
+        return False
+    retire_farms(db, models.Farm.user_id == user_id)
+    db.query(models.Refresh_token).filter(models.Refresh_token.user_id == user_id).delete(synchronize_session=False)
+    return True
+
+def ensure_phones(db, numbers):
+    # One INSERT ... ON CONFLICT DO NOTHING in the caller's transaction: concurrent signups
+    # with the same number both go through instead of racing a SELECT into a unique
+    # violation. Returns the numbers that were actually added.
+    numbers = list(dict.fromkeys(numbers))
+    if not numbers:
+        return []
+    dialect = db.get_bind().dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        existing = phones.get_many(db, numbers)
+        missing = [number for number in numbers if number not in existing]
+        if missing:
+            phones.create_many(db, [{"phone": number} for number in missing])
+        return missing
+    upsert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    statement = (
+        upsert(models.Phone)
+        .values([{"phone": number} for number in numbers])
+        .on_conflict_do_nothing(index_elements=[models.Phone.phone])
+        .returning(models.Phone.phone)
+    )
+    return list(db.execute(statement).scalars())
+
+def publish_stock(db, listings):
+    # Subscribers get the new stock in the event itself, so nobody re-reads the listing.
+    for listing in listings:
+        events.publish(db, "stock", {
+            "farm_species_id": listing.id,
+            "farm_id": listing.farm_id,
+            "price": float(listing.price),
+            "available_quantity": listing.available_quantity,
+        }, [events.farm_topic(listing.farm_id)], key=f"stock:{listing.id}")
+
+def publish_order(db, order, buyer_id=None):
+    topics = [events.user_topic(order.farmer_id)]
+    if buyer_id is not None:
+        topics.append(events.user_topic(buyer_id))
+    events.publish(db, "order", {
+        "order_id": order.id,
+        "farmer_id": order.farmer_id,
+        "name": order.name,
+    }, topics)
+
+def publish_transaction(db, transaction, farm_id, farmer_id):
+    events.publish(db, "transaction", {
+        "transaction_id": transaction.id,
+        "order_id": transaction.order_id,
+        "farm_id": farm_id,
+        "buyer_id": transaction.buyer_id,
+        "total_amount": float(transaction.total_amount),
+        "status": transaction.status,
+    }, [events.user_topic(transaction.buyer_id), events.user_topic(farmer_id)])
+
+def filter_farms(query, farm_type, created_from, created_to, skip, limit):
+    if farm_type is not None:
+        query = query.filter(models.Farm.type == farm_type)
+    if created_from is not None:
+        query = query.filter(models.Farm.created_at >= created_from)
+    if created_to is not None:
+        query = query.filter(models.Farm.created_at < created_to)
+    return query.order_by(models.Farm.id).offset(skip).limit(min(limit, config.LIST_MAX_LIMIT))
+
+EARTH_RADIUS_KM = 6371.0
+
+def haversine_km(latitude1, longitude1, latitude2, longitude2):
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(longitude2 - longitude1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def search_listings(
+    db, sub_species_id=None, min_price=None, max_price=None, in_stock=True,
+    latitude=None, longitude=None, radius_km=None, sort=schemas.ListingSort.price, skip=0, limit=100
+):
+    has_origin = latitude is not None and longitude is not None
+    if (radius_km is not None or sort == schemas.ListingSort.distance) and not has_origin:
+        raise InvalidRequest("latitude and longitude are required for distance search.")
+
+    query = live_listings(
+        db.query(models.Farm_species, models.Farm.name, models.Farm.latitude, models.Farm.longitude)
+    )
+    if sub_species_id is not None:
+        query = query.filter(models.Farm_species.sub_species_id == sub_species_id)
+    if min_price is not None:
+        query = query.filter(models.Farm_species.price >= min_price)
+    if max_price is not None:
+        query = query.filter(models.Farm_species.price <= max_price)
+    if in_stock:
+        # With the deleted_at filter every query gets, this matches the partial indexes' predicate.
+        query = query.filter(models.Farm_species.available_quantity > 0)
+
+    if has_origin:
+        # Equirectangular distance around the buyer: plain arithmetic that every backend
+        # can evaluate, and within a fraction of a percent of haversine at these radii.
+        km_per_latitude = math.pi * EARTH_RADIUS_KM / 180
+        km_per_longitude = max(km_per_latitude * math.cos(math.radians(latitude)), 1e-6)
+        d_north = (models.Farm.latitude - latitude) * km_per_latitude
+        d_east = (models.Farm.longitude - longitude) * km_per_longitude
+        squared_distance = d_north * d_north + d_east * d_east
+        query = query.filter(models.Farm.latitude.isnot(None), models.Farm.longitude.isnot(None))
+
+        if radius_km is not None:
+            # The bounding box lets ix_farm_latitude_longitude narrow the scan before the exact check.
+            latitude_delta = radius_km / km_per_latitude
+            longitude_delta = radius_km / km_per_longitude
+            query = query.filter(
+                models.Farm.latitude.between(latitude - latitude_delta, latitude + latitude_delta),
+                models.Farm.longitude.between(longitude - longitude_delta, longitude + longitude_delta),
+                squared_distance <= radius_km * radius_km
+            )
+
+    if sort == schemas.ListingSort.price:
+        query = query.order_by(models.Farm_species.price, models.Farm_species.id)
+    elif sort == schemas.ListingSort.fresh:
+        query = query.order_by(models.Farm_species.created_at.desc(), models.Farm_species.id.desc())
+    else:
+        query = query.order_by(squared_distance, models.Farm_species.id)
+
+    rows = query.offset(skip).limit(min(limit, config.LIST_MAX_LIMIT)).all()
+
+    listings = []
+    for listing, farm_name, farm_latitude, farm_longitude in rows:
+        distance_km = None
+        if has_origin and farm_latitude is not None and farm_longitude is not None:
+            distance_km = round(haversine_km(latitude, longitude, float(farm_latitude), float(farm_longitude)), 3)
+        listings.append(schemas.Listing(
+            **schemas.FarmSpecies.model_validate(listing).model_dump(),
+            farm_name=farm_name,
+            latitude=farm_latitude,
+            longitude=farm_longitude,
+            distance_km=distance_km
+        ))
+    return listings
+
+def bulk_update_farm_species(db, user_id, farm_id, changes):
+    ids = [change.id for change in changes]
+    if len(set(ids)) != len(ids):
+        raise InvalidRequest("Each farm species may only appear once.")
+    if any(change.available_quantity is not None and change.quantity_delta is not None for change in changes):
+        raise InvalidRequest("Use either available_quantity or quantity_delta, not both.")
+    if not changes:
+        return []
+
+    table = models.Farm_species.__table__
+    owned = exists().where(models.Farm.id == farm_id, models.Farm.user_id == user_id, models.Farm.deleted_at.is_(None))
+
+    if db.get_bind().dialect.name == "postgresql":
+        rows = values(
+            column("id", Integer),
+            column("price", table.c.price.type),
+            column("available_quantity", Integer),
+            column("quantity_delta", Integer),
+            name="changes"
+        ).data([(change.id, change.price, change.available_quantity, change.quantity_delta) for change in changes])
+        # Columns that are NULL in every row would otherwise be typed as text.
+        price = cast(rows.c.price, table.c.price.type)
+        available_quantity = cast(rows.c.available_quantity, Integer)
+        quantity_delta = cast(rows.c.quantity_delta, Integer)
+        row_id = rows.c.id
+    else:
+        price = bindparam("b_price", type_=table.c.price.type)
+        available_quantity = bindparam("b_available_quantity", type_=Integer)
+        quantity_delta = bindparam("b_quantity_delta", type_=Integer)
+        row_id = bindparam("b_id", type_=Integer)
+
+    new_quantity = func.coalesce(available_quantity, table.c.available_quantity + func.coalesce(quantity_delta, 0))
+    statement = (
+        update(table)
+        .where(table.c.id == row_id, table.c.farm_id == farm_id, table.c.deleted_at.is_(None), owned, new_quantity >= 0)
+        .values(price=func.coalesce(price, table.c.price), available_quantity=new_quantity)
+    )
+
+    if db.get_bind().dialect.name == "postgresql":
+        updated = db.execute(statement.returning(*table.c)).mappings().all()
+    else:
+        # No UPDATE ... FROM (VALUES ...) with named columns elsewhere; one executemany round trip instead.
+        params = [
+            {"b_id": change.id, "b_price": change.price, "b_available_quantity": change.available_quantity, "b_quantity_delta": change.quantity_delta}
+            for change in changes
+        ]
+        updated = []
+        if db.execute(statement, params).rowcount == len(changes):
+            updated = db.execute(table.select().where(table.c.id.in_(ids))).mappings().all()
+
+    # All or nothing: any unmatched row means a foreign ID, another farm or a negative stock.
+    if len(updated) != len(changes):
+        raise Conflict(f"{len(changes) - len(updated)} farm species unmatched.")
+    result = sorted((schemas.FarmSpecies.model_validate(dict(row)) for row in updated), key=lambda row: row.id)
+    publish_stock(db, result)
+    return result
+
+def commit_catalog(db):
+    # Every catalog write bumps the shared version so other processes drop their snapshots too.
+    catalog.bump_version(db)
+    db.commit()
+    catalog.invalidate()
+
+def farm_species_ids(db, user_id, farm_id, skip=0, limit=100):
+    listed_species_ids = (
+        db.query(models.Sub_species.species_id)
+        .join(models.Farm_species, models.Farm_species.sub_species_id == models.Sub_species.id)
+        .join(models.Farm, models.Farm.id == models.Farm_species.farm_id)
+        .filter(models.Farm.id == farm_id, models.Farm.user_id == user_id)
+    )
+    return [
+        species_id for (species_id,) in
+        db.query(models.Species.id)
+        .filter(models.Species.id.in_(listed_species_ids))
+        .order_by(models.Species.id)
+        .offset(skip)
+        .limit(min(limit, config.LIST_MAX_LIMIT))
+    ]
+
+def _paid_order_ids(db, user_id):
+    # Orders carry no buyer column; a buyer's orders are the ones they paid for.
+    return db.query(models.Transaction.order_id).filter(models.Transaction.buyer_id == user_id)
+
+def is_order_party(db, order, user_id):
+    if order.farmer_id == user_id:
+        return True
+    return db.query(_paid_order_ids(db, user_id).filter(models.Transaction.order_id == order.id).exists()).scalar()
+
+def list_orders(db, user_id, role, created_from=None, created_to=None, skip=0, limit=100):
+    criteria = []
+    if role == models.UserRole.farmer:
+        criteria.append(models.Order.farmer_id == user_id)
+    else:
+        criteria.append(models.Order.id.in_(_paid_order_ids(db, user_id)))
+    if created_from is not None:
+        criteria.append(models.Order.created_at >= created_from)
+    if created_to is not None:
+        criteria.append(models.Order.created_at < created_to)
+    return orders.list(db, *criteria, skip=skip, limit=limit)
+
+def checkout(db, user_id, checkout_data):
+    if not checkout_data.items:
+        raise InvalidRequest("Checkout requires at least one item.")
+
+    quantities = {}
+    for item in checkout_data.items:
+        if item.quantity <= 0:
+            raise InvalidRequest("Item quantities must be positive.")
+        quantities[item.farm_species_id] = quantities.get(item.farm_species_id, 0) + item.quantity
+
+    farmer_id = db.query(models.Farm.user_id).filter(models.Farm.id == checkout_data.farm_id).scalar()
+    if farmer_id is None:
+        raise NotFound("Farm not found.")
+
+    # Locking in id order keeps concurrent checkouts over overlapping listings from deadlocking.
+    listings = farm_species.query(db, farm_id=checkout_data.farm_id).filter(
+        models.Farm_species.id.in_(quantities)
+    ).order_by(models.Farm_species.id).with_for_update().all()
+
+    if len(listings) != len(quantities):
+        missing = set(quantities) - {listing.id for listing in listings}
+        raise NotFound(f"Farm species {sorted(missing)} not found.")
+
+    for listing in listings:
+        if listing.available_quantity < quantities[listing.id]:
+            raise Conflict(f"Insufficient stock for farm species {listing.id}.")
+
+    total = sum(listing.price * quantities[listing.id] for listing in listings)
+    # The order's counters are known up front, so they are written with the insert.
+    new_order = orders.create(
+        db,
+        farmer_id=farmer_id,
+        name=checkout_data.name,
+        description=checkout_data.description,
+        item_count=len(listings),
+        total=total
+    )
+
+    for listing in listings:
+        listing.available_quantity -= quantities[listing.id]
+
+    new_order_items = order_items.create_many(db, [
+        {
+            "order_id": new_order.id,
+            "farm_species_id": listing.id,
+            "quantity": quantities[listing.id],
+            "price": listing.price,
+            "total_price": listing.price * quantities[listing.id],
+        }
+        for listing in listings
+    ])
+
+    new_transaction = transactions.create(
+        db,
+        buyer_id=user_id,
+        farm_id=checkout_data.farm_id,
+        order_id=new_order.id,
+        total_amount=total,
+        status=checkout_data.status,
+        payment_method=checkout_data.payment_method
+    )
+    counters.adjust_farm(db, checkout_data.farm_id, revenue=total)
+
+    publish_stock(db, listings)
+    publish_order(db, new_order, user_id)
+    publish_transaction(db, new_transaction, checkout_data.farm_id, farmer_id)
+
+    outbox.enqueue(db, "order.created", {
+        "order_id": new_order.id,
+        "farmer_id": farmer_id,
+        "user_id": user_id,
+    })
+    outbox.enqueue(db, "transaction.created", {
+        "transaction_id": new_transaction.id,
+        "order_id": new_order.id,
+        "farm_id": checkout_data.farm_id,
+        "buyer_id": user_id,
+        "total_amount": float(new_transaction.total_amount),
+    })
+
+    # Built before the caller commits so the expired instances are not reloaded one by one.
+    return schemas.Checkout(
+        order=schemas.Order.model_validate(new_order),
+        items=[schemas.OrderItem.model_validate(item) for item in new_order_items],
+        transaction=schemas.Transaction.model_validate(new_transaction)
+    )
+
+def retention_start():
+    # Bounding transaction_date lets Postgres prune partitions; anything older than the
+    # retention window has been archived and is served by the archive endpoint.
+    return datetime.now(timezone.utc) - timedelta(days=31 * config.PARTITION_RETENTION_MONTHS)
+
+def list_transactions(db, *criteria, status=None, date_from=None, date_to=None, order_by=None, skip=0, limit=100):
+    criteria = list(criteria)
+    criteria.append(models.Transaction.transaction_date >= (date_from if date_from is not None else retention_start()))
+    if date_to is not None:
+        criteria.append(models.Transaction.transaction_date < date_to)
+    if status is not None:
+        criteria.append(models.Transaction.status == status)
+    return transactions.list(db, *criteria, order_by=order_by, skip=skip, limit=limit)
+
+def _export_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return float(value)
+
+def export_transactions(db, buyer_id, date_from=None, date_to=None):
+    table = models.Transaction.__table__
+    query = (
+        table.select()
+        .where(table.c.buyer_id == buyer_id, table.c.transaction_date >= (date_from if date_from is not None else retention_start()))
+        .order_by(table.c.transaction_date, table.c.id)
+    )
+    if date_to is not None:
+        query = query.where(table.c.transaction_date < date_to)
+
+    # Server-side cursor, one NDJSON chunk per batch: memory stays flat however many rows match.
+    result = db.connection().execution_options(stream_results=True).execute(query)
+    for batch in result.mappings().partitions(config.EXPORT_CHUNK_ROWS):
+        yield "".join(json.dumps(dict(row), default=_export_default) + "\n" for row in batch).encode()
@@ -0,0 +1,75 @@
+import argparse
+import json
+import random
+import time
+from app import encoding
+
+def make_payload(rows, seed_value=42):
+    # Shaped like a species/listing page: repeated keys, short strings, mixed numbers.
+    rng = random.Random(seed_value)
+    return [
+        {
+            "id": i,
+            "farm_id": rng.randint(1, 100000),
+            "sub_species_id": rng.randint(1, 2000),
+            "name": f"Listing {i}",
+            "description": rng.choice(("Benchmark listing", "Organic, picked this week", None)),
+            "price": round(rng.uniform(5, 500), 2),
+            "available_quantity": rng.randint(0, 1000),
+            "created_at": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T10:00:00Z",
+        }
+        for i in range(1, rows + 1)
+    ]
+
+def _cpu_us(function, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        result = function()
+    return (time.process_time() - start) / repeat * 1e6, result
+
+def run(sizes, repeat):
+    formats = {"json": lambda payload: json.dumps(payload).encode()}
+    if encoding.msgpack is not None:
+        formats["msgpack"] = lambda payload: encoding.msgpack.packb(payload)
+
+    results = []
+    for rows in sizes:
+        payload = make_payload(rows)
+        for format_name, serialize in formats.items():
+            serialize_us, body = _cpu_us(lambda: serialize(payload), repeat)
+            results.append({"rows": rows, "format": format_name, "encoding": "identity", "bytes": len(body), "ratio": 1.0, "cpu_us": round(serialize_us, 1)})
+            for name, encoder_class in encoding.available_encoders().items():
+                def compress():
+                    encoder = encoder_class()
+                    return encoder.compress(body) + encoder.finish()
+                compress_us, compressed = _cpu_us(compress, repeat)
+                results.append({
+                    "rows": rows,
+                    "format": format_name,
+                    "encoding": name,
+                    "bytes": len(compressed),
+                    "ratio": round(len(body) / len(compressed), 2),
+                    "cpu_us": round(serialize_us + compress_us, 1),
+                })
+    return results
+
+def print_report(results):
+    print(f"{'rows':>7}  {'format':<8}{'encoding':<10}{'bytes':>10}{'ratio':>8}{'cpu us':>12}")
+    for row in results:
+        print(f"{row['rows']:>7}  {row['format']:<8}{row['encoding']:<10}{row['bytes']:>10}{row['ratio']:>8}{row['cpu_us']:>12}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare response bytes and CPU cost per encoding and wire format.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000], help="Rows per response.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import argparse
+import asyncio
+import json
+import time
+from app import events
+
+def _stock_event(farm_id, farm_species_id, quantity):
+    return {
+        "type": "stock",
+        "key": f"stock:{farm_species_id}",
+        "topics": [events.farm_topic(farm_id)],
+        "data": {"farm_species_id": farm_species_id, "farm_id": farm_id, "price": 10.0, "available_quantity": quantity},
+    }
+
+async def _run_case(subscribers, farms, updates, listings):
+    hub = events.EventHub(max_pending=updates + 1)
+    hub.attach(asyncio.get_running_loop())
+    subs = [hub.subscribe([events.farm_topic(i % farms)]) for i in range(subscribers)]
+    batch = [_stock_event(i % farms, i % listings, i) for i in range(updates)]
+
+    start = time.perf_counter()
+    hub.publish_nowait(batch)
+    frames = sum(len(sub.drain()) for sub in subs)
+    elapsed = time.perf_counter() - start
+
+    for sub in subs:
+        hub.unsubscribe(sub)
+    return {
+        "subscribers": subscribers,
+        "updates": updates,
+        "frames_delivered": frames,
+        "total_ms": round(elapsed * 1000, 2),
+        "us_per_frame": round(elapsed / max(frames, 1) * 1e6, 3),
+    }
+
+async def run(subscribers, farms, updates, listings):
+    return [await _run_case(count, farms, updates, listings) for count in subscribers]
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure event hub fan-out to many stream subscribers.")
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--farms", type=int, default=10)
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--listings", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.subscribers, args.farms, args.updates, args.listings)), indent=2))
+
+if __name__ == "__main__":
+    main()
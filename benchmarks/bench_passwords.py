@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import threading
+import time
+from app import passwords
+from app.core import config
+
+def _drive(operation, callers, duration):
+    counts = [0] * callers
+    deadline = time.perf_counter() + duration
+
+    def caller(index):
+        while time.perf_counter() < deadline:
+            operation()
+            counts[index] += 1
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(callers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts), time.perf_counter() - start
+
+def run(log_n_values, worker_counts, duration):
+    results = []
+    for log_n in log_n_values:
+        for workers in worker_counts:
+            hasher = passwords.PasswordHasher(log_n, config.PASSWORD_SCRYPT_R, config.PASSWORD_SCRYPT_P, workers, max_pending=workers * 4)
+            stored = hasher.hash("benchmark-password")
+            # Twice as many callers as workers keeps the pool saturated, like a busy request thread pool.
+            callers = workers * 2
+            for name, operation in (
+                ("signup", lambda: hasher.hash("benchmark-password")),
+                ("login", lambda: hasher.verify("benchmark-password", stored)),
+            ):
+                count, elapsed = _drive(operation, callers, duration)
+                throughput = count / elapsed
+                results.append({
+                    "operation": name,
+                    "log_n": log_n,
+                    "workers": workers,
+                    "ops": count,
+                    "throughput": round(throughput, 1),
+                    "per_core": round(throughput / workers, 1),
+                    "latency_ms": round(1000 * elapsed * callers / max(count, 1), 1),
+                })
+            hasher.shutdown()
+    return results
+
+def print_report(results):
+    print(f"{'operation':<10}{'log_n':>6}{'workers':>9}{'ops':>8}{'ops/s':>10}{'ops/s/core':>12}{'latency ms':>12}")
+    for row in results:
+        print(
+            f"{row['operation']:<10}{row['log_n']:>6}{row['workers']:>9}{row['ops']:>8}"
+            f"{row['throughput']:>10}{row['per_core']:>12}{row['latency_ms']:>12}"
+        )
+
+def main():
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, max(1, cores // 2), cores})
+    parser = argparse.ArgumentParser(description="Measure password hashing throughput for signup and login.")
+    parser.add_argument("--log-n", type=int, nargs="+", default=[config.PASSWORD_SCRYPT_LOG_N], help="scrypt cost exponents to compare.")
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers, help="Hashing pool sizes to compare.")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per measurement.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    results = run(args.log_n, args.workers, args.duration)
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
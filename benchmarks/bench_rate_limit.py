@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+import json
+import time
+from app import auth, models, rate_limit
+
+def _scope(path, headers=()):
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "headers": list(headers),
+        "client": ("203.0.113.7", 50000),
+    }
+
+async def _noop_app(scope, receive, send):
+    pass
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+async def _send(message):
+    pass
+
+async def _time_calls(call, scope, iterations):
+    for _ in range(min(iterations, 1000)):
+        await call(scope, _receive, _send)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await call(scope, _receive, _send)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+async def run(iterations):
+    # Limits high enough that nothing is rejected: this measures the bookkeeping only.
+    rules = [
+        rate_limit.Rule("list", "GET", r"^/api/v1/users/farms/$", 1e9, 10 ** 9),
+        rate_limit.Rule("default", None, r"^/api/", 1e9, 10 ** 9),
+    ]
+    middleware = rate_limit.RateLimitMiddleware(_noop_app, rate_limit.RateLimiter(rules=rules))
+    token = auth.create_access_token(1, models.UserRole.farmer)
+    cases = {
+        "anonymous": _scope("/api/v1/users/farms/"),
+        "bearer_token": _scope("/api/v1/users/1/farms/", [(b"authorization", f"Bearer {token}".encode())]),
+        "unlimited_path": _scope("/metrics"),
+    }
+
+    baseline = await _time_calls(_noop_app, cases["anonymous"], iterations)
+    results = {"baseline_us": round(baseline, 3), "overhead_us": {}}
+    for name, scope in cases.items():
+        results["overhead_us"][name] = round(await _time_calls(middleware, scope, iterations) - baseline, 3)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the per-request overhead of the rate limiting middleware.")
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.iterations)), indent=2))
+
+if __name__ == "__main__":
+    main()
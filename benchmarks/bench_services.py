@@ -0,0 +1,73 @@
+import argparse
+import json
+import time
+import uuid
+from app.database import SessionLocal
+from app import services
+
+def _timed(function):
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000
+
+def _round(rows, db):
+    # Phone rows have a natural key and no foreign keys, so scratch rows need no fixtures.
+    prefix = uuid.uuid4().hex[:8]
+    numbers = [f"bench-{prefix}-{i}" for i in range(rows)]
+    results = {}
+
+    results[("create", "per_row")] = _timed(lambda: [services.phones.create(db, phone=number) for number in numbers[: rows // 2]])
+    results[("create", "batched")] = _timed(lambda: services.phones.create_many(db, [{"phone": number} for number in numbers[rows // 2:]]))
+    db.expunge_all()
+
+    results[("get", "per_row")] = _timed(lambda: [services.phones.get(db, number) for number in numbers])
+    db.expunge_all()
+    results[("get", "batched")] = _timed(lambda: services.phones.get_many(db, numbers))
+    db.expunge_all()
+
+    def update_per_row():
+        for number in numbers:
+            services.phones.update_many(db, [{"phone": number, "dnd": True}])
+    results[("update", "per_row")] = _timed(update_per_row)
+    results[("update", "batched")] = _timed(lambda: services.phones.update_many(db, [{"phone": number, "dnd": False} for number in numbers]))
+    return results
+
+def run(sizes, repeat):
+    results = []
+    for rows in sizes:
+        totals = {}
+        for _ in range(repeat):
+            db = SessionLocal()
+            try:
+                for key, elapsed in _round(rows, db).items():
+                    totals[key] = totals.get(key, 0.0) + elapsed
+            finally:
+                # Nothing is committed: every round leaves the database as it found it.
+                db.rollback()
+                db.close()
+        for (operation, mode), elapsed in totals.items():
+            # create splits the rows between the two modes, so scale it back to a full batch.
+            scale = 2 if operation == "create" else 1
+            results.append({"rows": rows, "operation": operation, "mode": mode, "ms": round(elapsed * scale / repeat, 2)})
+    return results
+
+def print_report(results):
+    print(f"{'rows':>7}  {'operation':<10}{'mode':<10}{'ms':>10}")
+    for row in results:
+        print(f"{row['rows']:>7}  {row['operation']:<10}{row['mode']:<10}{row['ms']:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-row and batched repository operations without HTTP.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Rows per operation.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
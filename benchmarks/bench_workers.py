@@ -0,0 +1,164 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from collections import defaultdict
+import httpx
+from app.database import SessionLocal
+from app import models, auth, server
+from benchmarks.load import percentile
+
+def _targets(sample):
+    # Buyers and in-stock listings sampled up front, so the timed loop only does HTTP.
+    db = SessionLocal()
+    try:
+        buyers = [
+            user_id for (user_id,) in db.query(models.User.id)
+            .filter(models.User.role == models.UserRole.buyer)
+            .limit(sample)
+        ]
+        listings = db.query(models.Farm_species.farm_id, models.Farm_species.id).filter(
+            models.Farm_species.available_quantity > 0
+        ).limit(sample).all()
+        return buyers, [tuple(listing) for listing in listings]
+    finally:
+        db.close()
+
+def listing_search(rng, buyers, listings, tokens):
+    return "GET", f"/api/v1/listings/?skip={rng.randint(0, 1000)}&limit=50", None, None
+
+def checkout(rng, buyers, listings, tokens):
+    buyer_id = rng.choice(buyers)
+    farm_id, farm_species_id = rng.choice(listings)
+    token = tokens.get(buyer_id)
+    if token is None:
+        token = tokens[buyer_id] = auth.create_access_token(buyer_id, models.UserRole.buyer)
+    return "POST", f"/api/v1/users/{buyer_id}/checkout/", {
+        "farm_id": farm_id,
+        "name": "Benchmark checkout",
+        "description": "worker benchmark",
+        "payment_method": "card",
+        "status": "paid",
+        "items": [{"farm_species_id": farm_species_id, "quantity": 1}],
+    }, {"Authorization": f"Bearer {token}"}
+
+SCENARIOS = {
+    "listing_search": listing_search,
+    "checkout": checkout,
+}
+
+def _start_server(workers, port):
+    env = dict(os.environ, RATE_LIMIT_ENABLED="false", SERVER_WORKERS=str(workers))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1.0).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"Server with {workers} workers did not start on port {port}.")
+
+def _stop_server(process):
+    # SIGTERM, as a deployment would send: workers drain in-flight requests first.
+    start = time.perf_counter()
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    return time.perf_counter() - start
+
+async def _drive(url, scenario, buyers, listings, concurrency, duration, seed_value):
+    latencies = []
+    errors = defaultdict(int)
+    tokens = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(client, worker_id):
+        rng = random.Random(seed_value + worker_id)
+        while time.perf_counter() < deadline:
+            method, path, body, headers = SCENARIOS[scenario](rng, buyers, listings, tokens)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body, headers=headers)
+                if response.status_code >= 400:
+                    errors[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=30.0, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client, i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": dict(errors),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+def run(worker_counts, scenarios, concurrency, duration, port, seed_value):
+    buyers, listings = _targets(1000)
+    if "checkout" in scenarios and not (buyers and listings):
+        raise SystemExit("Checkout needs buyers and in-stock listings; seed the database first.")
+
+    results = []
+    for workers in worker_counts:
+        process = _start_server(workers, port)
+        reports = []
+        try:
+            url = f"http://127.0.0.1:{port}"
+            for scenario in scenarios:
+                report = asyncio.run(_drive(url, scenario, buyers, listings, concurrency, duration, seed_value))
+                reports.append({"workers": workers, "scenario": scenario, **report})
+        finally:
+            shutdown_s = round(_stop_server(process), 2)
+        results.extend({**report, "shutdown_s": shutdown_s} for report in reports)
+    return {
+        "event_loop": server.event_loop(),
+        "http_protocol": server.http_protocol(),
+        "concurrency": concurrency,
+        "duration_s": duration,
+        "results": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare throughput of the launcher with one and with many worker processes.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, server.worker_count()])
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Limit to these scenarios (repeatable).")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per scenario and worker count.")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report to this file as well as stdout.")
+    args = parser.parse_args()
+
+    report = run(args.workers, args.scenario or list(SCENARIOS), args.concurrency, args.duration, args.port, args.seed)
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+if __name__ == "__main__":
+    main()
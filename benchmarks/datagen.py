@@ -0,0 +1,387 @@
+import argparse
+import io
+import os
+import time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from sqlalchemy import text
+from app.database import engine
+from app import models, partitions, passwords
+from benchmarks.seed import FARMER_SHARE, PAYMENT_METHODS, STATUSES, _reset_sequences, volumes_for
+
+# Vectorized counterpart of benchmarks/seed.py for large scales. Keys are planned up
+# front as NumPy arrays, so references are consistent the way the API would leave
+# them: an order's items come from one farm's listings, the order belongs to that
+# farm's owner, its transactions carry its total, and the order and farm counters
+# match what app/counters.py would derive. Rows are then written chunk by chunk,
+# through COPY or into Parquet files.
+
+CHUNK_ROWS = 500_000
+YEAR_SECONDS = 365 * 24 * 3600
+# Farms cluster around growing regions inside India's bounding box.
+LATITUDE_RANGE = (8.0, 35.0)
+LONGITUDE_RANGE = (68.0, 97.0)
+REGION_SPREAD_DEGREES = 0.6
+
+class Hotspots:
+    # Zipf-like popularity: the k-th most popular id is drawn with weight 1 / k**skew, so
+    # skew 0 is uniform and each step up concentrates traffic on fewer rows. Ranks map to
+    # ids through a fixed shuffle, so the hot rows are spread through the table.
+    def __init__(self, rng, ids, skew):
+        self.ids = rng.permutation(np.asarray(ids))
+        self.cdf = None
+        if skew > 0 and len(self.ids) > 1:
+            weights = np.arange(1, len(self.ids) + 1, dtype=np.float64) ** -skew
+            self.cdf = np.cumsum(weights)
+            self.cdf /= self.cdf[-1]
+
+    def sample(self, rng, size):
+        if self.cdf is None:
+            return self.ids[rng.integers(0, len(self.ids), size)]
+        ranks = np.searchsorted(self.cdf, rng.random(size), side="right")
+        return self.ids[np.minimum(ranks, len(self.ids) - 1)]
+
+def _labels(prefix, ids):
+    return np.char.add(prefix, ids.astype(str))
+
+def _constant(value, size):
+    # An object array shares one string; np.full would copy it into every fixed-width slot.
+    return np.full(size, value, dtype=object)
+
+def _timestamps(rng, now, size):
+    return now - rng.integers(0, YEAR_SECONDS, size).astype("timedelta64[s]")
+
+def _one_each_plus(rng, parents, total):
+    # Every parent gets one child, the rest go to random parents; sorted, so a parent's
+    # children have consecutive ids.
+    if total <= parents:
+        return np.sort(rng.choice(parents, total, replace=False))
+    return np.sort(np.concatenate([np.arange(parents), rng.integers(0, parents, total - parents)]))
+
+def plan(volumes, rng, skew, regions):
+    farmers = max(1, int(volumes["users"] * FARMER_SHARE))
+    users = volumes["users"]
+    farms = volumes["farms"]
+    listings = volumes["farm_species"]
+    orders = volumes["orders"]
+
+    farm_owner = Hotspots(rng, np.arange(1, farmers + 1), skew).sample(rng, farms)
+    centers = np.column_stack([rng.uniform(*LATITUDE_RANGE, regions), rng.uniform(*LONGITUDE_RANGE, regions)])
+    region = Hotspots(rng, np.arange(regions), skew).sample(rng, farms)
+    coordinates = centers[region] + rng.normal(0, REGION_SPREAD_DEGREES, (farms, 2))
+    latitude = np.clip(coordinates[:, 0], *LATITUDE_RANGE).round(6)
+    longitude = np.clip(coordinates[:, 1], *LONGITUDE_RANGE).round(6)
+
+    # Index 0 is unused throughout, so an id indexes its own row.
+    listing_farm = Hotspots(rng, np.arange(1, farms + 1), skew).sample(rng, listings)
+    listing_sub_species = Hotspots(rng, np.arange(1, volumes["sub_species"] + 1), skew).sample(rng, listings)
+    listing_price = np.clip(rng.lognormal(np.log(60), 0.9, listings), 1, 5000).round(2)
+    listing_quantity = np.where(rng.random(listings) < 0.1, 0, rng.integers(1, 1000, listings))
+
+    farm_listing_ids = np.argsort(listing_farm, kind="stable") + 1
+    listing_count = np.bincount(listing_farm, minlength=farms + 1)
+    listing_start = np.concatenate([[0], np.cumsum(listing_count)[:-1]])
+
+    # Orders only go to farms that list something, so every item has a listing to point at.
+    stocked_farms = np.flatnonzero(listing_count)
+    order_farm = Hotspots(rng, stocked_farms, skew).sample(rng, orders)
+    buyer_ids = np.arange(farmers + 1, users + 1) if users > farmers else np.arange(1, users + 1)
+    order_buyer = Hotspots(rng, buyer_ids, skew).sample(rng, orders)
+
+    item_order = _one_each_plus(rng, orders, volumes["order_items"])
+    item_farm = order_farm[item_order]
+    pick = listing_start[item_farm] + (rng.random(len(item_order)) * listing_count[item_farm]).astype(np.int64)
+    item_listing = farm_listing_ids[pick]
+    item_quantity = np.minimum(rng.geometric(0.3, len(item_order)), 50)
+    item_price = listing_price[item_listing - 1]
+    item_total = (item_quantity * item_price).round(2)
+    order_item_count = np.bincount(item_order, minlength=orders)
+    order_total = np.bincount(item_order, weights=item_total, minlength=orders).round(2)
+
+    # One transaction per order, plus retries and refunds spread over the rest.
+    transaction_order = _one_each_plus(rng, orders, volumes["transactions"])
+    rng.shuffle(transaction_order)
+    transaction_farm = order_farm[transaction_order]
+    transaction_amount = order_total[transaction_order]
+    farm_revenue = np.bincount(transaction_farm, weights=transaction_amount, minlength=farms + 1).round(2)
+
+    return {
+        "farmers": farmers,
+        "farm_owner": farm_owner,
+        "latitude": latitude,
+        "longitude": longitude,
+        "farm_listing_count": listing_count[1:],
+        "farm_revenue": farm_revenue[1:],
+        "listing_farm": listing_farm,
+        "listing_sub_species": listing_sub_species,
+        "listing_price": listing_price,
+        "listing_quantity": listing_quantity,
+        "order_farmer": farm_owner[order_farm - 1],
+        "order_buyer": order_buyer,
+        "order_item_count": order_item_count,
+        "order_total": order_total,
+        "item_order": item_order + 1,
+        "item_listing": item_listing,
+        "item_quantity": item_quantity,
+        "item_price": item_price,
+        "item_total": item_total,
+        "transaction_order": transaction_order + 1,
+        "transaction_farm": transaction_farm,
+        "transaction_buyer": order_buyer[transaction_order],
+        "transaction_amount": transaction_amount,
+    }
+
+def _chunks(total):
+    for start in range(0, total, CHUNK_ROWS):
+        yield start, min(start + CHUNK_ROWS, total)
+
+def _arrow_table(columns):
+    import pyarrow as pa
+    arrays = {}
+    for name, values in columns.items():
+        if np.issubdtype(values.dtype, np.datetime64):
+            arrays[name] = pa.array(values.astype("datetime64[us]"), type=pa.timestamp("us", tz="UTC"))
+        else:
+            arrays[name] = pa.array(values)
+    return pa.table(arrays)
+
+class CopyWriter:
+    # Streams each chunk into Postgres as CSV through COPY, all in one transaction.
+    def __init__(self, engine):
+        if engine.dialect.name != "postgresql":
+            raise SystemExit("COPY output needs a Postgres DATABASE_URL; use --format parquet otherwise.")
+        self.connection = engine.raw_connection()
+        self.cursor = self.connection.cursor()
+
+    def write(self, table, columns):
+        import pyarrow.csv as csv
+        buffer = io.BytesIO()
+        csv.write_csv(_arrow_table(columns), buffer, csv.WriteOptions(include_header=False))
+        buffer.seek(0)
+        names = ", ".join(f'"{name}"' for name in columns)
+        self.cursor.copy_expert(f'COPY "{table}" ({names}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+class ParquetWriter:
+    # One file per table, one row group per chunk.
+    def __init__(self, out_dir, compression):
+        self.out_dir = out_dir
+        self.compression = compression
+        self.writers = {}
+        os.makedirs(out_dir, exist_ok=True)
+
+    def write(self, table, columns):
+        import pyarrow.parquet as pq
+        arrow_table = _arrow_table(columns)
+        writer = self.writers.get(table)
+        if writer is None:
+            path = os.path.join(self.out_dir, f"{table}.parquet")
+            writer = self.writers[table] = pq.ParquetWriter(path, arrow_table.schema, compression=self.compression)
+        writer.write_table(arrow_table)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+def _emit(writer, table, total, build, seed_sequence):
+    # Each chunk draws from its own child seed, so output depends only on the arguments.
+    start_time = time.perf_counter()
+    for (start, end), chunk_seed in zip(_chunks(total), seed_sequence.spawn(-(-total // CHUNK_ROWS))):
+        writer.write(table, build(np.random.default_rng(chunk_seed), start, end))
+    print(f"  {table}: {total} rows in {time.perf_counter() - start_time:.1f}s")
+
+def generate(writer, scale, seed_value=42, skew=1.0, regions=40):
+    volumes = volumes_for(scale)
+    root = np.random.SeedSequence(seed_value)
+    plan_seed, order_time_seed, *table_seeds = root.spawn(12)
+    start_time = time.perf_counter()
+    keys = plan(volumes, np.random.default_rng(plan_seed), skew, regions)
+    print(f"Planned keys for scale={scale}, skew={skew} in {time.perf_counter() - start_time:.1f}s: {volumes}")
+
+    now = np.datetime64("now", "s")
+    farmers = keys["farmers"]
+    # One shared hash: login benchmarks pay the real verify cost without hashing every row.
+    password_hash = passwords.hash_password("benchmark")
+    categories = np.array([f"category-{i}" for i in range(1, volumes["categories"] + 1)])
+    roles = np.array([models.UserRole.farmer.name, models.UserRole.buyer.name])
+    farm_types = np.array([farm_type.name for farm_type in models.FarmType])
+    growth_rates = np.array(["slow", "medium", "fast"])
+    statuses = np.array(STATUSES)
+    payment_methods = np.array(PAYMENT_METHODS)
+
+    def phone_numbers(ids):
+        return _labels("+91", 9000000000 + ids)
+
+    _emit(writer, "Phone", volumes["users"], lambda rng, start, end: {
+        "phone": phone_numbers(np.arange(start + 1, end + 1)),
+        "dnd": rng.random(end - start) < 0.2,
+        "whatsapp": rng.random(end - start) < 0.7,
+    }, table_seeds[0])
+
+    def users(rng, start, end):
+        ids = np.arange(start + 1, end + 1)
+        return {
+            "id": ids,
+            "first_name": _labels("First", ids),
+            "last_name": _labels("Last", ids),
+            "email": np.char.add(_labels("user", ids), "@example.com"),
+            "phone": phone_numbers(ids),
+            "password": _constant(password_hash, end - start),
+            "role": roles[(ids > farmers).astype(np.int64)],
+            "created_at": _timestamps(rng, now, end - start),
+        }
+    _emit(writer, "User", volumes["users"], users, table_seeds[1])
+
+    _emit(writer, "Category", volumes["categories"], lambda rng, start, end: {
+        "category": categories[start:end],
+        "description": np.char.add("Description of ", categories[start:end]),
+    }, table_seeds[2])
+
+    def species(rng, start, end):
+        ids = np.arange(start + 1, end + 1)
+        size = end - start
+        return {
+            "id": ids,
+            "category_name": categories[rng.integers(0, len(categories), size)],
+            "common_name": _labels("Species ", ids),
+            "scientific_name": np.char.add(np.char.add(_labels("Genus", ids % 97), " species"), ids.astype(str)),
+            "description": _constant("Benchmark species", size),
+            "genus": _labels("Genus", ids % 97),
+            "family": _labels("Family", ids % 31),
+            "optimal_temperature_min": rng.uniform(5, 15, size).round(2),
+            "optimal_temperature_max": rng.uniform(20, 35, size).round(2),
+            "optimal_humidity": rng.uniform(30, 90, size).round(2),
+            "optimal_ph": rng.uniform(5, 8, size).round(2),
+            "water_requirement_per_litre": rng.uniform(0.5, 20, size).round(2),
+            "nutritient_requirement_per_kg": rng.uniform(0.1, 5, size).round(2),
+            "lifespan": rng.integers(1, 51, size),
+            "native_region": _constant("Benchmark", size),
+            "created_at": _timestamps(rng, now, size),
+        }
+    _emit(writer, "Species", volumes["species"], species, table_seeds[3])
+
+    def sub_species(rng, start, end):
+        ids = np.arange(start + 1, end + 1)
+        size = end - start
+        return {
+            "id": ids,
+            "species_id": rng.integers(1, volumes["species"] + 1, size),
+            "name": _labels("Variety ", ids),
+            "common_name": _labels("Variety ", ids),
+            "description": _constant("Benchmark variety", size),
+            "growth_rate": growth_rates[rng.integers(0, len(growth_rates), size)],
+            "unique_traits": _constant("None", size),
+            "created_at": _timestamps(rng, now, size),
+        }
+    _emit(writer, "Sub_species", volumes["sub_species"], sub_species, table_seeds[4])
+
+    def farms(rng, start, end):
+        ids = np.arange(start + 1, end + 1)
+        size = end - start
+        return {
+            "id": ids,
+            "user_id": keys["farm_owner"][start:end],
+            "type": farm_types[rng.integers(0, len(farm_types), size)],
+            "name": _labels("Farm ", ids),
+            "description": _constant("Benchmark farm", size),
+            "latitude": keys["latitude"][start:end],
+            "longitude": keys["longitude"][start:end],
+            "created_at": _timestamps(rng, now, size),
+            "listing_count": keys["farm_listing_count"][start:end],
+            "lifetime_revenue": keys["farm_revenue"][start:end],
+        }
+    _emit(writer, "Farm", volumes["farms"], farms, table_seeds[5])
+
+    def farm_species(rng, start, end):
+        ids = np.arange(start + 1, end + 1)
+        size = end - start
+        return {
+            "id": ids,
+            "farm_id": keys["listing_farm"][start:end],
+            "sub_species_id": keys["listing_sub_species"][start:end],
+            "name": _labels("Listing ", ids),
+            "description": _constant("Benchmark listing", size),
+            "price": keys["listing_price"][start:end],
+            "available_quantity": keys["listing_quantity"][start:end],
+            "created_at": _timestamps(rng, now, size),
+        }
+    _emit(writer, "Farm_species", volumes["farm_species"], farm_species, table_seeds[6])
+
+    # Transactions follow their order within the hour, so order times are kept for them.
+    order_created = _timestamps(np.random.default_rng(order_time_seed), now, volumes["orders"])
+
+    def orders(rng, start, end):
+        ids = np.arange(start + 1, end + 1)
+        size = end - start
+        return {
+            "id": ids,
+            "farmer_id": keys["order_farmer"][start:end],
+            "name": _labels("Order ", ids),
+            "description": _constant("Benchmark order", size),
+            "created_at": order_created[start:end],
+            "item_count": keys["order_item_count"][start:end],
+            "total": keys["order_total"][start:end],
+        }
+    _emit(writer, "Order", volumes["orders"], orders, table_seeds[7])
+
+    _emit(writer, "Order_item", volumes["order_items"], lambda rng, start, end: {
+        "id": np.arange(start + 1, end + 1),
+        "order_id": keys["item_order"][start:end],
+        "farm_species_id": keys["item_listing"][start:end],
+        "quantity": keys["item_quantity"][start:end],
+        "price": keys["item_price"][start:end],
+        "total_price": keys["item_total"][start:end],
+    }, table_seeds[8])
+
+    def transactions(rng, start, end):
+        size = end - start
+        order_ids = keys["transaction_order"][start:end]
+        return {
+            "id": np.arange(start + 1, end + 1),
+            "buyer_id": keys["transaction_buyer"][start:end],
+            "farm_id": keys["transaction_farm"][start:end],
+            "order_id": order_ids,
+            "total_amount": keys["transaction_amount"][start:end],
+            "status": statuses[rng.integers(0, len(statuses), size)],
+            "payment_method": payment_methods[rng.integers(0, len(payment_methods), size)],
+            "transaction_date": order_created[order_ids - 1] + rng.integers(0, 3600, size).astype("timedelta64[s]"),
+        }
+    _emit(writer, "Transaction", volumes["transactions"], transactions, table_seeds[9])
+
+    return volumes
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a large, skewed benchmark dataset with NumPy.")
+    parser.add_argument("--scale", type=float, default=0.01, help="Fraction of the full volumes (1.0 = 1M users, 10M transactions).")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed, so runs are reproducible.")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent for hot farmers, farms, listings and buyers; 0 is uniform.")
+    parser.add_argument("--regions", type=int, default=40, help="Growing regions farms cluster around.")
+    parser.add_argument("--format", choices=("copy", "parquet"), default="copy", help="COPY into DATABASE_URL (Postgres) or write Parquet files.")
+    parser.add_argument("--out", default="datagen", help="Directory for --format parquet.")
+    parser.add_argument("--compression", default="zstd", help="Parquet compression codec.")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    if args.format == "copy":
+        models.Base.metadata.create_all(bind=engine)
+        # Transactions are back-dated up to a year, so create those monthly partitions up front.
+        partitions.ensure_partitions(engine, months_ahead=13, now=datetime.now(timezone.utc) - timedelta(days=366))
+        writer = CopyWriter(engine)
+    else:
+        writer = ParquetWriter(args.out, args.compression)
+
+    # COPY output commits only here; a failed run leaves the database as it was.
+    generate(writer, args.scale, args.seed, args.skew, args.regions)
+    writer.close()
+
+    if args.format == "copy":
+        with engine.begin() as conn:
+            _reset_sequences(conn)
+            conn.execute(text("ANALYZE"))
+    print(f"Done in {time.perf_counter() - start_time:.1f}s")
+
+if __name__ == "__main__":
+    main()
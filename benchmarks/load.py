@@ -0,0 +1,205 @@
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from collections import defaultdict
+import httpx
+from sqlalchemy import func
+from app.database import SessionLocal
+from app import models, auth
+
+_METRIC_LINE = re.compile(r'^http_request_db_queries_(sum|count)\{method="(\w+)",route="([^"]+)"\} ([\d.]+)$')
+_PATH_USER = re.compile(r"^/api/v1/users/(\d+)/")
+_OWNER_QUERY = re.compile(r"[?&]owner_id=(\d+)")
+
+def _id_ranges():
+    db = SessionLocal()
+    try:
+        return {
+            "users": db.query(func.max(models.User.id)).scalar() or 1,
+            "farmers": db.query(func.max(models.User.id)).filter(models.User.role == models.UserRole.farmer).scalar() or 1,
+            "species": db.query(func.max(models.Species.id)).scalar() or 1,
+            "farms": db.query(func.max(models.Farm.id)).scalar() or 1,
+            "farm_species": db.query(func.max(models.Farm_species.id)).scalar() or 1,
+            "orders": db.query(func.max(models.Order.id)).scalar() or 1,
+            # Species routes only return rows for a farm read by its owner, so browse real pairs.
+            "farm_owners": [tuple(row) for row in db.query(models.Farm.user_id, models.Farm.id).limit(1000)] or [(1, 1)],
+            # Payments are only accepted from a party to the order and for a farm of its farmer.
+            "order_payers": [
+                tuple(row) for row in
+                db.query(models.Transaction.buyer_id, models.Order.id, models.Farm.id)
+                .join(models.Order, models.Order.id == models.Transaction.order_id)
+                .join(models.Farm, models.Farm.user_id == models.Order.farmer_id)
+                .limit(1000)
+            ] or [
+                tuple(row) for row in
+                db.query(models.Order.farmer_id, models.Order.id, models.Farm.id)
+                .join(models.Farm, models.Farm.user_id == models.Order.farmer_id)
+                .limit(1000)
+            ] or [(1, 1, 1)],
+        }
+    finally:
+        db.close()
+
+def catalog_browse(rng, ids):
+    user_id, farm_id = rng.choice(ids["farm_owners"])
+    species_id = rng.randint(1, ids["species"])
+    return [
+        ("GET", f"/api/v1/users/{user_id}/farms/{farm_id}/species/", None),
+        ("GET", f"/api/v1/users/{user_id}/farms/{farm_id}/species/{species_id}/sub_species/", None),
+    ]
+
+def farm_listing(rng, ids):
+    user_id, farm_id = rng.choice(ids["farm_owners"])
+    return [
+        ("GET", f"/api/v1/users/farms/?owner_id={user_id}", None),
+        ("GET", f"/api/v1/users/{user_id}/farms/{farm_id}/farm_species/", None),
+    ]
+
+def order_creation(rng, ids):
+    user_id = rng.randint(1, ids["users"])
+    farmer_id = rng.randint(1, ids["farmers"])
+    order_id = rng.randint(1, ids["orders"])
+    return [
+        ("POST", f"/api/v1/users/{user_id}/orders/", {"farmer_id": farmer_id, "name": "Benchmark order", "description": "load test"}),
+        ("POST", f"/api/v1/users/{user_id}/orders/{order_id}/order_items/", {
+            "order_id": order_id,
+            "farm_species_id": rng.randint(1, ids["farm_species"]),
+            "quantity": rng.randint(1, 10),
+            "price": 10.0,
+        }),
+    ]
+
+def transaction_creation(rng, ids):
+    user_id, order_id, farm_id = rng.choice(ids["order_payers"])
+    return [
+        ("POST", f"/api/v1/users/{user_id}/orders/{order_id}/transactions/", {
+            "buyer_id": user_id,
+            "order_id": order_id,
+            "farm_id": farm_id,
+            "total_amount": 100.0,
+            "status": "paid",
+            "payment_method": "card",
+        }),
+    ]
+
+def list_pagination(rng, ids):
+    skip = rng.randint(0, max(0, ids["users"] - 100))
+    return [("GET", f"/api/v1/users/?skip={skip}&limit=100", None)]
+
+SCENARIOS = {
+    "catalog_browse": (catalog_browse, 30),
+    "farm_listing": (farm_listing, 25),
+    "order_creation": (order_creation, 15),
+    "transaction_creation": (transaction_creation, 10),
+    "list_pagination": (list_pagination, 20),
+}
+
+def _auth_headers(path, ids, tokens):
+    # Tokens are minted locally with AUTH_SECRET_KEY rather than through /login, so the
+    # load stays on the routes under test; --url servers must share the same key.
+    # Routes without a user in the path are browsed as the owner they ask for.
+    match = _PATH_USER.match(path) or _OWNER_QUERY.search(path)
+    if not match:
+        return None
+    user_id = int(match.group(1))
+    token = tokens.get(user_id)
+    if token is None:
+        role = models.UserRole.farmer if user_id <= ids["farmers"] else models.UserRole.buyer
+        token = tokens[user_id] = auth.create_access_token(user_id, role)
+    return {"Authorization": f"Bearer {token}"}
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+async def _scrape_query_counts(client):
+    response = await client.get("/metrics")
+    counts = defaultdict(lambda: [0.0, 0.0])
+    for line in response.text.splitlines():
+        match = _METRIC_LINE.match(line)
+        if match:
+            kind, method, route, value = match.groups()
+            counts[f"{method} {route}"][0 if kind == "sum" else 1] = float(value)
+    return counts
+
+async def run(client, scenarios, concurrency, duration, seed_value):
+    ids = _id_ranges()
+    names = list(scenarios)
+    weights = [SCENARIOS[name][1] for name in names]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    tokens = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id):
+        rng = random.Random(seed_value + worker_id)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            for method, path, body in SCENARIOS[name][0](rng, ids):
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body, headers=_auth_headers(path, ids, tokens))
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                latencies[name].append(time.perf_counter() - start)
+                if failed:
+                    errors[name] += 1
+
+    before = await _scrape_query_counts(client)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    after = await _scrape_query_counts(client)
+
+    report = {"duration_s": round(elapsed, 2), "concurrency": concurrency, "scenarios": {}, "queries_per_request": {}}
+    for name in names:
+        samples = latencies[name]
+        report["scenarios"][name] = {
+            "requests": len(samples),
+            "errors": errors[name],
+            "throughput_rps": round(len(samples) / elapsed, 1),
+            "p50_ms": round(percentile(samples, 0.50) * 1000, 2),
+            "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+        }
+    for route, (total, count) in after.items():
+        prev_total, prev_count = before.get(route, (0.0, 0.0))
+        if count > prev_count:
+            report["queries_per_request"][route] = round((total - prev_total) / (count - prev_count), 2)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the API's hot paths with concurrent load and report latency.")
+    parser.add_argument("--url", help="Base URL of a running server. Without it the app is driven in-process.")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Limit to these scenarios (repeatable).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report to this file as well as stdout.")
+    args = parser.parse_args()
+
+    async def go():
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=30.0)
+        else:
+            from app.main import app
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            client = httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=30.0)
+        async with client:
+            return await run(client, args.scenario or list(SCENARIOS), args.concurrency, args.duration, args.seed)
+
+    report = asyncio.run(go())
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert, text
+from app.database import engine
+from app import models, partitions, passwords
+
+BASE_VOLUMES = {
+    "users": 1_000_000,
+    "categories": 12,
+    "species": 500,
+    "sub_species": 2_000,
+    "farms": 100_000,
+    "farm_species": 1_000_000,
+    "orders": 2_500_000,
+    "order_items": 5_000_000,
+    "transactions": 10_000_000,
+}
+
+FARMER_SHARE = 0.1
+CHUNK_SIZE = 10_000
+STATUSES = ("pending", "paid", "paid", "paid", "refunded")
+PAYMENT_METHODS = ("card", "upi", "cash", "bank_transfer")
+
+def volumes_for(scale):
+    return {name: max(1, int(count * scale)) for name, count in BASE_VOLUMES.items()}
+
+def _insert_chunks(conn, table, rows, label):
+    start = time.perf_counter()
+    chunk = []
+    total = 0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            conn.execute(insert(table), chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        conn.execute(insert(table), chunk)
+        total += len(chunk)
+    print(f"  {label}: {total} rows in {time.perf_counter() - start:.1f}s")
+
+def _reset_sequences(conn):
+    if conn.dialect.name != "postgresql":
+        return
+    for table in ("User", "Farm", "Farm_species", "Sub_species", "Species", "Order", "Order_item", "Transaction"):
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), COALESCE((SELECT MAX(id) FROM \"{table}\"), 1))"
+        ))
+
+def seed(scale, seed_value=42):
+    rng = random.Random(seed_value)
+    volumes = volumes_for(scale)
+    farmers = max(1, int(volumes["users"] * FARMER_SHARE))
+    now = datetime.now(timezone.utc)
+
+    def timestamp():
+        return now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+
+    # One shared hash: login benchmarks pay the real verify cost without hashing every row.
+    password_hash = passwords.hash_password("benchmark")
+
+    models.Base.metadata.create_all(bind=engine)
+    # Transactions are back-dated up to a year, so create those monthly partitions up front.
+    partitions.ensure_partitions(engine, months_ahead=13, now=now - timedelta(days=366))
+    print(f"Seeding with scale={scale}: {volumes}")
+
+    with engine.begin() as conn:
+        _insert_chunks(conn, models.Phone.__table__, (
+            {"phone": f"+91{9000000000 + i}", "dnd": rng.random() < 0.2, "whatsapp": rng.random() < 0.7}
+            for i in range(1, volumes["users"] + 1)
+        ), "phones")
+
+        _insert_chunks(conn, models.User.__table__, (
+            {
+                "id": i,
+                "first_name": f"First{i}",
+                "last_name": f"Last{i}",
+                "email": f"user{i}@example.com",
+                "phone": f"+91{9000000000 + i}",
+                "password": password_hash,
+                "role": models.UserRole.farmer if i <= farmers else models.UserRole.buyer,
+                "created_at": timestamp(),
+            }
+            for i in range(1, volumes["users"] + 1)
+        ), "users")
+
+        categories = [f"category-{i}" for i in range(1, volumes["categories"] + 1)]
+        _insert_chunks(conn, models.Category.__table__, (
+            {"category": name, "description": f"Description of {name}"} for name in categories
+        ), "categories")
+
+        _insert_chunks(conn, models.Species.__table__, (
+            {
+                "id": i,
+                "category_name": rng.choice(categories),
+                "common_name": f"Species {i}",
+                "scientific_name": f"Genus{i % 97} species{i}",
+                "description": "Benchmark species",
+                "genus": f"Genus{i % 97}",
+                "family": f"Family{i % 31}",
+                "optimal_temperature_min": rng.uniform(5, 15),
+                "optimal_temperature_max": rng.uniform(20, 35),
+                "optimal_humidity": rng.uniform(30, 90),
+                "optimal_ph": rng.uniform(5, 8),
+                "water_requirement_per_litre": rng.uniform(0.5, 20),
+                "nutritient_requirement_per_kg": rng.uniform(0.1, 5),
+                "lifespan": rng.randint(1, 50),
+                "native_region": "Benchmark",
+                "created_at": timestamp(),
+            }
+            for i in range(1, volumes["species"] + 1)
+        ), "species")
+
+        _insert_chunks(conn, models.Sub_species.__table__, (
+            {
+                "id": i,
+                "species_id": rng.randint(1, volumes["species"]),
+                "name": f"Variety {i}",
+                "common_name": f"Variety {i}",
+                "description": "Benchmark variety",
+                "growth_rate": rng.choice(("slow", "medium", "fast")),
+                "unique_traits": "None",
+                "created_at": timestamp(),
+            }
+            for i in range(1, volumes["sub_species"] + 1)
+        ), "sub_species")
+
+        _insert_chunks(conn, models.Farm.__table__, (
+            {
+                "id": i,
+                "user_id": rng.randint(1, farmers),
+                "type": rng.choice(list(models.FarmType)),
+                "name": f"Farm {i}",
+                "description": "Benchmark farm",
+                "latitude": rng.uniform(8, 35),
+                "longitude": rng.uniform(68, 97),
+                "created_at": timestamp(),
+            }
+            for i in range(1, volumes["farms"] + 1)
+        ), "farms")
+
+        _insert_chunks(conn, models.Farm_species.__table__, (
+            {
+                "id": i,
+                "farm_id": rng.randint(1, volumes["farms"]),
+                "sub_species_id": rng.randint(1, volumes["sub_species"]),
+                "name": f"Listing {i}",
+                "description": "Benchmark listing",
+                "price": round(rng.uniform(5, 500), 2),
+                "available_quantity": rng.randint(0, 1000),
+                "created_at": timestamp(),
+            }
+            for i in range(1, volumes["farm_species"] + 1)
+        ), "farm_species")
+
+        _insert_chunks(conn, models.Order.__table__, (
+            {
+                "id": i,
+                "farmer_id": rng.randint(1, farmers),
+                "name": f"Order {i}",
+                "description": "Benchmark order",
+                "created_at": timestamp(),
+            }
+            for i in range(1, volumes["orders"] + 1)
+        ), "orders")
+
+        def order_items():
+            for i in range(1, volumes["order_items"] + 1):
+                quantity = rng.randint(1, 20)
+                price = round(rng.uniform(5, 500), 2)
+                yield {
+                    "id": i,
+                    "order_id": rng.randint(1, volumes["orders"]),
+                    "farm_species_id": rng.randint(1, volumes["farm_species"]),
+                    "quantity": quantity,
+                    "price": price,
+                    "total_price": round(quantity * price, 2),
+                }
+        _insert_chunks(conn, models.Order_item.__table__, order_items(), "order_items")
+
+        _insert_chunks(conn, models.Transaction.__table__, (
+            {
+                "id": i,
+                "buyer_id": rng.randint(farmers + 1, volumes["users"]) if volumes["users"] > farmers else 1,
+                "farm_id": rng.randint(1, volumes["farms"]),
+                "order_id": rng.randint(1, volumes["orders"]),
+                "total_amount": round(rng.uniform(10, 5000), 2),
+                "status": rng.choice(STATUSES),
+                "payment_method": rng.choice(PAYMENT_METHODS),
+                "transaction_date": timestamp(),
+            }
+            for i in range(1, volumes["transactions"] + 1)
+        ), "transactions")
+
+        _reset_sequences(conn)
+
+    return volumes
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the database configured by DATABASE_URL with benchmark data.")
+    parser.add_argument("--scale", type=float, default=0.001, help="Fraction of the full volumes (1.0 = 1M users, 10M transactions).")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed, so runs are reproducible.")
+    args = parser.parse_args()
+    seed(args.scale, args.seed)
+
+if __name__ == "__main__":
+    main()
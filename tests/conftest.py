@@ -0,0 +1,19 @@
+import os
+import tempfile
+
+# Settings are read at import time, so every test module shares one configuration
+# that is in place before the app is first imported.
+_db_dir = tempfile.mkdtemp()
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_db_dir}/tests.db",
+    DATABASE_REPLICA_URLS="",
+    QUERY_BUDGET_MODE="raise",
+    ORM_LAZY_LOAD="raise",
+    METRICS_ENABLED="true",
+    QUERY_DEBUG_ENABLED="false",
+    RATE_LIMIT_ENABLED="false",
+    OUTBOX_ENABLED="false",
+    PURGE_ENABLED="false",
+    AUTH_SECRET_KEY="tests",
+    PASSWORD_SCRYPT_LOG_N="10",
+)
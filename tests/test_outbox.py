@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app import models, outbox
+from app.core import config
+
+NOW = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+def _naive(value):
+    # SQLite hands timestamps back without their zone.
+    return value.replace(tzinfo=None)
+
+@pytest.fixture
+def db(monkeypatch):
+    # A private in-memory database, so the worker functions run against SQLite in isolation.
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(outbox, "SessionLocal", session_factory)
+    monkeypatch.setattr(outbox, "_utcnow", lambda: NOW)
+    monkeypatch.setattr(config, "OUTBOX_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(config, "OUTBOX_RETRY_BACKOFF", 2.0)
+    monkeypatch.setattr(config, "OUTBOX_LEASE_SECONDS", 60)
+    session = session_factory()
+    yield session
+    session.close()
+    engine.dispose()
+
+def _event(db, event_type="test.event", status=outbox.PENDING, available_at=NOW):
+    event = outbox.enqueue(db, event_type, {"value": 1})
+    event.status = status
+    event.available_at = available_at
+    db.commit()
+    return event.id
+
+def _reload(db, event_id):
+    db.expire_all()
+    return db.get(models.Outbox_event, event_id)
+
+def test_claim_batch_leases_due_events_in_order(db):
+    first = _event(db)
+    second = _event(db)
+    _event(db, available_at=NOW + timedelta(seconds=30))
+    _event(db, status=outbox.DONE)
+
+    assert outbox.claim_batch(db, 10) == [first, second]
+    event = _reload(db, first)
+    assert event.status == outbox.PROCESSING
+    assert _naive(event.available_at) == _naive(NOW + timedelta(seconds=config.OUTBOX_LEASE_SECONDS))
+
+def test_claim_batch_respects_the_limit(db):
+    event_ids = [_event(db) for _ in range(3)]
+    assert outbox.claim_batch(db, 2) == event_ids[:2]
+    assert outbox.claim_batch(db, 2) == event_ids[2:]
+
+def test_claim_batch_reclaims_an_expired_lease(db):
+    stuck = _event(db, status=outbox.PROCESSING, available_at=NOW - timedelta(seconds=1))
+    leased = _event(db, status=outbox.PROCESSING, available_at=NOW + timedelta(seconds=30))
+    assert outbox.claim_batch(db, 10) == [stuck]
+    assert _naive(_reload(db, leased).available_at) == _naive(NOW + timedelta(seconds=30))
+
+def test_process_event_runs_handlers_and_marks_done(db, monkeypatch):
+    seen = []
+    monkeypatch.setitem(outbox._handlers, "test.event", [lambda session, event: seen.append(event.payload)])
+    event_id = _event(db)
+    outbox.claim_batch(db, 1)
+
+    outbox.process_event(event_id)
+
+    event = _reload(db, event_id)
+    assert seen == [{"value": 1}]
+    assert event.status == outbox.DONE
+    assert event.attempts == 0
+
+def test_process_event_skips_events_it_does_not_hold(db, monkeypatch):
+    seen = []
+    monkeypatch.setitem(outbox._handlers, "test.event", [lambda session, event: seen.append(event.id)])
+    event_id = _event(db)
+    outbox.process_event(event_id)
+    assert seen == []
+    assert _reload(db, event_id).status == outbox.PENDING
+
+def test_failed_event_backs_off_then_fails_permanently(db, monkeypatch):
+    def broken(session, event):
+        raise RuntimeError("gateway down")
+    monkeypatch.setitem(outbox._handlers, "test.event", [broken])
+    event_id = _event(db)
+    clock = NOW
+
+    for attempt in range(1, config.OUTBOX_MAX_ATTEMPTS):
+        assert outbox.claim_batch(db, 1) == [event_id]
+        outbox.process_event(event_id)
+        event = _reload(db, event_id)
+        assert event.status == outbox.PENDING
+        assert event.attempts == attempt
+        assert event.last_error == "gateway down"
+        clock += timedelta(seconds=config.OUTBOX_RETRY_BACKOFF ** attempt)
+        assert _naive(event.available_at) == _naive(clock)
+        # Not handed out again until the backoff has passed.
+        assert outbox.claim_batch(db, 1) == []
+        monkeypatch.setattr(outbox, "_utcnow", lambda now=clock: now)
+
+    assert outbox.claim_batch(db, 1) == [event_id]
+    outbox.process_event(event_id)
+    event = _reload(db, event_id)
+    assert event.status == outbox.FAILED
+    assert event.attempts == config.OUTBOX_MAX_ATTEMPTS
+    assert outbox.claim_batch(db, 1) == []
+
+def test_failed_handler_rolls_back_its_writes(db, monkeypatch):
+    def half_done(session, event):
+        outbox.enqueue(session, "test.follow_up", {})
+        session.flush()
+        raise RuntimeError("boom")
+    monkeypatch.setitem(outbox._handlers, "test.event", [half_done])
+    event_id = _event(db)
+    outbox.claim_batch(db, 1)
+
+    outbox.process_event(event_id)
+
+    db.expire_all()
+    assert db.query(models.Outbox_event).filter(models.Outbox_event.event_type == "test.follow_up").count() == 0
+
+def test_purge_finished_keeps_recent_and_unfinished_events(db, monkeypatch):
+    monkeypatch.setattr(config, "OUTBOX_RETENTION_HOURS", 24)
+    monkeypatch.setattr(config, "OUTBOX_FAILED_RETENTION_HOURS", 168)
+    _event(db, status=outbox.DONE, available_at=NOW - timedelta(hours=48))
+    recent_done = _event(db, status=outbox.DONE, available_at=NOW - timedelta(hours=1))
+    recent_failed = _event(db, status=outbox.FAILED, available_at=NOW - timedelta(hours=48))
+    _event(db, status=outbox.FAILED, available_at=NOW - timedelta(hours=200))
+    pending = _event(db, available_at=NOW - timedelta(hours=500))
+
+    assert outbox.purge_finished(batch_size=1) == 2
+
+    db.expire_all()
+    remaining = {event.id for event in db.query(models.Outbox_event)}
+    assert remaining == {recent_done, recent_failed, pending}
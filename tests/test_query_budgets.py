@@ -0,0 +1,214 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app import query_budget
+from app.routes import graph, orders
+
+SPECIES = {
+    "category_name": "vegetables",
+    "common_name": "Tomato",
+    "scientific_name": "Solanum lycopersicum",
+    "description": "Fruit",
+    "genus": "Solanum",
+    "family": "Solanaceae",
+    "optimal_temperature_min": 18,
+    "optimal_temperature_max": 27,
+    "optimal_humidity": 60,
+    "optimal_ph": 6.5,
+    "water_requirement_per_litre": 2,
+    "nutritient_requirement_per_kg": 1,
+    "lifespan": 1,
+    "native_region": "South America",
+}
+
+def _user(email, role="buyer"):
+    return {"first_name": "First", "last_name": "Last", "email": email, "phone": "+911234567890", "password": "secret", "role": role}
+
+def _login(client, email):
+    response = client.post("/api/v1/login/", json={"email": email, "password": "secret"})
+    assert response.status_code == 200, response.text
+    tokens = response.json()
+    return {"Authorization": f"Bearer {tokens['access_token']}"}, tokens["refresh_token"]
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture(scope="module")
+def world(client):
+    # Built through the API, so every write route runs under the budget check on the way.
+    farmer = client.post("/api/v1/users/", json=_user("farmer@example.com", "farmer")).json()["id"]
+    buyer = client.post("/api/v1/users/", json=_user("buyer@example.com")).json()["id"]
+    farmer_headers, _ = _login(client, "farmer@example.com")
+    buyer_headers, buyer_refresh = _login(client, "buyer@example.com")
+
+    farm = client.post(f"/api/v1/users/{farmer}/farms/", headers=farmer_headers, json={
+        "farmer_id": farmer, "type": "FARM", "name": "Farm", "description": "Test farm", "latitude": 12.9, "longitude": 77.6,
+    }).json()["id"]
+    species = client.post(f"/api/v1/users/{farmer}/farms/{farm}/species/", headers=farmer_headers, json=SPECIES).json()["id"]
+    sub_species = client.post(f"/api/v1/users/{farmer}/farms/{farm}/species/{species}/sub_species/", headers=farmer_headers, json={
+        "species_id": species, "name": "Cherry", "common_name": "Cherry tomato", "description": "Small",
+        "growth_rate": "fast", "unique_traits": "Sweet",
+    }).json()["id"]
+    listings = [
+        client.post(f"/api/v1/users/{farmer}/farms/{farm}/farm_species/", headers=farmer_headers, json={
+            "farm_id": farm, "sub_species_id": sub_species, "name": f"Listing {i}", "price": 10 + i, "available_quantity": 100,
+        }).json()["id"]
+        for i in range(3)
+    ]
+    checkout = client.post(f"/api/v1/users/{buyer}/checkout/", headers=buyer_headers, json={
+        "farm_id": farm, "name": "Order", "description": "Test order", "status": "paid", "payment_method": "card",
+        "items": [{"farm_species_id": listing, "quantity": 2} for listing in listings],
+    }).json()
+
+    return {
+        "farmer": farmer, "buyer": buyer, "farm": farm, "species": species, "sub_species": sub_species,
+        "listings": listings, "order": checkout["order"]["id"], "transaction": checkout["transaction"]["id"],
+        "farmer_headers": farmer_headers, "buyer_headers": buyer_headers, "buyer_refresh": buyer_refresh,
+    }
+
+def test_world_is_built(world):
+    assert len(world["listings"]) == 3
+
+ROUTES = [
+    ("read user", lambda w: ("GET", f"/api/v1/users/{w['farmer']}", w["farmer_headers"], None)),
+    ("update user", lambda w: ("PATCH", f"/api/v1/users/{w['farmer']}", w["farmer_headers"], {"first_name": "Renamed"})),
+    ("list users", lambda w: ("GET", "/api/v1/users/", w["farmer_headers"], None)),
+    ("list all farms", lambda w: ("GET", f"/api/v1/users/farms/?owner_id={w['farmer']}", w["buyer_headers"], None)),
+    ("list farms", lambda w: ("GET", f"/api/v1/users/{w['farmer']}/farms/", w["farmer_headers"], None)),
+    ("read farm", lambda w: ("GET", f"/api/v1/users/{w['farmer']}/farms/{w['farm']}", w["farmer_headers"], None)),
+    ("categories", lambda w: ("GET", "/api/v1/categories/", None, None)),
+    ("category species", lambda w: ("GET", "/api/v1/categories/vegetables/species/", None, None)),
+    ("read species", lambda w: ("GET", f"/api/v1/users/{w['farmer']}/farms/{w['farm']}/species/{w['species']}", w["farmer_headers"], None)),
+    ("list species", lambda w: ("GET", f"/api/v1/users/{w['farmer']}/farms/{w['farm']}/species/", w["farmer_headers"], None)),
+    ("list sub species", lambda w: (
+        "GET", f"/api/v1/users/{w['farmer']}/farms/{w['farm']}/species/{w['species']}/sub_species/", w["farmer_headers"], None,
+    )),
+    ("list farm species", lambda w: ("GET", f"/api/v1/users/{w['farmer']}/farms/{w['farm']}/farm_species/", w["farmer_headers"], None)),
+    ("bulk update farm species", lambda w: (
+        "PATCH", f"/api/v1/users/{w['farmer']}/farms/{w['farm']}/farm_species/", w["farmer_headers"],
+        [{"id": listing, "quantity_delta": 1} for listing in w["listings"]],
+    )),
+    ("listings", lambda w: ("GET", "/api/v1/listings/", None, None)),
+    ("listings by distance", lambda w: ("GET", "/api/v1/listings/?sort=distance&latitude=12.9&longitude=77.6", None, None)),
+    ("list orders", lambda w: ("GET", f"/api/v1/users/{w['buyer']}/orders/", w["buyer_headers"], None)),
+    ("read order", lambda w: ("GET", f"/api/v1/users/{w['buyer']}/orders/{w['order']}", w["buyer_headers"], None)),
+    ("list order items", lambda w: ("GET", f"/api/v1/users/{w['buyer']}/orders/{w['order']}/order_items/", w["buyer_headers"], None)),
+    ("create order item", lambda w: (
+        "POST", f"/api/v1/users/{w['buyer']}/orders/{w['order']}/order_items/", w["buyer_headers"],
+        {"order_id": w["order"], "farm_species_id": w["listings"][0], "quantity": 1, "price": 10},
+    )),
+    ("create transaction", lambda w: (
+        "POST", f"/api/v1/users/{w['buyer']}/orders/{w['order']}/transactions/", w["buyer_headers"],
+        {"buyer_id": w["buyer"], "farm_id": w["farm"], "order_id": w["order"], "total_amount": 5, "status": "paid", "payment_method": "card"},
+    )),
+    ("list order transactions", lambda w: (
+        "GET", f"/api/v1/users/{w['buyer']}/orders/{w['order']}/transactions/", w["buyer_headers"], None,
+    )),
+    ("list transactions", lambda w: ("GET", f"/api/v1/users/{w['buyer']}/transactions/", w["buyer_headers"], None)),
+    ("export transactions", lambda w: ("GET", f"/api/v1/users/{w['buyer']}/transactions/export/", w["buyer_headers"], None)),
+    ("graph query", lambda w: ("POST", f"/api/v1/users/{w['farmer']}/query/", w["farmer_headers"], {
+        "include": {"farms": {"farm_species": {"sub_species": {"species": {}}}}, "orders": {"order_items": {}}},
+    })),
+    ("checkout", lambda w: ("POST", f"/api/v1/users/{w['buyer']}/checkout/", w["buyer_headers"], {
+        "farm_id": w["farm"], "name": "Order", "description": "Another order", "status": "paid", "payment_method": "card",
+        "items": [{"farm_species_id": listing, "quantity": 1} for listing in w["listings"]],
+    })),
+    ("bulk signup", lambda w: ("POST", "/api/v1/users/bulk/", None, [_user(f"bulk{i}@example.com") for i in range(100)])),
+    ("refresh token", lambda w: ("POST", "/api/v1/token/refresh/", None, {"refresh_token": w["buyer_refresh"]})),
+]
+
+@pytest.mark.parametrize("name,request_for", ROUTES, ids=[name for name, _ in ROUTES])
+def test_route_stays_within_query_budget(client, world, name, request_for):
+    # QUERY_BUDGET_MODE=raise turns an overrun into QueryBudgetExceeded, which the test client re-raises.
+    method, path, headers, body = request_for(world)
+    response = client.request(method, path, headers=headers, json=body)
+    assert response.status_code < 400, response.text
+
+def test_over_budget_route_raises(client, world, monkeypatch):
+    monkeypatch.setattr(graph.query_user_graph, "query_budget", 1)
+    with pytest.raises(query_budget.QueryBudgetExceeded):
+        client.post(f"/api/v1/users/{world['farmer']}/query/", headers=world["farmer_headers"], json={
+            "include": {"farms": {"farm_species": {}}},
+        })
+
+def test_over_budget_write_rolls_back(client, world, monkeypatch):
+    listings_path = f"/api/v1/users/{world['farmer']}/farms/{world['farm']}/farm_species/"
+    stock = lambda: {row["id"]: row["available_quantity"] for row in client.get(listings_path, headers=world["farmer_headers"]).json()}
+    before = stock()
+    monkeypatch.setattr(orders.checkout, "query_budget", 2)
+    with pytest.raises(query_budget.QueryBudgetExceeded):
+        client.post(f"/api/v1/users/{world['buyer']}/checkout/", headers=world["buyer_headers"], json={
+            "farm_id": world["farm"], "name": "Order", "description": "Over budget", "status": "paid", "payment_method": "card",
+            "items": [{"farm_species_id": world["listings"][0], "quantity": 1}],
+        })
+    assert stock() == before
+
+def test_transaction_requires_a_party_to_the_order(client, world):
+    stranger = client.post("/api/v1/users/", json=_user("stranger@example.com")).json()["id"]
+    stranger_headers, _ = _login(client, "stranger@example.com")
+    response = client.post(f"/api/v1/users/{stranger}/orders/{world['order']}/transactions/", headers=stranger_headers, json={
+        "buyer_id": stranger, "farm_id": world["farm"], "order_id": world["order"], "total_amount": 5, "status": "paid", "payment_method": "card",
+    })
+    assert response.status_code == 404, response.text
+
+def test_transaction_farm_must_be_the_orders_farm(client, world):
+    other = client.post("/api/v1/users/", json=_user("other-farmer@example.com", "farmer")).json()["id"]
+    other_headers, _ = _login(client, "other-farmer@example.com")
+    other_farm = client.post(f"/api/v1/users/{other}/farms/", headers=other_headers, json={
+        "farmer_id": other, "type": "FARM", "name": "Other", "description": "Another farm", "latitude": 12.9, "longitude": 77.6,
+    }).json()["id"]
+    response = client.post(f"/api/v1/users/{world['buyer']}/orders/{world['order']}/transactions/", headers=world["buyer_headers"], json={
+        "buyer_id": world["buyer"], "farm_id": other_farm, "order_id": world["order"], "total_amount": 5, "status": "paid", "payment_method": "card",
+    })
+    assert response.status_code == 403, response.text
+
+def test_orders_list_follows_the_token_role(client, world):
+    for user, headers in ((world["farmer"], world["farmer_headers"]), (world["buyer"], world["buyer_headers"])):
+        response = client.get(f"/api/v1/users/{user}/orders/", headers=headers)
+        assert world["order"] in [order["id"] for order in response.json()]
+
+def test_farms_list_needs_a_caller_and_an_owner(client, world):
+    assert client.get(f"/api/v1/users/farms/?owner_id={world['farmer']}").status_code == 401
+    assert client.get("/api/v1/users/farms/", headers=world["buyer_headers"]).status_code == 422
+    response = client.get(f"/api/v1/users/farms/?owner_id={world['buyer']}", headers=world["buyer_headers"])
+    assert response.json() == []
+
+@pytest.mark.parametrize("background", ["false", "true"])
+def test_deleting_a_missing_farm_or_species_is_not_found(client, world, background):
+    base = f"/api/v1/users/{world['farmer']}/farms"
+    for path in (f"{base}/999999", f"{base}/{world['farm']}/species/999999"):
+        response = client.delete(f"{path}?background={background}", headers=world["farmer_headers"])
+        assert response.status_code == 404, response.text
+
+def test_listings_hide_with_their_soft_deleted_parents(client, world):
+    headers, base = world["farmer_headers"], f"/api/v1/users/{world['farmer']}/farms"
+    farm = client.post(f"{base}/", headers=headers, json={
+        "farmer_id": world["farmer"], "type": "FARM", "name": "Retiring", "description": "Test farm", "latitude": 12.9, "longitude": 77.6,
+    }).json()["id"]
+    species = client.post(f"{base}/{farm}/species/", headers=headers, json={**SPECIES, "common_name": "Retired"}).json()["id"]
+    sub_species = client.post(f"{base}/{farm}/species/{species}/sub_species/", headers=headers, json={
+        "species_id": species, "name": "Old", "common_name": "Old tomato", "description": "Gone", "growth_rate": "slow", "unique_traits": "None",
+    }).json()["id"]
+    client.post(f"{base}/{farm}/farm_species/", headers=headers, json={
+        "farm_id": farm, "sub_species_id": sub_species, "name": "Last listing", "price": 5, "available_quantity": 10,
+    })
+
+    def visible():
+        listed = client.get(f"/api/v1/listings/?sub_species_id={sub_species}").json()
+        farm_listed = client.get(f"{base}/{farm}/farm_species/", headers=headers).json()
+        return len(listed), len(farm_listed)
+
+    assert visible() == (1, 1)
+    assert client.delete(f"{base}/{farm}/species/{species}?background=true", headers=headers).status_code == 202
+    assert visible() == (0, 0)
+
+    client.post(f"{base}/{farm}/farm_species/", headers=headers, json={
+        "farm_id": farm, "sub_species_id": world["sub_species"], "name": "Moved listing", "price": 5, "available_quantity": 10,
+    })
+    listed = len(client.get(f"/api/v1/listings/?sub_species_id={world['sub_species']}").json())
+    assert len(client.get(f"{base}/{farm}/farm_species/", headers=headers).json()) == 1
+    assert client.delete(f"{base}/{farm}?background=true", headers=headers).status_code == 202
+    assert client.get(f"{base}/{farm}/farm_species/", headers=headers).json() == []
+    assert len(client.get(f"/api/v1/listings/?sub_species_id={world['sub_species']}").json()) == listed - 1